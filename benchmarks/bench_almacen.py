@@ -0,0 +1,52 @@
+"""Latencia de BUSCAR: índice en memoria vs. recorrido completo del CSV.
+
+Uso: python benchmarks/bench_almacen.py [--max 1000000]
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+
+from comun import cronometrar, generar_datos, usar_con_hilos
+
+usar_con_hilos()
+from almacen import Almacen  # noqa: E402
+
+
+def buscar_recorriendo(archivo, id_est):
+    """Algoritmo original: recorre todo el CSV por cada consulta."""
+    with open(archivo, 'r', newline='') as f:
+        return [r for r in csv.DictReader(f) if r['ID_Estudiante'] == id_est]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max', type=int, default=1_000_000, help='número máximo de filas')
+    parser.add_argument('--consultas', type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"{'filas':>10} {'carga (s)':>10} {'índice (µs)':>12} {'recorrido (µs)':>15}")
+    n = 1000
+    while n <= args.max:
+        with tempfile.TemporaryDirectory() as tmp:
+            ids = generar_datos(tmp, n)
+            almacen = Almacen(os.path.join(tmp, 'estudiantes.csv'),
+                              os.path.join(tmp, 'calificaciones.csv'))
+            inicio = time.perf_counter()
+            almacen.cargar()
+            carga = time.perf_counter() - inicio
+
+            rnd = random.Random(1)
+            t_indice = cronometrar(lambda: almacen.calificaciones_de(rnd.choice(ids)), args.consultas)
+            # El recorrido completo se mide con pocas repeticiones: es O(N).
+            reps = max(1, 100_000 // n)
+            t_recorrido = cronometrar(
+                lambda: buscar_recorriendo(almacen.archivo_calificaciones, rnd.choice(ids)), reps)
+            print(f"{n:>10} {carga:>10.3f} {t_indice * 1e6:>12.2f} {t_recorrido * 1e6:>15.0f}")
+        n *= 10
+
+
+if __name__ == '__main__':
+    main()
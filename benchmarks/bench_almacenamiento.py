@@ -0,0 +1,107 @@
+"""Almacen (CSV + índices en memoria) vs. AlmacenSQLite con los mismos datos.
+
+Para cada tamaño se generan los CSV, se migran a SQLite con migrar.py y
+cada almacenamiento se mide en un proceso nuevo: arranque, memoria, tamaño
+en disco y tiempo por operación de los comandos del servidor (BUSCAR,
+AGREGAR con fsync, ACTUALIZAR, ELIMINAR, LISTAR paginado, PROMEDIO y
+RANKING). ACTUALIZAR y ELIMINAR reescriben el CSV completo, así que en
+modo csv se repiten pocas veces.
+
+Uso: python benchmarks/bench_almacenamiento.py [--filas 100000 1000000]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_instantanea import rss_maximo_mb
+from comun import CON_HILOS, NRCS, cronometrar, generar_datos
+
+ALMACENAMIENTOS = ['csv', 'sqlite']
+OPERACIONES = ['BUSCAR', 'AGREGAR', 'ACTUALIZAR', 'ELIMINAR', 'LISTAR', 'PROMEDIO', 'RANKING']
+
+
+def medir(almacenamiento, directorio, consultas, escrituras):
+    """Se ejecuta en el proceso hijo; imprime un JSON con los resultados."""
+    sys.path.insert(0, CON_HILOS)
+    from almacen import Almacen
+    from almacen_sqlite import AlmacenSQLite
+
+    inicio = time.perf_counter()
+    if almacenamiento == 'csv':
+        almacen = Almacen(os.path.join(directorio, 'estudiantes.csv'),
+                          os.path.join(directorio, 'calificaciones.csv'))
+        reescrituras = min(escrituras, 5)
+    else:
+        almacen = AlmacenSQLite(os.path.join(directorio, 'calificaciones.db'))
+        reescrituras = escrituras
+    almacen.cargar()
+    arranque = time.perf_counter() - inicio
+    estudiantes, filas = almacen.contar()
+    ids = [str(100000 + i) for i in range(estudiantes)]
+    rnd = random.Random(1)
+    eliminables = iter(rnd.sample(ids, reescrituras))
+
+    def actualizar():
+        i = rnd.randrange(len(ids))
+        almacen.actualizar_calificacion(ids[i], NRCS[i % len(NRCS)], 10.0)
+
+    tiempos = {
+        'BUSCAR': cronometrar(lambda: almacen.calificaciones_de(rnd.choice(ids)), consultas),
+        'AGREGAR': cronometrar(lambda: almacen.agregar_calificacion(rnd.choice(ids), 'MAT101', 12.0),
+                               escrituras),
+        'ACTUALIZAR': cronometrar(actualizar, reescrituras),
+        'ELIMINAR': cronometrar(lambda: almacen.eliminar_calificaciones(next(eliminables)), reescrituras),
+        'LISTAR': cronometrar(lambda: almacen.pagina(rnd.randrange(filas), 50), consultas),
+        'PROMEDIO': cronometrar(lambda: almacen.promedio_de(rnd.choice(ids)), consultas),
+        'RANKING': cronometrar(lambda: almacen.ranking_de(rnd.choice(NRCS), 10), max(consultas // 100, 10)),
+    }
+    almacen.cerrar()
+    print(json.dumps({"arranque": arranque, "rss_mb": rss_maximo_mb(), "tiempos": tiempos}))
+
+
+def tamano_mb(directorio, almacenamiento):
+    nombres = (['estudiantes.csv', 'calificaciones.csv'] if almacenamiento == 'csv'
+               else ['calificaciones.db', 'calificaciones.db-wal'])
+    return sum(os.path.getsize(os.path.join(directorio, n)) for n in nombres
+               if os.path.exists(os.path.join(directorio, n))) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--consultas', type=int, default=5_000)
+    parser.add_argument('--escrituras', type=int, default=200)
+    parser.add_argument('--medir', nargs=2, metavar=('ALMACENAMIENTO', 'DIR'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.medir:
+        medir(args.medir[0], args.medir[1], args.consultas, args.escrituras)
+        return
+
+    print(f"{'filas':>9} {'almac.':>7} {'migrar (s)':>10} {'arranque (s)':>12} {'RSS (MB)':>9} "
+          f"{'disco (MB)':>10} " + ' '.join(f"{op + ' (µs)':>15}" for op in OPERACIONES))
+    for n in args.filas:
+        with tempfile.TemporaryDirectory() as tmp:
+            generar_datos(tmp, n)
+            inicio = time.perf_counter()
+            subprocess.run([sys.executable, os.path.join(CON_HILOS, 'migrar.py'), 'a-sqlite', '--datos', tmp],
+                           check=True, stdout=subprocess.DEVNULL)
+            migracion = time.perf_counter() - inicio
+            for almacenamiento in ALMACENAMIENTOS:
+                disco = tamano_mb(tmp, almacenamiento)
+                salida = subprocess.run(
+                    [sys.executable, __file__, '--consultas', str(args.consultas),
+                     '--escrituras', str(args.escrituras), '--medir', almacenamiento, tmp],
+                    capture_output=True, text=True, check=True).stdout
+                r = json.loads(salida.strip().splitlines()[-1])
+                mig = f"{migracion:.2f}" if almacenamiento == 'sqlite' else '-'
+                print(f"{n:>9} {almacenamiento:>7} {mig:>10} {r['arranque']:>12.2f} {r['rss_mb']:>9.1f} "
+                      f"{disco:>10.1f} " + ' '.join(f"{r['tiempos'][op] * 1e6:>15.1f}" for op in OPERACIONES))
+
+
+if __name__ == '__main__':
+    main()
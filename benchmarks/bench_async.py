@@ -0,0 +1,77 @@
+"""Prueba de carga: servidor con un hilo por conexión vs. servidor asyncio.
+
+Mantiene C clientes concurrentes que repiten BUSCAR/AGREGAR (una conexión por
+comando, como client.py) y reporta comandos por segundo, respuestas busy y errores.
+
+Uso: python benchmarks/bench_async.py [--clientes 10 100 1000 3000] [--segundos 5]
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+
+from comun import (NRCS, generar_datos, iniciar_servidor_calificaciones,
+                   iniciar_servidor_nrc, subir_limite_descriptores)
+
+PUERTO = 22345
+PUERTO_NRC = 22346
+
+
+async def cliente(ids, fin, resultados, timeout):
+    rnd = random.Random()
+    while time.monotonic() < fin:
+        if rnd.random() < 0.2:
+            cmd = f"AGREGAR|{rnd.choice(ids)}|{rnd.choice(NRCS)}|{rnd.randint(0, 20)}"
+        else:
+            cmd = f"BUSCAR|{rnd.choice(ids)}"
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection('localhost', PUERTO), timeout)
+            writer.write(cmd.encode('utf-8'))
+            await writer.drain()
+            resp = await asyncio.wait_for(reader.read(), timeout)
+            writer.close()
+            if resp.startswith(b'{"status": "ok"'):
+                resultados['ok'] += 1
+            elif resp.startswith(b'{"status": "busy"'):
+                resultados['ocupado'] += 1
+            else:
+                resultados['error'] += 1
+        except (OSError, asyncio.TimeoutError):
+            resultados['error'] += 1
+
+
+async def medir(ids, clientes, segundos):
+    resultados = {'ok': 0, 'ocupado': 0, 'error': 0}
+    fin = time.monotonic() + segundos
+    await asyncio.gather(*(cliente(ids, fin, resultados, 10) for _ in range(clientes)))
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clientes', type=int, nargs='+', default=[10, 100, 1000, 3000])
+    parser.add_argument('--segundos', type=float, default=5)
+    args = parser.parse_args()
+    subir_limite_descriptores()
+
+    print(f"{'modo':>6} {'clientes':>9} {'cmd/s':>9} {'busy':>8} {'errores':>8}")
+    for modo in ('hilos', 'async'):
+        with tempfile.TemporaryDirectory() as tmp:
+            ids = generar_datos(tmp, 10_000)
+            nrc = iniciar_servidor_nrc(tmp, PUERTO_NRC)
+            srv = iniciar_servidor_calificaciones(tmp, PUERTO, PUERTO_NRC, '--modo', modo)
+            try:
+                for c in args.clientes:
+                    r = asyncio.run(medir(ids, c, args.segundos))
+                    print(f"{modo:>6} {c:>9} {r['ok'] / args.segundos:>9.0f} {r['ocupado']:>8} {r['error']:>8}")
+            finally:
+                srv.terminate()
+                nrc.terminate()
+                srv.wait()
+                nrc.wait()
+
+
+if __name__ == '__main__':
+    main()
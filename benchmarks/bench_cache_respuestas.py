@@ -0,0 +1,83 @@
+"""con_hilos con y sin la caché de respuestas (BUSCAR/LISTAR ya serializados).
+
+Simula un día de publicación de notas: muchos clientes consultan
+calificaciones de un grupo de estudiantes y la primera página de LISTAR,
+con o sin una parte de AGREGAR que va invalidando la caché. Cada caso se
+mide con el mismo servidor arrancado con --cache-respuestas 0 y con el
+valor por defecto, usando el modo de carga de cliente.py.
+
+Uso: python benchmarks/bench_cache_respuestas.py [--filas 100000] [--trabajadores 16]
+         [--segundos 5] [--estudiantes 2000]
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+
+from comun import NRCS, generar_datos, iniciar_servidor_calificaciones, iniciar_servidor_nrc, usar_con_hilos
+
+usar_con_hilos()
+import cliente  # noqa: E402
+
+PUERTO = 22455
+PUERTO_NRC = 22456
+# nombre -> {comando: peso}
+MEZCLAS = {
+    'solo lectura': {'BUSCAR': 90, 'LISTAR': 10},
+    '5% AGREGAR': {'BUSCAR': 85, 'LISTAR': 10, 'AGREGAR': 5},
+}
+
+
+def comandos(mezcla, ids, n=5000, semilla=0):
+    rnd = random.Random(semilla)
+    nombres, pesos = zip(*mezcla.items())
+    lista = []
+    for op in rnd.choices(nombres, pesos, k=n):
+        id_est = rnd.choice(ids)
+        if op == 'BUSCAR':
+            lista.append(f"BUSCAR|{id_est}")
+        elif op == 'LISTAR':
+            lista.append(f"LISTAR|{rnd.choice([0, 0, 0, 50, 100])}|50")
+        else:
+            lista.append(f"AGREGAR|{id_est}|{rnd.choice(NRCS)}|{rnd.randint(0, 20)}")
+    return lista
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, default=100_000)
+    parser.add_argument('--estudiantes', type=int, default=2000, help="estudiantes consultados")
+    parser.add_argument('--trabajadores', type=int, default=16)
+    parser.add_argument('--segundos', type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mezcla':>14} {'caché':>6} {'cmd/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'aciertos':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        ids = generar_datos(tmp, args.filas)[:args.estudiantes]
+        nrc = iniciar_servidor_nrc(tmp, PUERTO_NRC)
+        try:
+            for nombre, mezcla in MEZCLAS.items():
+                lista = comandos(mezcla, ids)
+                for mb in (0, 64):
+                    srv = iniciar_servidor_calificaciones(tmp, PUERTO, PUERTO_NRC, '--cache-respuestas', str(mb),
+                                                          '--durabilidad', 'none')
+                    try:
+                        r = asyncio.run(cliente.cargar(lista, args.trabajadores, puerto=PUERTO,
+                                                       segundos=args.segundos))
+                        with cliente.Cliente(puerto=PUERTO) as c:
+                            stats = c.enviar("STATS")["data"].get("cache_respuestas")
+                    finally:
+                        srv.terminate()
+                        srv.wait()
+                    aciertos = '-'
+                    if stats:
+                        total = stats["aciertos"] + stats["fallos"]
+                        aciertos = f"{stats['aciertos'] / total:.0%}" if total else '-'
+                    print(f"{nombre:>14} {'sí' if mb else 'no':>6} {r['por_segundo']:>9.0f} "
+                          f"{r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {aciertos:>9}")
+        finally:
+            nrc.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Contención: un candado global vs. un candado de lectores y escritor por archivo.
+
+Varios hilos hacen BUSCAR (estudiante_existe + calificaciones_de) mientras
+otros registran estudiantes y agregan calificaciones sobre el mismo Almacen.
+El modo "global" reproduce el CSV_LOCK anterior: un solo threading.Lock para
+toda lectura y escritura de ambos archivos. Cada hilo hace una pausa entre
+operaciones, como un hilo del servidor que espera el siguiente comando; sin
+ella los lectores acaparan el GIL y lo que se mide es el GIL, no el candado.
+
+Uso: python benchmarks/bench_candados.py [--lectores 8] [--escritores 2] [--segundos 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from comun import generar_datos, usar_con_hilos
+
+usar_con_hilos()
+from almacen import Almacen  # noqa: E402
+
+
+class CandadoGlobal:
+    """Misma interfaz que CandadoLE, pero lectores y escritores se excluyen.
+
+    Es reentrante porque Almacen toma exclusivo() dentro de escritura() y
+    ambos archivos comparten este mismo objeto.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def lectura(self):
+        with self._lock:
+            yield
+
+    escritura = exclusivo = lectura
+
+
+def correr(almacen, ids, lectores, escritores, segundos, pausa):
+    fin = time.monotonic() + segundos
+    latencias = []
+    escrituras = [0]
+    errores = []
+
+    def leer(semilla):
+        rnd = random.Random(semilla)
+        propias = []
+        try:
+            while time.monotonic() < fin:
+                id_est = rnd.choice(ids)
+                inicio = time.perf_counter()
+                if almacen.estudiante_existe(id_est):
+                    almacen.calificaciones_de(id_est)
+                propias.append(time.perf_counter() - inicio)
+                time.sleep(pausa)
+        except Exception as e:
+            errores.append(e)
+        latencias.extend(propias)
+
+    def escribir(semilla):
+        rnd = random.Random(semilla)
+        n = 0
+        try:
+            while time.monotonic() < fin:
+                almacen.agregar_estudiante(f'E{semilla}-{n}', 'Nuevo')
+                almacen.agregar_calificacion(rnd.choice(ids), 'MAT101', float(rnd.randint(0, 20)))
+                n += 2
+                time.sleep(pausa)
+        except Exception as e:
+            errores.append(e)
+        escrituras[0] += n
+
+    hilos = [threading.Thread(target=leer, args=(i,)) for i in range(lectores)]
+    hilos += [threading.Thread(target=escribir, args=(1000 + i,)) for i in range(escritores)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    if errores:
+        raise errores[0]
+    latencias.sort()
+    return (len(latencias) / segundos, escrituras[0] / segundos,
+            statistics.median(latencias), latencias[int(len(latencias) * 0.99)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, default=100_000)
+    parser.add_argument('--lectores', type=int, default=8)
+    parser.add_argument('--escritores', type=int, default=2)
+    parser.add_argument('--segundos', type=float, default=5)
+    parser.add_argument('--pausa', type=float, default=0.0002, help='segundos entre operaciones de cada hilo')
+    args = parser.parse_args()
+
+    print(f"{args.lectores} lectores, {args.escritores} escritores, {args.filas} filas")
+    print(f"{'candado':>22} {'BUSCAR/s':>10} {'escrituras/s':>13} {'p50 (µs)':>9} {'p99 (µs)':>9}")
+    for nombre in ('global', 'lectores-escritor'):
+        with tempfile.TemporaryDirectory() as tmp:
+            ids = generar_datos(tmp, args.filas)
+            if nombre == 'global':
+                candado = CandadoGlobal()
+                candados = {'candado_estudiantes': candado, 'candado_calificaciones': candado}
+            else:
+                candados = {}
+            almacen = Almacen(os.path.join(tmp, 'estudiantes.csv'),
+                              os.path.join(tmp, 'calificaciones.csv'), **candados)
+            almacen.cargar()
+            lecturas, escrituras, p50, p99 = correr(almacen, ids, args.lectores,
+                                                    args.escritores, args.segundos, args.pausa)
+            print(f"{nombre:>22} {lecturas:>10.0f} {escrituras:>13.0f} {p50 * 1e6:>9.1f} {p99 * 1e6:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
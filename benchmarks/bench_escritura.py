@@ -0,0 +1,74 @@
+"""AGREGAR concurrente con cada modo de durabilidad del Almacen.
+
+Varios hilos agregan calificaciones a la vez; se mide cuántas filas por
+segundo se confirman, cuánto tarda cada confirmación y cuántas escrituras
+(lotes) llegan al archivo.
+
+Uso: python benchmarks/bench_escritura.py [--hilos 32] [--por-hilo 200]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from comun import generar_datos, usar_con_hilos
+
+usar_con_hilos()
+from almacen import DURABILIDADES, Almacen  # noqa: E402
+
+
+def medir(durabilidad, ids, tmp, hilos, por_hilo, intervalo):
+    almacen = Almacen(os.path.join(tmp, 'estudiantes.csv'), os.path.join(tmp, 'calificaciones.csv'),
+                      durabilidad=durabilidad, intervalo_lote=intervalo)
+    almacen.cargar()
+    antes = len(almacen.filas)
+    latencias = []
+
+    def trabajar(k):
+        propias = []
+        for i in range(por_hilo):
+            inicio = time.perf_counter()
+            almacen.agregar_calificacion(ids[(k * por_hilo + i) % len(ids)], 'MAT101', 15.0)
+            propias.append(time.perf_counter() - inicio)
+        latencias.extend(propias)
+
+    inicio = time.perf_counter()
+    trabajadores = [threading.Thread(target=trabajar, args=(k,)) for k in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    confirmadas = time.perf_counter() - inicio
+    almacen.cerrar()
+    total = time.perf_counter() - inicio
+    assert len(almacen.filas) - antes == hilos * por_hilo
+    escritura = almacen.escritura_agrupada()
+    lotes = escritura["lotes"] if escritura else hilos * por_hilo
+    latencias.sort()
+    return (hilos * por_hilo / confirmadas, total, lotes,
+            statistics.median(latencias), latencias[int(len(latencias) * 0.99)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hilos', type=int, default=32)
+    parser.add_argument('--por-hilo', type=int, default=200)
+    parser.add_argument('--intervalo', type=float, default=0, help='segundos para juntar un lote')
+    args = parser.parse_args()
+
+    print(f"{args.hilos} hilos x {args.por_hilo} AGREGAR")
+    print(f"{'durabilidad':>12} {'confirmadas/s':>14} {'en disco (s)':>13} {'escrituras':>11} "
+          f"{'p50 (ms)':>9} {'p99 (ms)':>9}")
+    for durabilidad in DURABILIDADES:
+        with tempfile.TemporaryDirectory() as tmp:
+            ids = generar_datos(tmp, 10_000)
+            por_s, total, lotes, p50, p99 = medir(durabilidad, ids, tmp, args.hilos,
+                                                  args.por_hilo, args.intervalo)
+            print(f"{durabilidad:>12} {por_s:>14.0f} {total:>13.2f} {lotes:>11} "
+                  f"{p50 * 1e3:>9.2f} {p99 * 1e3:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
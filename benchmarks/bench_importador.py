@@ -0,0 +1,54 @@
+"""Throughput de con_hilos/importador.py sobre una entrada sintética.
+
+Uso: python benchmarks/bench_importador.py [--filas 1000000] [--procesos 4]
+"""
+import argparse
+import csv
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+from comun import CON_HILOS, NRCS, RAIZ
+
+
+def generar_entrada(archivo, filas, semilla=0):
+    """Un 10 % de filas con errores (rango, NRC o estudiante sin nombre)."""
+    rnd = random.Random(semilla)
+    n_estudiantes = max(1, filas // 5)
+    with open(archivo, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['ID_Estudiante', 'Nombre', 'Materia', 'Calificación'])
+        for k in range(filas):
+            id_est = 200000 + rnd.randrange(n_estudiantes)
+            nombre = f'Estudiante {id_est}'
+            materia, calif = NRCS[k % len(NRCS)], rnd.randint(0, 20)
+            error = rnd.random()
+            if error < 0.04:
+                calif = 25
+            elif error < 0.07:
+                materia = 'XXX999'
+            elif error < 0.10:
+                nombre = ''
+            w.writerow([id_est, nombre, materia, calif])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        entrada = os.path.join(tmp, 'entrada.csv')
+        generar_entrada(entrada, args.filas)
+        base = [sys.executable, os.path.join(CON_HILOS, 'importador.py'), '--datos', tmp]
+        subprocess.run(base + ['importar', entrada, '--procesos', str(args.procesos),
+                               '--catalogo', os.path.join(RAIZ, 'nrcs.csv'),
+                               '--rechazos', os.path.join(tmp, 'rechazados.csv')], check=True)
+        subprocess.run(base + ['exportar', os.path.join(tmp, 'salida.csv')], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Arranque en frío y memoria: CSV vs. instantánea binaria (instantanea.py).
+
+Cada medición corre en un proceso nuevo para que el RSS y el tiempo de
+arranque no arrastren cachés de la medición anterior:
+
+- csv: sin_hilos sin instantánea (lee el CSV al abrir el registro y
+  recorre el archivo completo en cada BUSCAR);
+- almacén: con_hilos, índices en memoria construidos desde el CSV;
+- instantánea: sin_hilos abriendo la instantánea con mmap.
+
+Uso: python benchmarks/bench_instantanea.py [--max 1000000]
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from comun import CON_HILOS, RAIZ, SIN_HILOS, cronometrar, generar_datos
+
+MODOS = ['csv', 'almacén', 'instantánea']
+
+
+def rss_maximo_mb():
+    """Pico de memoria residente de este proceso.
+
+    Se prefiere VmHWM porque ru_maxrss de un hijo recién lanzado arrastra el
+    pico del padre previo al exec.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for linea in f:
+                if linea.startswith('VmHWM:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def medir(modo, directorio, consultas):
+    """Se ejecuta en el proceso hijo; imprime un JSON con los resultados."""
+    estudiantes = os.path.join(directorio, 'estudiantes.csv')
+    calificaciones = os.path.join(directorio, 'calificaciones.csv')
+    ids = [f'{100000 + i}' for i in range(10_000)]
+    rnd = random.Random(1)
+    inicio = time.perf_counter()
+    if modo == 'almacén':
+        sys.path.insert(0, CON_HILOS)
+        from almacen import Almacen
+        almacen = Almacen(estudiantes, calificaciones)
+        almacen.cargar()
+        buscar = almacen.calificaciones_de
+    else:
+        sys.path[:0] = [SIN_HILOS, RAIZ]
+        import server
+        server.ARCHIVO_CALIFICACIONES = calificaciones
+        server.ARCHIVO_REGISTRO = os.path.join(directorio, 'calificaciones.log')
+        server.USAR_INSTANTANEA = modo == 'instantánea'
+        server.abrir_registro()
+        buscar = server.filas_de
+        if modo == 'csv':
+            consultas = min(consultas, 20)   # cada BUSCAR recorre todo el CSV
+    arranque = time.perf_counter() - inicio
+    t_buscar = cronometrar(lambda: buscar(rnd.choice(ids)), consultas)
+    rss_mb = rss_maximo_mb()
+    print(json.dumps({"arranque": arranque, "buscar": t_buscar, "rss_mb": rss_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max', type=int, default=1_000_000, help='número máximo de filas')
+    parser.add_argument('--consultas', type=int, default=10_000)
+    parser.add_argument('--medir', nargs=2, metavar=('MODO', 'DIR'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.medir:
+        medir(args.medir[0], args.medir[1], args.consultas)
+        return
+
+    sys.path.insert(0, RAIZ)
+    import instantanea
+
+    print(f"{'filas':>10} {'modo':>12} {'generar (s)':>12} {'arranque (s)':>13} "
+          f"{'BUSCAR (µs)':>12} {'RSS (MB)':>9}")
+    n = 10_000
+    while n <= args.max:
+        with tempfile.TemporaryDirectory() as tmp:
+            generar_datos(tmp, n)
+            archivo = os.path.join(tmp, 'calificaciones.csv')
+            inicio = time.perf_counter()
+            instantanea.generar(archivo)
+            generacion = time.perf_counter() - inicio
+            for modo in MODOS:
+                salida = subprocess.run(
+                    [sys.executable, __file__, '--consultas', str(args.consultas), '--medir', modo, tmp],
+                    capture_output=True, text=True, check=True).stdout
+                r = json.loads(salida.strip().splitlines()[-1])
+                gen = f"{generacion:.3f}" if modo == 'instantánea' else '-'
+                print(f"{n:>10} {modo:>12} {gen:>12} {r['arranque']:>13.3f} "
+                      f"{r['buscar'] * 1e6:>12.1f} {r['rss_mb']:>9.1f}")
+                if os.path.exists(os.path.join(tmp, 'calificaciones.log')):
+                    os.remove(os.path.join(tmp, 'calificaciones.log'))
+        n *= 10
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Memoria por fila de calificaciones: dicts de csv.DictReader vs. Fila.
+
+Para cada tamaño se generan los CSV y se mide con tracemalloc cuánto queda
+ocupado después de cargar las filas:
+  - dict por fila con csv.DictReader (claves por fila, calificación como
+    texto, ID y materia repetidos en cada fila);
+  - Fila (__slots__, ID y NRC internados, nota en float);
+  - Almacen.cargar() completo: filas más índices y agregados.
+
+Uso: python benchmarks/bench_memoria_filas.py [--filas 100000 1000000]
+"""
+import argparse
+import csv
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from comun import generar_datos, usar_con_hilos
+
+usar_con_hilos()
+from almacen import Almacen  # noqa: E402
+from fila import Fila  # noqa: E402
+
+
+def dict_reader(tmp):
+    with open(os.path.join(tmp, 'calificaciones.csv'), newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def filas(tmp):
+    with open(os.path.join(tmp, 'calificaciones.csv'), newline='') as f:
+        lector = csv.reader(f)
+        next(lector)
+        return [Fila(*row) for row in lector]
+
+
+def almacen(tmp):
+    a = Almacen(os.path.join(tmp, 'estudiantes.csv'), os.path.join(tmp, 'calificaciones.csv'))
+    a.cargar()
+    return a
+
+
+CARGAS = {'DictReader': dict_reader, 'Fila': filas, 'Almacen': almacen}
+
+
+def medir(carga, tmp):
+    """(bytes retenidos, segundos) de `carga(tmp)`."""
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = carga(tmp)
+    segundos = time.perf_counter() - inicio
+    retenidos, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del resultado
+    return retenidos, segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, nargs='+', default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'filas':>9} {'carga':>11} {'MB':>8} {'bytes/fila':>11} {'carga (s)':>10}")
+    for n in args.filas:
+        with tempfile.TemporaryDirectory() as tmp:
+            generar_datos(tmp, n)
+            for nombre, carga in CARGAS.items():
+                retenidos, segundos = medir(carga, tmp)
+                print(f"{n:>9} {nombre:>11} {retenidos / 2**20:>8.1f} {retenidos / n:>11.0f} {segundos:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
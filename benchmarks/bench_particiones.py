@@ -0,0 +1,109 @@
+"""Almacen con un solo calificaciones.csv vs. AlmacenParticionado con N particiones.
+
+Para cada tamaño se generan los CSV, se reparten con migrar.py particionar y
+se mide con cada configuración:
+  - ACTUALIZAR y ELIMINAR de un estudiante al azar (reescriben el CSV de su
+    partición, o el único CSV);
+  - varios hilos que hacen AGREGAR con durabilidad every-write (un fsync
+    por fila) o ACTUALIZAR a la vez, en filas por segundo;
+  - BUSCAR, LISTAR paginado y RANKING, que con particiones combinan todas.
+
+Uso: python benchmarks/bench_particiones.py [--filas 100000 1000000] [--particiones 4 16]
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from comun import CON_HILOS, NRCS, cronometrar, generar_datos, usar_con_hilos
+
+usar_con_hilos()
+from almacen import Almacen  # noqa: E402
+from almacen_particionado import AlmacenParticionado  # noqa: E402
+
+
+def crear(tmp, particiones):
+    if particiones == 1:
+        almacen = Almacen(os.path.join(tmp, 'estudiantes.csv'), os.path.join(tmp, 'calificaciones.csv'))
+    else:
+        subprocess.run([sys.executable, os.path.join(CON_HILOS, 'migrar.py'), 'particionar', '--datos', tmp,
+                        '--particiones', str(particiones), '--reemplazar'],
+                       check=True, stdout=subprocess.DEVNULL)
+        almacen = AlmacenParticionado(os.path.join(tmp, 'particiones'), particiones)
+    almacen.cargar()
+    return almacen
+
+
+def concurrente(operacion, hilos, segundos):
+    """Filas por segundo con `hilos` hilos llamando a `operacion(rnd)`."""
+    hechas = [0] * hilos
+    limite = time.perf_counter() + segundos
+
+    def trabajar(k):
+        rnd = random.Random(k)
+        while time.perf_counter() < limite:
+            operacion(rnd)
+            hechas[k] += 1
+
+    trabajadores = [threading.Thread(target=trabajar, args=(k,)) for k in range(hilos)]
+    inicio = time.perf_counter()
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    return sum(hechas) / (time.perf_counter() - inicio)
+
+
+def medir(almacen, ids, args):
+    rnd = random.Random(1)
+    eliminables = iter(rnd.sample(ids, args.reescrituras))
+
+    def actualizar(r):
+        i = r.randrange(len(ids))
+        almacen.actualizar_calificacion(ids[i], NRCS[i % len(NRCS)], 10.0)
+
+    _, filas = almacen.contar()
+    return {
+        'ACTUALIZAR (ms)': cronometrar(lambda: actualizar(rnd), args.reescrituras) * 1e3,
+        'ELIMINAR (ms)': cronometrar(lambda: almacen.eliminar_calificaciones(next(eliminables)),
+                                     args.reescrituras) * 1e3,
+        'AGREGAR/s': concurrente(lambda r: almacen.agregar_calificacion(r.choice(ids), 'MAT101', 12.0),
+                                 args.hilos, args.segundos),
+        'ACTUALIZAR/s': concurrente(actualizar, args.hilos, args.segundos),
+        'BUSCAR (µs)': cronometrar(lambda: almacen.calificaciones_de(rnd.choice(ids)), 5000) * 1e6,
+        'LISTAR (µs)': cronometrar(lambda: almacen.pagina(rnd.randrange(filas), 50), 5000) * 1e6,
+        'RANKING (µs)': cronometrar(lambda: almacen.ranking_de(rnd.choice(NRCS), 10), 5000) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--particiones', type=int, nargs='+', default=[4, 16])
+    parser.add_argument('--hilos', type=int, default=16)
+    parser.add_argument('--segundos', type=float, default=3)
+    parser.add_argument('--reescrituras', type=int, default=5)
+    args = parser.parse_args()
+
+    columnas = None
+    for n in args.filas:
+        with tempfile.TemporaryDirectory() as tmp:
+            ids = generar_datos(tmp, n)
+            for particiones in [1] + args.particiones:
+                almacen = crear(tmp, particiones)
+                r = medir(almacen, ids, args)
+                almacen.cerrar()
+                if columnas is None:
+                    columnas = list(r)
+                    print(f"{'filas':>9} {'part.':>5} " + ' '.join(f"{c:>15}" for c in columnas))
+                print(f"{n:>9} {particiones:>5} " + ' '.join(f"{r[c]:>15.1f}" for c in columnas))
+                # Cada configuración parte de los mismos CSV
+                ids = generar_datos(tmp, n)
+
+
+if __name__ == '__main__':
+    main()
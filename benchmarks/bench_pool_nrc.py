@@ -0,0 +1,77 @@
+"""Calificaciones por segundo con y sin pool de conexiones (y caché) de NRCs.
+
+Uso: python benchmarks/bench_pool_nrc.py [--hilos 8] [--segundos 3]
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+
+from comun import NRCS, generar_datos, iniciar_servidor_nrc, usar_con_hilos
+
+usar_con_hilos()
+import server  # noqa: E402
+from almacen import Almacen  # noqa: E402
+from cache_nrc import CacheNRC  # noqa: E402
+from pool_nrc import PoolConexiones  # noqa: E402
+
+PUERTO_NRC = 22346
+
+
+def medir(hilos, segundos):
+    hechas = [0] * hilos
+    fin = time.monotonic() + segundos
+
+    def trabajador(i):
+        k = 0
+        while time.monotonic() < fin:
+            res = server.agregar_calificacion('100000', NRCS[k % len(NRCS)], '15')
+            assert res['status'] == 'ok', res
+            k += 1
+        hechas[i] = k
+
+    ts = [threading.Thread(target=trabajador, args=(i,)) for i in range(hilos)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    return sum(hechas) / segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hilos', type=int, default=8)
+    parser.add_argument('--segundos', type=float, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        generar_datos(tmp, 1000)
+        proc = iniciar_servidor_nrc(tmp, PUERTO_NRC)
+        try:
+            server.NRC_SERVER_PORT = PUERTO_NRC
+            server.POOL_NRC = PoolConexiones('localhost', PUERTO_NRC, args.hilos)
+            server.ALMACEN = Almacen(os.path.join(tmp, 'estudiantes.csv'),
+                                     os.path.join(tmp, 'calificaciones.csv'))
+            server.ALMACEN.cargar()
+            resultados = {}
+            for modo, usar_pool, max_cache in (('sin pool', False, 0), ('con pool', True, 0),
+                                               ('pool+caché', True, 1024)):
+                server.USAR_POOL_NRC = usar_pool
+                server.CACHE_NRC = CacheNRC(max_entradas=max_cache)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    resultados[modo] = medir(args.hilos, args.segundos)
+            server.POOL_NRC.cerrar()
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    print(f"{'modo':>12} {'calif/s':>10}")
+    for modo, valor in resultados.items():
+        print(f"{modo:>12} {valor:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Costo del registro por comando en con_hilos/server.py.
+
+Levanta el servidor con distintas configuraciones de registro y lo carga
+con la misma mezcla de comandos (ver bench_servidores.py). La salida del
+servidor va a una tubería que este proceso vacía, como haría una terminal;
+con --kb-por-segundo se vacía a ese ritmo, como una terminal lenta o un
+disco ocupado, y se ve quién queda esperando a la consola.
+
+Uso: python benchmarks/bench_registro.py [--clientes 16] [--segundos 5] [--kb-por-segundo 64]
+"""
+import argparse
+import asyncio
+import subprocess
+import tempfile
+import threading
+import time
+
+from bench_servidores import PUERTO, PUERTO_NRC, medir
+from comun import generar_datos, iniciar_servidor_calificaciones, iniciar_servidor_nrc
+
+CONFIGURACIONES = [
+    ('INFO (sin mensajes por comando)', ['--log-nivel', 'INFO']),
+    ('DEBUG síncrono (como print)', ['--log-nivel', 'DEBUG', '--log-sincrono']),
+    ('DEBUG con cola', ['--log-nivel', 'DEBUG']),
+    ('DEBUG con cola, json', ['--log-nivel', 'DEBUG', '--log-formato', 'json']),
+    ('DEBUG con cola, 1 de 100', ['--log-nivel', 'DEBUG', '--log-muestreo', '100']),
+]
+
+
+def vaciar(tuberia, contador, kb_por_segundo):
+    tamano = 4096
+    while bloque := tuberia.read1(tamano):
+        contador[0] += len(bloque)
+        if kb_por_segundo:
+            time.sleep(len(bloque) / (kb_por_segundo * 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clientes', type=int, default=16)
+    parser.add_argument('--segundos', type=float, default=5)
+    parser.add_argument('--filas', type=int, default=10_000)
+    parser.add_argument('--kb-por-segundo', type=float, default=0,
+                        help='ritmo al que se lee la salida del servidor (0: sin límite)')
+    args = parser.parse_args()
+    mezcla = {'BUSCAR': 80, 'AGREGAR': 20}
+
+    print(f"{args.clientes} clientes, {args.segundos:.0f} s, mezcla {mezcla}")
+    print(f"{'registro':>32} {'cmd/s':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'log (KB/s)':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        ids = generar_datos(tmp, args.filas)
+        paginas = max(1, args.filas // 50)
+        nrc = iniciar_servidor_nrc(tmp, PUERTO_NRC)
+        try:
+            for nombre, opciones in CONFIGURACIONES:
+                srv = iniciar_servidor_calificaciones(tmp, PUERTO, PUERTO_NRC, *opciones,
+                                                      salida=subprocess.PIPE)
+                escritos = [0]
+                lector = threading.Thread(target=vaciar, args=(srv.stdout, escritos, args.kb_por_segundo),
+                                          daemon=True)
+                lector.start()
+                try:
+                    antes = escritos[0]
+                    r = asyncio.run(medir(ids, paginas, mezcla, args.clientes, args.segundos, 10))
+                    volumen = (escritos[0] - antes) / 1024 / args.segundos
+                finally:
+                    srv.terminate()
+                    srv.wait()
+                    lector.join()
+                print(f"{nombre:>32} {r['por_segundo']:>8.0f} {r['p50_ms']:>9.2f} "
+                      f"{r['p99_ms']:>9.2f} {volumen:>11.0f}")
+        finally:
+            nrc.terminate()
+            nrc.wait()
+
+
+if __name__ == '__main__':
+    main()
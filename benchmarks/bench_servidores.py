@@ -0,0 +1,180 @@
+"""Prueba de carga comparable de sin_hilos y con_hilos.
+
+Levanta nrcs_server.py y el servidor elegido sobre datos sintéticos de cada
+tamaño y mantiene C clientes concurrentes que envían una mezcla de comandos
+(una conexión por comando, como client.py, con el protocolo con marco).
+Reporta comandos por segundo y latencias p50/p95/p99 por servidor, tamaño y
+número de clientes, como tabla y opcionalmente como JSON.
+
+LISTAR se envía paginado (LISTAR|desde|50, con `desde` el inicio de una
+página al azar): la lista completa sobre 100k filas mediría la
+serialización, no el servidor.
+
+Uso: python benchmarks/bench_servidores.py [--servidores sin_hilos con_hilos]
+         [--tamanos 1000 10000 100000] [--clientes 1 8 32] [--segundos 5]
+         [--mezcla BUSCAR=70,AGREGAR=15,ACTUALIZAR=10,LISTAR=5] [--json resultados.json]
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+
+from comun import (NRCS, generar_datos, iniciar_servidor_calificaciones, iniciar_servidor_nrc,
+                   iniciar_servidor_sin_hilos, subir_limite_descriptores, usar_con_hilos)
+
+usar_con_hilos()
+from protocolo import escribir_mensaje, leer_mensaje  # noqa: E402
+
+PUERTO = 22445
+PUERTO_NRC = 22446
+SERVIDORES = ('sin_hilos', 'con_hilos', 'con_hilos_async')
+COMANDOS = ('BUSCAR', 'AGREGAR', 'ACTUALIZAR', 'LISTAR')
+FILAS_POR_PAGINA = 50
+
+
+def leer_mezcla(texto):
+    """'BUSCAR=70,AGREGAR=30' -> {'BUSCAR': 70.0, 'AGREGAR': 30.0}"""
+    mezcla = {}
+    for parte in texto.split(','):
+        nombre, _, peso = parte.partition('=')
+        nombre = nombre.strip().upper()
+        if nombre not in COMANDOS:
+            raise argparse.ArgumentTypeError(f"Comando desconocido en la mezcla: {nombre}")
+        mezcla[nombre] = float(peso)
+    return mezcla
+
+
+def generar_comando(rnd, nombre, ids, paginas):
+    # generar_datos da a cada estudiante un solo NRC: NRCS[i % len(NRCS)]
+    i = rnd.randrange(len(ids))
+    if nombre == 'BUSCAR':
+        return f"BUSCAR|{ids[i]}"
+    if nombre == 'AGREGAR':
+        return f"AGREGAR|{ids[i]}|{rnd.choice(NRCS)}|{rnd.randint(0, 20)}"
+    if nombre == 'ACTUALIZAR':
+        return f"ACTUALIZAR|{ids[i]}|{NRCS[i % len(NRCS)]}|{rnd.randint(0, 20)}"
+    desde = (rnd.randint(1, paginas) - 1) * FILAS_POR_PAGINA   # el protocolo recibe la fila inicial
+    return f"LISTAR|{desde}|{FILAS_POR_PAGINA}"
+
+
+async def enviar(cmd, timeout):
+    reader, writer = await asyncio.wait_for(asyncio.open_connection('localhost', PUERTO), timeout)
+    try:
+        escribir_mensaje(writer, cmd.encode('utf-8'))
+        await writer.drain()
+        resp = await asyncio.wait_for(leer_mensaje(reader), timeout)
+    finally:
+        writer.close()
+    return json.loads(resp).get('status')
+
+
+async def cliente(ids, paginas, mezcla, fin, resultados, timeout):
+    rnd = random.Random()
+    nombres, pesos = list(mezcla), list(mezcla.values())
+    while time.monotonic() < fin:
+        nombre = rnd.choices(nombres, pesos)[0]
+        cmd = generar_comando(rnd, nombre, ids, paginas)
+        inicio = time.perf_counter()
+        try:
+            estado = await enviar(cmd, timeout)
+        except (OSError, asyncio.TimeoutError, ValueError):
+            estado = 'error'
+        if estado in ('ok', 'not_found'):
+            resultados['latencias'][nombre].append(time.perf_counter() - inicio)
+        elif estado == 'busy':
+            resultados['ocupado'] += 1
+        else:
+            resultados['error'] += 1
+
+
+def percentil(ordenadas, p):
+    if not ordenadas:
+        return None
+    return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p))]
+
+
+def resumir(latencias, segundos):
+    ordenadas = sorted(latencias)
+    return {"respuestas": len(ordenadas), "por_segundo": len(ordenadas) / segundos,
+            "p50_ms": _ms(percentil(ordenadas, 0.50)), "p95_ms": _ms(percentil(ordenadas, 0.95)),
+            "p99_ms": _ms(percentil(ordenadas, 0.99))}
+
+
+def _ms(segundos):
+    return None if segundos is None else round(segundos * 1e3, 3)
+
+
+def _celda(ms):
+    return f"{'-':>9}" if ms is None else f"{ms:>9.2f}"
+
+
+async def medir(ids, paginas, mezcla, clientes, segundos, timeout):
+    resultados = {'latencias': {n: [] for n in mezcla}, 'ocupado': 0, 'error': 0}
+    fin = time.monotonic() + segundos
+    await asyncio.gather(*(cliente(ids, paginas, mezcla, fin, resultados, timeout)
+                           for _ in range(clientes)))
+    todas = [x for lat in resultados['latencias'].values() for x in lat]
+    resumen = resumir(todas, segundos)
+    resumen.update(ocupado=resultados['ocupado'], errores=resultados['error'],
+                   por_comando={n: resumir(lat, segundos)
+                                for n, lat in resultados['latencias'].items()})
+    return resumen
+
+
+def iniciar(servidor, directorio):
+    if servidor == 'sin_hilos':
+        return iniciar_servidor_sin_hilos(directorio, PUERTO)
+    modo = 'async' if servidor == 'con_hilos_async' else 'hilos'
+    return iniciar_servidor_calificaciones(directorio, PUERTO, PUERTO_NRC, '--modo', modo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--servidores', nargs='+', choices=SERVIDORES, default=['sin_hilos', 'con_hilos'])
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[1000, 10_000, 100_000],
+                        help='calificaciones en el conjunto de datos')
+    parser.add_argument('--clientes', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--segundos', type=float, default=5)
+    parser.add_argument('--mezcla', type=leer_mezcla, default='BUSCAR=70,AGREGAR=15,ACTUALIZAR=10,LISTAR=5')
+    parser.add_argument('--timeout', type=float, default=10, help='segundos por comando')
+    parser.add_argument('--json', help='archivo donde guardar los resultados')
+    args = parser.parse_args()
+    subir_limite_descriptores()
+
+    filas = []
+    print(f"mezcla: {args.mezcla}")
+    print(f"{'servidor':>16} {'filas':>8} {'clientes':>9} {'cmd/s':>8} {'p50 (ms)':>9} "
+          f"{'p95 (ms)':>9} {'p99 (ms)':>9} {'busy':>6} {'errores':>8}")
+    for servidor in args.servidores:
+        for tamano in args.tamanos:
+            with tempfile.TemporaryDirectory() as tmp:
+                ids = generar_datos(tmp, tamano)
+                paginas = max(1, tamano // FILAS_POR_PAGINA)
+                nrc = iniciar_servidor_nrc(tmp, PUERTO_NRC)
+                srv = iniciar(servidor, tmp)
+                try:
+                    for clientes in args.clientes:
+                        r = asyncio.run(medir(ids, paginas, args.mezcla, clientes,
+                                              args.segundos, args.timeout))
+                        r.update(servidor=servidor, filas=tamano, clientes=clientes)
+                        filas.append(r)
+                        print(f"{servidor:>16} {tamano:>8} {clientes:>9} {r['por_segundo']:>8.0f} "
+                              f"{_celda(r['p50_ms'])} {_celda(r['p95_ms'])} {_celda(r['p99_ms'])} "
+                              f"{r['ocupado']:>6} {r['errores']:>8}")
+                finally:
+                    srv.terminate()
+                    nrc.terminate()
+                    srv.wait()
+                    nrc.wait()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"mezcla": args.mezcla, "segundos": args.segundos, "resultados": filas},
+                      f, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Utilidades compartidas por los benchmarks."""
+import csv
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CON_HILOS = os.path.join(RAIZ, 'con_hilos')
+SIN_HILOS = os.path.join(RAIZ, 'sin_hilos')
+
+NRCS = ['MAT101', 'FIS101', 'QUI101', 'PRO101', 'BDD101']
+
+
+def usar_con_hilos():
+    """Permite importar los módulos de con_hilos (server, almacen, ...)."""
+    if CON_HILOS not in sys.path:
+        sys.path.insert(0, CON_HILOS)
+    if RAIZ not in sys.path:
+        sys.path.insert(1, RAIZ)
+
+
+def generar_datos(directorio, n_calificaciones, por_estudiante=5, semilla=0):
+    """Crea estudiantes.csv y calificaciones.csv sintéticos en `directorio`.
+
+    Devuelve la lista de IDs de estudiante generados.
+    """
+    rnd = random.Random(semilla)
+    n_estudiantes = max(1, n_calificaciones // por_estudiante)
+    ids = [str(100000 + i) for i in range(n_estudiantes)]
+    with open(os.path.join(directorio, 'estudiantes.csv'), 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['ID_Estudiante', 'Nombre'])
+        w.writerows([i, f'Estudiante {i}'] for i in ids)
+    with open(os.path.join(directorio, 'calificaciones.csv'), 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['ID_Estudiante', 'Materia', 'Calificación'])
+        for k in range(n_calificaciones):
+            w.writerow([ids[k % n_estudiantes], NRCS[k % len(NRCS)], float(rnd.randint(0, 20))])
+    return ids
+
+
+def cronometrar(fn, repeticiones):
+    """Ejecuta `fn` `repeticiones` veces y devuelve los segundos por llamada."""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        fn()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def esperar_puerto(puerto, host='localhost', timeout=10):
+    """Espera a que haya un servidor escuchando en `puerto`."""
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            socket.create_connection((host, puerto), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Nada escuchando en {host}:{puerto}")
+
+
+def iniciar_servidor_nrc(directorio, puerto):
+    """Lanza nrcs_server.py en un proceso aparte usando `directorio` como cwd."""
+    shutil.copy(os.path.join(RAIZ, 'nrcs.csv'), directorio)
+    comando = [sys.executable, os.path.join(RAIZ, 'nrcs_server.py'), '--puerto', str(puerto)]
+    proc = subprocess.Popen(comando, cwd=directorio,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    esperar_puerto(puerto)
+    return proc
+
+
+def iniciar_servidor_calificaciones(directorio, puerto, puerto_nrc, *extra, salida=subprocess.DEVNULL):
+    """Lanza con_hilos/server.py sobre los datos de `directorio`."""
+    comando = [sys.executable, os.path.join(CON_HILOS, 'server.py'), '--datos', directorio,
+               '--puerto', str(puerto), '--puerto-nrc', str(puerto_nrc), *extra]
+    proc = subprocess.Popen(comando, stdout=salida, stderr=subprocess.DEVNULL)
+    esperar_puerto(puerto, timeout=60)
+    return proc
+
+
+def iniciar_servidor_sin_hilos(directorio, puerto):
+    """Lanza sin_hilos/server.py (secuencial) sobre los datos de `directorio`."""
+    comando = [sys.executable, os.path.join(SIN_HILOS, 'server.py'), '--datos', directorio,
+               '--puerto', str(puerto)]
+    proc = subprocess.Popen(comando, cwd=SIN_HILOS,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    esperar_puerto(puerto, timeout=60)
+    return proc
+
+
+def subir_limite_descriptores():
+    """Sube el límite de archivos abiertos (lo heredan los subprocesos)."""
+    try:
+        import resource
+        _, maximo = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (maximo, maximo))
+        return maximo
+    except (ImportError, ValueError, OSError):
+        return None
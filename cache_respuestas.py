@@ -0,0 +1,123 @@
+"""Caché de respuestas ya serializadas para BUSCAR y LISTAR.
+
+Las respuestas se guardan como los bytes JSON que se envían, así un acierto
+no lee los datos ni llama a json.dumps. Cada entrada es de un estudiante
+(BUSCAR) o de toda la tabla (LISTAR, con o sin paginación):
+
+  - un cambio en las calificaciones de un estudiante (AGREGAR, ACTUALIZAR,
+    ELIMINAR) descarta su BUSCAR y todas las entradas de LISTAR;
+  - invalidar(None) descarta todo (p. ej. al recargar los datos).
+
+Cada invalidación sube un contador de versión. Quien calcula una respuesta
+anota la versión antes de leer los datos y la pasa a guardar(): si mientras
+tanto cambió ese estudiante (o, para LISTAR, cualquier dato), la respuesta
+puede estar vieja y no se guarda.
+
+Se limita por cantidad de entradas y por bytes, descartando las menos
+usadas. Es segura entre hilos.
+"""
+import threading
+from collections import OrderedDict
+
+
+class CacheRespuestas:
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entradas=10000):
+        self.max_bytes = max_bytes
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()   # clave -> (ID_Estudiante o None, bytes)
+        self._globales = set()           # claves de LISTAR (dependen de todos los datos)
+        self._de_estudiante = {}         # ID_Estudiante -> {claves de sus respuestas}
+        self._bytes = 0
+        self._version = 0
+        self._cambios = {}               # ID_Estudiante -> versión de su último cambio
+        self._piso = 0                   # versión de la última vez que se vació _cambios
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+        self.descartadas = 0             # respuestas calculadas durante un cambio, no guardadas
+
+    def version(self):
+        """Versión actual; pasarla a guardar() junto con la respuesta calculada después."""
+        with self._lock:
+            return self._version
+
+    def obtener(self, clave):
+        """Bytes guardados para `clave` o None."""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[1]
+
+    def guardar(self, clave, datos, version, id_est=None):
+        """Guarda `datos` si nada de lo que depende cambió desde `version`.
+
+        `id_est` es el estudiante de la respuesta; None si depende de toda la tabla.
+        """
+        if len(datos) > self.max_bytes:
+            return
+        with self._lock:
+            if id_est is None:
+                vigente = version == self._version
+            else:
+                vigente = version >= self._piso and self._cambios.get(id_est, -1) <= version
+            if not vigente:
+                self.descartadas += 1
+                return
+            self._quitar(clave)
+            self._entradas[clave] = (id_est, datos)
+            self._bytes += len(datos)
+            if id_est is None:
+                self._globales.add(clave)
+            else:
+                self._de_estudiante.setdefault(id_est, set()).add(clave)
+            while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+                self._quitar(next(iter(self._entradas)))
+
+    def _quitar(self, clave):
+        entrada = self._entradas.pop(clave, None)
+        if entrada is None:
+            return
+        id_est, datos = entrada
+        self._bytes -= len(datos)
+        if id_est is None:
+            self._globales.discard(clave)
+        else:
+            claves = self._de_estudiante[id_est]
+            claves.discard(clave)
+            if not claves:
+                del self._de_estudiante[id_est]
+
+    def invalidar(self, ids=None):
+        """Descarta lo que depende de los estudiantes `ids` o, con None, todo."""
+        with self._lock:
+            self._version += 1
+            self.invalidaciones += 1
+            if ids is None:
+                self._entradas.clear()
+                self._globales.clear()
+                self._de_estudiante.clear()
+                self._bytes = 0
+                self._cambios.clear()
+                self._piso = self._version
+                return
+            for clave in list(self._globales):
+                self._quitar(clave)
+            for id_est in ids:
+                self._cambios[id_est] = self._version
+                for clave in list(self._de_estudiante.get(id_est, ())):
+                    self._quitar(clave)
+            if len(self._cambios) > self.max_entradas:
+                # Olvidar qué cambió: las respuestas calculadas antes de ahora ya no se guardan
+                self._cambios.clear()
+                self._piso = self._version
+
+    def estadisticas(self):
+        with self._lock:
+            return {"entradas": len(self._entradas), "bytes": self._bytes, "aciertos": self.aciertos,
+                    "fallos": self.fallos, "invalidaciones": self.invalidaciones,
+                    "descartadas": self.descartadas}
@@ -0,0 +1,403 @@
+"""Cliente reutilizable para los servidores de calificaciones (con y sin hilos).
+
+    with Cliente('localhost', 12345) as c:
+        c.enviar("BUSCAR|100001")                       # -> dict de la respuesta
+        c.pipeline(["PROMEDIO|100001", "PROMEDIO|100002"])
+
+Usa el protocolo con marco (protocolo.py) sobre una conexión persistente
+que se abre con el primer comando. Con `pipeline` se envían hasta `ventana`
+comandos antes de leer sus respuestas: el servidor los atiende en orden,
+así que no se paga un viaje de ida y vuelta por comando. Las respuestas en
+flujo (LISTAR_FLUJO) se devuelven como {"status": "ok", "data": [filas]};
+para recorrerlas sin juntarlas está `listar_flujo`.
+
+Reintentos: los comandos de consulta se repiten ante errores de conexión o
+timeouts; los que modifican datos solo cuando el servidor no llegó a
+procesarlos (no se pudo conectar, respondió busy, o la conexión reutilizada
+ya estaba cerrada por inactividad, como en pool_nrc.PoolConexiones).
+
+ClienteAsync es la versión asyncio: varias tareas pueden compartir una
+conexión y cada comando espera su respuesta en la tubería.
+
+`agregar_argumentos` y `sin_menu` dan a client.py su modo no interactivo:
+comandos sueltos, un archivo de comandos o muchos trabajadores a la vez
+para pruebas de carga.
+"""
+import asyncio
+import json
+import socket
+import sys
+import threading
+import time
+from collections import Counter, deque
+from itertools import cycle, islice
+
+from protocolo import (CABECERA, CABECERA_FLUJO, enviar_mensaje, escribir_mensaje, leer_mensaje,
+                       recibir_flujo, recibir_mensaje)
+
+HOST = 'localhost'
+PUERTO = 12345
+TIMEOUT = 5
+REINTENTOS = 2
+ESPERA_REINTENTO = 0.1   # segundos antes del primer reintento; se duplica en cada uno
+VENTANA = 64             # comandos sin respuesta en pipeline
+
+# Comandos que no cambian datos: repetirlos no tiene efectos
+CONSULTAS = {'BUSCAR', 'LISTAR', 'LISTAR_FLUJO', 'PROMEDIO', 'ESTADISTICAS_NRC', 'RANKING', 'STATS',
+             'INVALIDAR_NRC'}
+
+
+class SinRespuesta(ConnectionError):
+    """El servidor cerró la conexión sin responder."""
+
+
+def es_consulta(comando):
+    return comando.split('|', 1)[0].strip().upper() in CONSULTAS
+
+
+def _filas(trozos):
+    return [json.loads(linea) for trozo in trozos for linea in trozo.splitlines()]
+
+
+def _decodificar(datos):
+    respuesta = json.loads(datos)
+    if not isinstance(respuesta, dict):
+        raise ValueError(f"Respuesta inválida del servidor: {datos[:100]!r}")
+    return respuesta
+
+
+def _reintentable(error, comando, enviado, reutilizada):
+    if es_consulta(comando) or not enviado:
+        return True
+    return isinstance(error, SinRespuesta) and reutilizada
+
+
+class Cliente:
+    """Conexión persistente a un servidor de calificaciones (ver el módulo).
+
+    Es seguro entre hilos, pero los comandos de varios hilos pasan de a uno
+    por la conexión; para comandos en paralelo usar un Cliente por hilo.
+    """
+
+    def __init__(self, host=HOST, puerto=PUERTO, timeout=TIMEOUT, reintentos=REINTENTOS,
+                 espera=ESPERA_REINTENTO):
+        self.host = host
+        self.puerto = puerto
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.espera = espera
+        self._sock = None
+        self._reutilizada = False   # la conexión actual ya respondió algún comando
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def _conectar(self):
+        sock = socket.create_connection((self.host, self.puerto), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _conexion(self):
+        if self._sock is None:
+            self._sock = self._conectar()
+            self._reutilizada = False
+        return self._sock
+
+    def _descartar(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _leer(self, sock):
+        datos = recibir_mensaje(sock)
+        if datos is None:
+            raise SinRespuesta("El servidor cerró la conexión sin responder")
+        if datos == CABECERA_FLUJO:
+            return {"status": "ok", "data": _filas(recibir_flujo(sock))}
+        return _decodificar(datos)
+
+    def enviar(self, comando):
+        """Envía un comando y devuelve su respuesta, con los reintentos que correspondan."""
+        with self._lock:
+            for intento in range(self.reintentos + 1):
+                enviado = False
+                reutilizada = self._sock is not None and self._reutilizada
+                try:
+                    sock = self._conexion()
+                    enviar_mensaje(sock, comando.encode('utf-8'))
+                    enviado = True
+                    respuesta = self._leer(sock)
+                except (OSError, ValueError) as e:
+                    self._descartar()
+                    if intento == self.reintentos or not _reintentable(e, comando, enviado, reutilizada):
+                        raise
+                else:
+                    self._reutilizada = True
+                    if respuesta.get('status') != 'busy' or intento == self.reintentos:
+                        return respuesta
+                    self._descartar()   # el servidor cierra tras responder busy
+                time.sleep(self.espera * 2 ** intento)
+
+    def pipeline(self, comandos, ventana=VENTANA):
+        """Envía `comandos` con hasta `ventana` sin respuesta; devuelve las respuestas en orden.
+
+        No reintenta: si la conexión falla a mitad se lanza el error, porque
+        no se sabe cuáles de los comandos ya enviados se aplicaron.
+        """
+        with self._lock:
+            sock = self._conexion()
+            comandos = iter(comandos)
+            respuestas = []
+            pendientes = 0
+            try:
+                while True:
+                    lote = [c.encode('utf-8') for c in islice(comandos, ventana - pendientes)]
+                    if lote:
+                        sock.sendall(b''.join(CABECERA.pack(len(d)) + d for d in lote))
+                        pendientes += len(lote)
+                    if not pendientes:
+                        break
+                    respuestas.append(self._leer(sock))
+                    pendientes -= 1
+            except BaseException:
+                self._descartar()
+                raise
+            self._reutilizada = True
+            return respuestas
+
+    def listar_flujo(self):
+        """Pide LISTAR_FLUJO por una conexión aparte y genera las filas a medida que llegan."""
+        with self._conectar() as sock:
+            enviar_mensaje(sock, b"LISTAR_FLUJO")
+            cabecera = recibir_mensaje(sock)
+            if cabecera != CABECERA_FLUJO:
+                respuesta = json.loads(cabecera or b'null') or {}
+                raise ConnectionError(respuesta.get('mensaje', "Respuesta inválida del servidor"))
+            for trozo in recibir_flujo(sock):
+                for linea in trozo.splitlines():
+                    yield json.loads(linea)
+
+    def cerrar(self):
+        with self._lock:
+            self._descartar()
+
+
+# ---------------- Versión asyncio ---------------- #
+class _ConexionAsync:
+    """Una conexión con su tubería: los futuros esperan las respuestas en orden de envío."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.esperando = deque()
+        self.respondidas = 0
+        self.cerrada = False
+        self.lector = asyncio.create_task(self._leer_respuestas())
+
+    async def enviar(self, datos):
+        futuro = asyncio.get_running_loop().create_future()
+        self.esperando.append(futuro)
+        escribir_mensaje(self.writer, datos)
+        try:
+            await self.writer.drain()
+        except BaseException:
+            futuro.cancel()   # nadie va a esperar su respuesta
+            raise
+        return await futuro
+
+    async def _leer(self):
+        datos = await leer_mensaje(self.reader)
+        if datos is None:
+            raise SinRespuesta("El servidor cerró la conexión sin responder")
+        if datos != CABECERA_FLUJO:
+            return _decodificar(datos)
+        trozos = []
+        while trozo := await leer_mensaje(self.reader):
+            trozos.append(trozo)
+        if trozo is None:
+            raise ConnectionError("Conexión cerrada a mitad de un flujo")
+        return {"status": "ok", "data": _filas(trozos)}
+
+    async def _leer_respuestas(self):
+        try:
+            while True:
+                respuesta = await self._leer()
+                self.respondidas += 1
+                futuro = self.esperando.popleft()
+                if not futuro.done():
+                    futuro.set_result(respuesta)
+        except Exception as e:
+            self.cerrar(e)
+
+    def cerrar(self, error=None):
+        self.cerrada = True
+        while self.esperando:
+            futuro = self.esperando.popleft()
+            if not futuro.done():
+                futuro.set_exception(error or ConnectionError("Conexión cerrada"))
+        self.writer.close()
+        if self.lector is not asyncio.current_task():
+            self.lector.cancel()
+
+
+class ClienteAsync:
+    """Versión asyncio de Cliente; varias tareas pueden usarlo a la vez."""
+
+    def __init__(self, host=HOST, puerto=PUERTO, timeout=TIMEOUT, reintentos=REINTENTOS,
+                 espera=ESPERA_REINTENTO):
+        self.host = host
+        self.puerto = puerto
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.espera = espera
+        self._conexion = None
+        self._conectando = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.cerrar()
+
+    async def _abierta(self):
+        async with self._conectando:
+            if self._conexion is None or self._conexion.cerrada:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.puerto), self.timeout)
+                writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self._conexion = _ConexionAsync(reader, writer)
+            return self._conexion
+
+    async def enviar(self, comando):
+        """Como Cliente.enviar; mientras espera, otras tareas pueden enviar por la misma conexión."""
+        for intento in range(self.reintentos + 1):
+            conexion = None
+            enviado = reutilizada = False
+            try:
+                conexion = await self._abierta()
+                reutilizada = conexion.respondidas > 0
+                enviado = True
+                respuesta = await asyncio.wait_for(conexion.enviar(comando.encode('utf-8')), self.timeout)
+            except (OSError, ValueError, asyncio.TimeoutError) as e:
+                if conexion is not None:
+                    conexion.cerrar(e)
+                if intento == self.reintentos or not _reintentable(e, comando, enviado, reutilizada):
+                    raise
+            else:
+                if respuesta.get('status') != 'busy' or intento == self.reintentos:
+                    return respuesta
+                conexion.cerrar()
+            await asyncio.sleep(self.espera * 2 ** intento)
+
+    async def pipeline(self, comandos, ventana=VENTANA):
+        """Envía `comandos` con hasta `ventana` en vuelo; devuelve las respuestas en orden."""
+        permisos = asyncio.Semaphore(ventana)
+
+        async def uno(comando):
+            async with permisos:
+                return await self.enviar(comando)
+        return await asyncio.gather(*(uno(c) for c in comandos))
+
+    def cerrar(self):
+        if self._conexion is not None:
+            self._conexion.cerrar()
+            self._conexion = None
+
+
+# ---------------- Modo no interactivo de client.py ---------------- #
+def agregar_argumentos(parser):
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--puerto', type=int, default=PUERTO)
+    parser.add_argument('--timeout', type=float, default=TIMEOUT, help="segundos por respuesta")
+    parser.add_argument('-c', '--comando', action='append', default=[],
+                        help="enviar este comando y mostrar la respuesta (se puede repetir)")
+    parser.add_argument('--archivo', help="enviar los comandos de este archivo, uno por línea ('-': entrada estándar)")
+    parser.add_argument('--ventana', type=int,
+                        help=f"comandos sin respuesta por conexión (por defecto {VENTANA}, o 1 con --trabajadores)")
+    parser.add_argument('--trabajadores', type=int, default=0,
+                        help="prueba de carga: N conexiones repitiendo los comandos a la vez")
+    parser.add_argument('--repeticiones', type=int, default=1,
+                        help="prueba de carga: veces que cada trabajador recorre los comandos")
+    parser.add_argument('--segundos', type=float, help="prueba de carga: duración (en vez de --repeticiones)")
+
+
+def leer_comandos(archivo):
+    """Comandos de `archivo` (o de la entrada estándar con '-'), omitiendo líneas vacías y # comentarios."""
+    f = sys.stdin if archivo == '-' else open(archivo, encoding='utf-8')
+    with f:
+        return [linea.strip() for linea in f if linea.strip() and not linea.lstrip().startswith('#')]
+
+
+def sin_menu(args):
+    """Ejecuta el modo no interactivo si se pidió; devuelve False para mostrar el menú."""
+    comandos = list(args.comando)
+    if args.archivo:
+        comandos += leer_comandos(args.archivo)
+    if not comandos:
+        return False
+    if args.trabajadores:
+        resultado = asyncio.run(cargar(comandos, args.trabajadores, args.host, args.puerto, args.timeout,
+                                       args.ventana or 1, args.repeticiones, args.segundos))
+        print(json.dumps(resultado, ensure_ascii=False))
+        return True
+    try:
+        with Cliente(args.host, args.puerto, args.timeout) as cliente:
+            respuestas = cliente.pipeline(comandos, args.ventana or VENTANA)
+    except (OSError, ValueError) as e:
+        # Mismo mensaje que el menú, pero terminando con error
+        raise SystemExit(f"Error de conexión: {e}")
+    for respuesta in respuestas:
+        print(json.dumps(respuesta, ensure_ascii=False))
+    return True
+
+
+async def cargar(comandos, trabajadores, host=HOST, puerto=PUERTO, timeout=TIMEOUT, ventana=1,
+                 repeticiones=1, segundos=None):
+    """Prueba de carga: `trabajadores` conexiones con hasta `ventana` comandos en vuelo cada una.
+
+    Cada trabajador recorre los comandos empezando en un punto distinto,
+    `repeticiones` veces o durante `segundos`. Devuelve el rendimiento, los
+    percentiles de latencia (ms) y la cantidad de respuestas por status.
+    """
+    latencias = []
+    estados = Counter()
+    limite = time.perf_counter() + segundos if segundos else None
+
+    async def una(cliente, comando):
+        inicio = time.perf_counter()
+        try:
+            estado = (await cliente.enviar(comando)).get('status', '?')
+        except (OSError, ValueError, asyncio.TimeoutError) as e:
+            estado = type(e).__name__
+        latencias.append(time.perf_counter() - inicio)
+        estados[estado] += 1
+
+    async def trabajar(k):
+        desplazados = comandos[k % len(comandos):] + comandos[:k % len(comandos)]
+        total = None if limite else len(comandos) * repeticiones
+        async with ClienteAsync(host, puerto, timeout) as cliente:
+            en_vuelo = set()
+            for comando in islice(cycle(desplazados), total):
+                if limite and time.perf_counter() >= limite:
+                    break
+                if len(en_vuelo) >= ventana:
+                    _, en_vuelo = await asyncio.wait(en_vuelo, return_when=asyncio.FIRST_COMPLETED)
+                en_vuelo.add(asyncio.create_task(una(cliente, comando)))
+            if en_vuelo:
+                await asyncio.wait(en_vuelo)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabajar(k) for k in range(trabajadores)))
+    duracion = time.perf_counter() - inicio
+    latencias.sort()
+
+    def percentil(p):
+        return round(latencias[min(int(p * len(latencias)), len(latencias) - 1)] * 1000, 3) if latencias else 0.0
+    return {"comandos": len(latencias), "segundos": round(duracion, 3),
+            "por_segundo": round(len(latencias) / duracion, 1) if duracion else 0.0,
+            "p50_ms": percentil(0.50), "p95_ms": percentil(0.95), "p99_ms": percentil(0.99),
+            "status": dict(estados)}
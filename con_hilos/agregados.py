@@ -0,0 +1,120 @@
+import math
+from bisect import bisect_left, insort
+
+
+class Agregados:
+    """Promedios y estadísticas mantenidos a medida que cambian las filas.
+
+    Por estudiante y por NRC se guardan cantidad, suma y suma de cuadrados,
+    así PROMEDIO y ESTADISTICAS_NRC no recorren las calificaciones. Para
+    RANKING se guarda, por NRC, la lista de estudiantes ordenada por su
+    promedio en ese NRC: los k primeros salen en O(k).
+
+    Recibe filas de Almacen (Fila, con la nota ya en float). No tiene
+    candado propio; Almacen la actualiza bajo el suyo.
+    """
+
+    # Si cambian más de 1/REORDENAR_DESDE de los estudiantes de un NRC, se
+    # vuelve a ordenar su lista en vez de mover cada entrada
+    REORDENAR_DESDE = 8
+
+    def __init__(self):
+        self.por_estudiante = {}   # ID_Estudiante -> [cantidad, suma, suma_cuadrados]
+        self.por_nrc = {}          # NRC -> [cantidad, suma, suma_cuadrados]
+        self._pares = {}           # NRC -> {ID_Estudiante: [cantidad, suma]}
+        self._ranking = {}         # NRC -> [(-promedio, ID_Estudiante)] ordenada
+
+    # ---------------- Actualización ---------------- #
+    def aplicar(self, agregadas=(), quitadas=()):
+        """Suma las filas `agregadas` y resta las `quitadas`."""
+        anteriores = {}   # NRC -> {ID_Estudiante: clave previa en el ranking o None}
+        por_estudiante, por_nrc, todos_pares = self.por_estudiante, self.por_nrc, self._pares
+        for filas, signo in ((quitadas, -1), (agregadas, 1)):
+            for fila in filas:
+                nota = fila.nota
+                if nota is None:
+                    continue
+                id_est, nrc = fila.id_est, fila.materia
+                pares = todos_pares.get(nrc)
+                if pares is None:
+                    pares = todos_pares[nrc] = {}
+                previas = anteriores.get(nrc)
+                if previas is None:
+                    previas = anteriores[nrc] = {}
+                par = pares.get(id_est)
+                if id_est not in previas:
+                    previas[id_est] = (-par[1] / par[0], id_est) if par else None
+                if par is None:
+                    par = pares[id_est] = [0, 0.0]
+                par[0] += signo
+                par[1] += signo * nota
+                cuadrado = nota * nota
+                for tabla, clave in ((por_estudiante, id_est), (por_nrc, nrc)):
+                    acum = tabla.get(clave)
+                    if acum is None:
+                        acum = tabla[clave] = [0, 0.0, 0.0]
+                    acum[0] += signo
+                    acum[1] += signo * nota
+                    acum[2] += signo * cuadrado
+                    if acum[0] <= 0:
+                        del tabla[clave]
+        for nrc, previas in anteriores.items():
+            self._reordenar(nrc, previas)
+
+    def _reordenar(self, nrc, previas):
+        pares = self._pares[nrc]
+        for id_est in previas:
+            if pares[id_est][0] <= 0:
+                del pares[id_est]
+        if not pares:
+            del self._pares[nrc]
+            self._ranking.pop(nrc, None)
+            return
+        ranking = self._ranking.get(nrc, [])
+        if len(previas) * self.REORDENAR_DESDE > len(ranking):
+            self._ranking[nrc] = sorted((-s / n, id_est) for id_est, (n, s) in pares.items())
+            return
+        for id_est, clave in previas.items():
+            if clave is not None:
+                del ranking[bisect_left(ranking, clave)]
+            if id_est in pares:
+                n, s = pares[id_est]
+                insort(ranking, (-s / n, id_est))
+
+    # ---------------- Consultas ---------------- #
+    @staticmethod
+    def resumen(acum):
+        n, suma, cuadrados = acum
+        media = suma / n
+        varianza = max(cuadrados / n - media * media, 0.0)
+        return {"cantidad": n, "promedio": round(media, 2), "desviacion": round(math.sqrt(varianza), 2)}
+
+    def promedio(self, id_est):
+        acum = self.por_estudiante.get(id_est)
+        return self.resumen(acum) if acum else None
+
+    def estadisticas(self, nrc):
+        acum = self.por_nrc.get(nrc)
+        if not acum:
+            return None
+        resumen = self.resumen(acum)
+        resumen["estudiantes"] = len(self._ranking[nrc])
+        return resumen
+
+    def ranking(self, nrc, k):
+        """Los `k` estudiantes con mejor promedio en el NRC."""
+        return self.formatear_ranking(self.claves_ranking(nrc, k))
+
+    # Para combinar los agregados de varias particiones (AlmacenParticionado)
+    def acumulado(self, nrc):
+        """[cantidad, suma, suma_cuadrados, estudiantes] del NRC, o None."""
+        acum = self.por_nrc.get(nrc)
+        return [*acum, len(self._ranking[nrc])] if acum else None
+
+    def claves_ranking(self, nrc, k):
+        """Los `k` primeros (-promedio, ID_Estudiante) del NRC, ya ordenados."""
+        return self._ranking.get(nrc, [])[:k]
+
+    @staticmethod
+    def formatear_ranking(claves):
+        return [{"ID_Estudiante": id_est, "promedio": round(-clave, 2)} for clave, id_est in claves]
@@ -0,0 +1,451 @@
+import csv
+import os
+from contextlib import contextmanager, nullcontext
+
+from agregados import Agregados
+from candado_le import CandadoLE
+from escritura_agrupada import EscrituraAgrupada
+from fila import Fila
+
+try:
+    import fcntl
+except ImportError:  # Windows: no hay flock, solo se admite un proceso
+    fcntl = None
+
+CAMPOS_ESTUDIANTES = ['ID_Estudiante', 'Nombre']
+CAMPOS_CALIFICACIONES = ['ID_Estudiante', 'Materia', 'Calificación']
+
+# Los CSV se leen y escriben siempre en UTF-8, sin depender del locale
+CODIFICACION = 'utf-8'
+
+# Cuándo se confirma un AGREGAR (en todos los casos ya está en los índices,
+# así que un BUSCAR posterior lo ve):
+#   none        cuando su lote (varias conexiones juntas) se escribió, sin
+#               fsync; ACTUALIZAR y ELIMINAR tampoco hacen fsync
+#   batch       cuando su lote se escribió con fsync
+#   every-write cuando su propia fila se escribió con fsync
+DURABILIDADES = ('none', 'batch', 'every-write')
+
+
+@contextmanager
+def bloqueo_archivo(ruta, exclusivo):
+    """flock sobre `ruta`: compartido para leer, exclusivo para escribir."""
+    with open(ruta, 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class Almacen:
+    """Copia en memoria de estudiantes.csv y calificaciones.csv.
+
+    Los archivos se leen una sola vez al arrancar y se mantienen índices hash
+    por ID_Estudiante y por (ID_Estudiante, Materia). Las escrituras se
+    agregan primero al CSV y luego a los índices (write-through), de modo que
+    el archivo sigue siendo la fuente de verdad si el servidor se reinicia.
+    ACTUALIZAR y ELIMINAR reescriben el CSV completo de forma atómica.
+
+    Las filas se guardan como Fila (ID y NRC internados, nota en float) y
+    salen de aquí como dicts. Los promedios y rankings (ver Agregados) se
+    actualizan en cada cambio.
+
+    Cada archivo tiene su propio candado de lectores y escritor (CandadoLE):
+    las consultas corren en paralelo, registrar un estudiante no frena las
+    lecturas de calificaciones y los escritores solo excluyen a los lectores
+    mientras actualizan los índices, no mientras escriben en disco.
+
+    Con `compartido=True` varios procesos pueden usar los mismos archivos:
+    las escrituras toman un flock exclusivo sobre `<calificaciones>.lock` y,
+    antes de cada operación, se leen las filas que otros procesos agregaron
+    al final de los CSV desde la última vez.
+    """
+
+    def __init__(self, archivo_estudiantes, archivo_calificaciones, compartido=False,
+                 candado_estudiantes=None, candado_calificaciones=None,
+                 durabilidad='every-write', max_lote=500, intervalo_lote=0):
+        if compartido and fcntl is None:
+            raise RuntimeError("El modo multiproceso necesita fcntl.flock (no disponible en Windows)")
+        if durabilidad not in DURABILIDADES:
+            raise ValueError(f"Durabilidad desconocida: {durabilidad}")
+        self.archivo_estudiantes = archivo_estudiantes
+        self.archivo_calificaciones = archivo_calificaciones
+        self.archivo_bloqueo = archivo_calificaciones + '.lock'
+        self.candado_estudiantes = candado_estudiantes or CandadoLE()
+        self.candado_calificaciones = candado_calificaciones or CandadoLE()
+        self.compartido = compartido
+        self.estudiantes = {}      # ID_Estudiante -> Nombre
+        self.por_estudiante = {}   # ID_Estudiante -> [filas]
+        self.por_materia = {}      # (ID_Estudiante, Materia) -> [filas]
+        self.filas = []            # todas las filas en orden de archivo
+        self.agregados = Agregados()
+        self._posiciones = {}      # ruta -> (inodo, bytes ya leídos)
+        self._abiertos = {}        # ruta -> último archivo leído (modo compartido)
+        self.durabilidad = durabilidad
+        self._observadores = []
+        self._agrupada = None
+        if durabilidad != 'every-write':
+            self._agrupada = EscrituraAgrupada(self.agregar_calificaciones, max_lote, intervalo_lote)
+
+    def al_cambiar(self, funcion):
+        """Llama a `funcion(ids)` después de cada cambio en las calificaciones, ya
+        visible en los índices; `ids` son los estudiantes afectados o None si se
+        recargó todo."""
+        self._observadores.append(funcion)
+
+    def dejar_de_avisar(self, funcion):
+        """Quita una `funcion` registrada con al_cambiar."""
+        self._observadores.remove(funcion)
+
+    def _avisar(self, ids):
+        for funcion in self._observadores:
+            funcion(ids)
+
+    def cerrar(self):
+        """Escribe las calificaciones que siguen en el búfer."""
+        if self._agrupada is not None:
+            self._agrupada.cerrar()
+
+    def escritura_agrupada(self):
+        """{"lotes", "filas"} escritos por la escritura agrupada, o None con
+        durabilidad 'every-write' (cada fila se escribe sola)."""
+        return self._agrupada.estadisticas() if self._agrupada is not None else None
+
+    def esperas(self):
+        """Histogramas de espera de cada candado: {archivo: {modo: Histograma}}."""
+        return {'estudiantes': self.candado_estudiantes.esperas(),
+                'calificaciones': self.candado_calificaciones.esperas()}
+
+    def contar(self):
+        """(estudiantes, calificaciones) cargados."""
+        with self._lectura(self.candado_calificaciones):
+            return len(self.estudiantes), len(self.filas)
+
+    # ---------------- Carga ---------------- #
+    def cargar(self):
+        """Lee ambos CSV y reconstruye los índices desde cero."""
+        with self._escritores(), self._indices_exclusivos(), self._bloqueo(exclusivo=False):
+            self._cargar()
+
+    def _cargar(self):
+        self.estudiantes = {}
+        self.por_estudiante = {}
+        self.por_materia = {}
+        self.filas = []
+        self.agregados = Agregados()
+        self._posiciones = {}
+        self._leer(self.archivo_estudiantes, self._indexar_estudiante, 0)
+        self._leer(self.archivo_calificaciones, self._indexar_fila, 0)
+        self.agregados.aplicar(self.filas)
+        self._avisar(None)
+
+    def _leer(self, ruta, indexar, desde):
+        """Indexa las filas de `ruta` a partir del byte `desde`."""
+        if not os.path.exists(ruta):
+            return
+        f = open(ruta, 'r', newline='', encoding=CODIFICACION)
+        try:
+            st = os.fstat(f.fileno())
+            if desde:
+                f.seek(desde)
+            lector = csv.reader(f)
+            if not desde:
+                next(lector, None)
+            for row in lector:
+                indexar(row)
+            self._posiciones[ruta] = (st.st_ino, st.st_size)
+        finally:
+            self._retener(ruta, f)
+
+    def _retener(self, ruta, f):
+        """En modo compartido deja abierto el último archivo leído.
+
+        Mientras siga abierto su inodo no se reutiliza, así que un inodo
+        distinto en `ruta` siempre indica que otro proceso lo reemplazó.
+        """
+        if not self.compartido:
+            f.close()
+            return
+        anterior = self._abiertos.get(ruta)
+        if anterior is not None and anterior is not f:
+            anterior.close()
+        self._abiertos[ruta] = f
+
+    def _indexar_estudiante(self, row):
+        if len(row) >= 2:
+            self.estudiantes[row[0]] = row[1]
+
+    def _indexar_fila(self, row):
+        if len(row) >= 3:
+            self._indexar(row[0], row[1], row[2])
+
+    def _indexar(self, id_est, materia, calif):
+        fila = Fila(id_est, materia, calif)
+        self.filas.append(fila)
+        self.por_estudiante.setdefault(fila.id_est, []).append(fila)
+        self.por_materia.setdefault((fila.id_est, fila.materia), []).append(fila)
+        return fila
+
+    # ---------------- Coordinación entre procesos ---------------- #
+    def _bloqueo(self, exclusivo):
+        if not self.compartido:
+            return nullcontext()
+        return bloqueo_archivo(self.archivo_bloqueo, exclusivo)
+
+    def _cambiados(self):
+        """Archivos que otro proceso modificó desde la última lectura."""
+        cambiados = []
+        for ruta in (self.archivo_estudiantes, self.archivo_calificaciones):
+            try:
+                st = os.stat(ruta)
+            except FileNotFoundError:
+                continue
+            if self._posiciones.get(ruta) != (st.st_ino, st.st_size):
+                cambiados.append(ruta)
+        return cambiados
+
+    def _ponerse_al_dia(self):
+        """Lee lo que otros procesos agregaron. Requiere _escritores y el flock."""
+        cambiados = self._cambiados()
+        if not cambiados:
+            return
+        with self._indices_exclusivos():
+            self._leer_cambiados(cambiados)
+
+    def _leer_cambiados(self, cambiados):
+        for ruta in cambiados:
+            inodo, leidos = self._posiciones.get(ruta, (None, 0))
+            st = os.stat(ruta)
+            if st.st_ino != inodo or st.st_size < leidos:
+                # El archivo fue reemplazado o truncado: recargar todo
+                self._cargar()
+                return
+            if ruta == self.archivo_estudiantes:
+                self._leer(ruta, self._indexar_estudiante, leidos)
+            else:
+                antes = len(self.filas)
+                self._leer(ruta, self._indexar_fila, leidos)
+                self.agregados.aplicar(self.filas[antes:])
+                self._avisar({fila.id_est for fila in self.filas[antes:]})
+
+    @contextmanager
+    def _escritores(self):
+        # Siempre en este orden para no cruzarse con otro hilo
+        with self.candado_estudiantes.escritura(), self.candado_calificaciones.escritura():
+            yield
+
+    @contextmanager
+    def _indices_exclusivos(self):
+        with self.candado_estudiantes.exclusivo(), self.candado_calificaciones.exclusivo():
+            yield
+
+    @contextmanager
+    def _lectura(self, candado):
+        if self.compartido and self._cambiados():
+            with self._escritores(), self._bloqueo(exclusivo=False):
+                self._ponerse_al_dia()
+        with candado.lectura():
+            yield
+
+    @contextmanager
+    def _escritura(self, candado):
+        """Turno de escritor sobre un archivo; los índices se tocan con candado.exclusivo()."""
+        if self.compartido:
+            # Ponerse al día puede recargar ambos archivos
+            with self._escritores(), self._bloqueo(exclusivo=True):
+                self._ponerse_al_dia()
+                yield
+        else:
+            with candado.escritura():
+                yield
+
+    def _anotar_escritura(self, ruta):
+        if self.compartido:
+            st = os.stat(ruta)
+            if self._posiciones.get(ruta, (None,))[0] != st.st_ino:
+                self._retener(ruta, open(ruta, 'rb'))
+            self._posiciones[ruta] = (st.st_ino, st.st_size)
+
+    # ---------------- Estudiantes ---------------- #
+    def estudiante_existe(self, id_est):
+        with self._lectura(self.candado_estudiantes):
+            return id_est in self.estudiantes
+
+    def existentes(self, ids):
+        """Subconjunto de `ids` que son estudiantes registrados."""
+        with self._lectura(self.candado_estudiantes):
+            return {id_est for id_est in ids if id_est in self.estudiantes}
+
+    def nombres(self):
+        """{ID_Estudiante: Nombre} de todos los estudiantes."""
+        with self._lectura(self.candado_estudiantes):
+            return dict(self.estudiantes)
+
+    def agregar_estudiante(self, id_est, nombre):
+        """Registra el estudiante; devuelve False si el ID ya existía."""
+        with self._escritura(self.candado_estudiantes):
+            if id_est in self.estudiantes:
+                return False
+            with open(self.archivo_estudiantes, 'a', newline='', encoding=CODIFICACION) as f:
+                csv.writer(f).writerow([id_est, nombre])
+            self._anotar_escritura(self.archivo_estudiantes)
+            with self.candado_estudiantes.exclusivo():
+                self.estudiantes[id_est] = nombre
+        return True
+
+    def agregar_estudiantes(self, estudiantes):
+        """Registra varios (id, nombre) con una sola escritura; omite los ya registrados."""
+        with self._escritura(self.candado_estudiantes):
+            nuevos = {}
+            for id_est, nombre in estudiantes:
+                if id_est not in self.estudiantes and id_est not in nuevos:
+                    nuevos[id_est] = nombre
+            if nuevos:
+                with open(self.archivo_estudiantes, 'a', newline='', encoding=CODIFICACION) as f:
+                    csv.writer(f).writerows(nuevos.items())
+                self._anotar_escritura(self.archivo_estudiantes)
+                with self.candado_estudiantes.exclusivo():
+                    self.estudiantes.update(nuevos)
+            return len(nuevos)
+
+    # ---------------- Calificaciones ---------------- #
+    def agregar_calificacion(self, id_est, materia, calif):
+        """Agrega la fila al CSV y a los índices. `calif` ya debe estar validada.
+
+        Vuelve cuando la fila está escrita (con fsync salvo con durabilidad
+        'none') y en los índices.
+        """
+        if self._agrupada is not None:
+            return self._agrupada.agregar((id_est, materia, calif))
+        return self.agregar_calificaciones([(id_est, materia, calif)])[0]
+
+    def agregar_calificaciones(self, filas):
+        """Agrega varias filas (id, materia, calif) con una sola escritura."""
+        with self._escritura(self.candado_calificaciones):
+            with open(self.archivo_calificaciones, 'a', newline='', encoding=CODIFICACION) as f:
+                csv.writer(f).writerows(filas)
+                if self.durabilidad != 'none':
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._anotar_escritura(self.archivo_calificaciones)
+            with self.candado_calificaciones.exclusivo():
+                nuevas = [self._indexar(id_est, materia, str(calif)) for id_est, materia, calif in filas]
+                self.agregados.aplicar(nuevas)
+            self._avisar({id_est for id_est, _, _ in filas})
+            return [fila.como_dict() for fila in nuevas]
+
+    def _reescribir(self, filas):
+        """Reemplaza calificaciones.csv por `filas` (listas) de forma atómica."""
+        tmp = self.archivo_calificaciones + '.tmp'
+        with open(tmp, 'w', newline='', encoding=CODIFICACION) as f:
+            writer = csv.writer(f)
+            writer.writerow(CAMPOS_CALIFICACIONES)
+            writer.writerows(filas)
+            if self.durabilidad != 'none':
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, self.archivo_calificaciones)
+        self._anotar_escritura(self.archivo_calificaciones)
+
+    def actualizar_calificacion(self, id_est, materia, calif):
+        """Cambia la calificación de todas las filas (id, materia); devuelve cuántas cambió."""
+        with self._escritura(self.candado_calificaciones):
+            cambiar = self.por_materia.get((id_est, materia))
+            if not cambiar:
+                return 0
+            calif = str(calif)
+            marcadas = {id(fila) for fila in cambiar}
+            self._reescribir([f.id_est, f.materia, calif if id(f) in marcadas else f.texto] for f in self.filas)
+            anteriores = [fila.copia() for fila in cambiar]
+            with self.candado_calificaciones.exclusivo():
+                for fila in cambiar:
+                    fila.cambiar(calif)
+                self.agregados.aplicar(agregadas=cambiar, quitadas=anteriores)
+            self._avisar({id_est})
+            return len(cambiar)
+
+    def eliminar_calificaciones(self, id_est):
+        """Borra todas las filas del estudiante; devuelve cuántas borró."""
+        with self._escritura(self.candado_calificaciones):
+            return self._eliminar(list(self.por_estudiante.get(id_est, ())))
+
+    def eliminar_pares(self, pares):
+        """Borra las filas de cada (id, materia) de `pares` con una sola reescritura."""
+        with self._escritura(self.candado_calificaciones):
+            return self._eliminar([f for par in set(pares) for f in self.por_materia.get(par, ())])
+
+    def _eliminar(self, quitadas):
+        if not quitadas:
+            return 0
+        marcadas = {id(fila) for fila in quitadas}
+        restantes = [f for f in self.filas if id(f) not in marcadas]
+        self._reescribir(f.como_lista() for f in restantes)
+        with self.candado_calificaciones.exclusivo():
+            self.filas = restantes
+            for fila in quitadas:
+                self.por_materia.pop((fila.id_est, fila.materia), None)
+            for id_est in {fila.id_est for fila in quitadas}:
+                filas_est = [f for f in self.por_estudiante.get(id_est, ()) if id(f) not in marcadas]
+                if filas_est:
+                    self.por_estudiante[id_est] = filas_est
+                else:
+                    self.por_estudiante.pop(id_est, None)
+            self.agregados.aplicar(quitadas=quitadas)
+        self._avisar({fila.id_est for fila in quitadas})
+        return len(quitadas)
+
+    def calificaciones_de(self, id_est):
+        with self._lectura(self.candado_calificaciones):
+            return [fila.como_dict() for fila in self.por_estudiante.get(id_est, ())]
+
+    def calificacion_de(self, id_est, materia):
+        with self._lectura(self.candado_calificaciones):
+            return [fila.como_dict() for fila in self.por_materia.get((id_est, materia), ())]
+
+    def promedio_de(self, id_est):
+        with self._lectura(self.candado_calificaciones):
+            return self.agregados.promedio(id_est)
+
+    def estadisticas_de(self, nrc):
+        with self._lectura(self.candado_calificaciones):
+            return self.agregados.estadisticas(nrc)
+
+    def ranking_de(self, nrc, k):
+        with self._lectura(self.candado_calificaciones):
+            return self.agregados.ranking(nrc, k)
+
+    def acumulado_de(self, nrc):
+        with self._lectura(self.candado_calificaciones):
+            return self.agregados.acumulado(nrc)
+
+    def claves_ranking_de(self, nrc, k):
+        with self._lectura(self.candado_calificaciones):
+            return self.agregados.claves_ranking(nrc, k)
+
+    def todas(self):
+        with self._lectura(self.candado_calificaciones):
+            filas = list(self.filas)
+        return [fila.como_dict() for fila in filas]
+
+    def pagina(self, desde, limite):
+        """Devuelve (filas[desde:desde+limite], total de filas)."""
+        with self._lectura(self.candado_calificaciones):
+            return [fila.como_dict() for fila in self.filas[desde:desde + limite]], len(self.filas)
+
+    def iterar(self, bloque=1000):
+        """Recorre las filas sin copiar la lista completa.
+
+        Toma el candado por bloques, así un recorrido largo no frena a los
+        escritores; las filas agregadas durante el recorrido también se ven.
+        Un ELIMINAR a mitad del recorrido desplaza las posiciones, por lo que
+        alguna fila posterior puede saltarse.
+        """
+        i = 0
+        while True:
+            with self._lectura(self.candado_calificaciones):
+                trozo = self.filas[i:i + bloque]
+            if not trozo:
+                return
+            yield from (fila.como_dict() for fila in trozo)
+            i += len(trozo)
@@ -0,0 +1,239 @@
+import heapq
+import os
+import re
+import zlib
+from itertools import chain, islice
+
+from agregados import Agregados
+from almacen import Almacen
+from metricas import Histograma
+
+
+def particion_de(id_est, particiones):
+    """Partición de un ID_Estudiante; estable entre procesos (hash() no lo es)."""
+    return zlib.crc32(id_est.encode('utf-8')) % particiones
+
+
+def archivos_particion(directorio, k):
+    """(estudiantes, calificaciones) de la partición `k` dentro de `directorio`."""
+    return (os.path.join(directorio, f'estudiantes.{k}.csv'),
+            os.path.join(directorio, f'calificaciones.{k}.csv'))
+
+
+def archivo_cantidad(directorio):
+    """Archivo donde `directorio` guarda en cuántas particiones se repartió."""
+    return os.path.join(directorio, 'particiones.txt')
+
+
+def leer_cantidad(directorio):
+    """N guardado en `directorio`, o None si no hay."""
+    try:
+        with open(archivo_cantidad(directorio), 'r', encoding='utf-8') as f:
+            return int(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def guardar_cantidad(directorio, particiones):
+    """Anota N en `directorio` de forma atómica."""
+    ruta = archivo_cantidad(directorio)
+    with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(f'{particiones}\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(ruta + '.tmp', ruta)
+
+
+def _cantidad_por_archivos(directorio):
+    """N deducido de los archivos (directorios de antes de particiones.txt), o None."""
+    indices = [int(m.group(1)) for nombre in os.listdir(directorio)
+               if (m := re.fullmatch(r'(?:estudiantes|calificaciones)\.(\d+)\.csv', nombre))]
+    return max(indices) + 1 if indices else None
+
+
+class AlmacenParticionado:
+    """Misma interfaz que Almacen, repartiendo los datos en N particiones.
+
+    Cada estudiante vive, con todas sus calificaciones, en la partición
+    particion_de(ID_Estudiante, N): un Almacen propio sobre
+    `estudiantes.<k>.csv` y `calificaciones.<k>.csv`, con sus candados, su
+    escritura agrupada y su flock en modo compartido. Así las escrituras de
+    estudiantes de distintas particiones no se esperan entre sí, y ACTUALIZAR
+    y ELIMINAR reescriben solo el CSV de su partición (1/N de las filas).
+
+    Las consultas por estudiante van a una sola partición; LISTAR, el
+    ranking y las estadísticas por NRC combinan todas. LISTAR devuelve las
+    filas agrupadas por partición (dentro de cada una, en orden de archivo).
+
+    N no se puede cambiar sin repartir los archivos otra vez (migrar.py
+    particionar), porque cada ID quedaría en otra partición: se anota en
+    `particiones.txt` al crear el directorio y no se abre con otro N.
+    """
+
+    def __init__(self, directorio, particiones, compartido=False, durabilidad='every-write',
+                 max_lote=500, intervalo_lote=0):
+        if particiones < 1:
+            raise ValueError("Se necesita al menos una partición")
+        os.makedirs(directorio, exist_ok=True)
+        guardada = leer_cantidad(directorio)
+        if guardada is None:
+            guardada = _cantidad_por_archivos(directorio)
+            if guardada in (None, particiones):
+                guardada = particiones
+                guardar_cantidad(directorio, particiones)
+        if guardada != particiones:
+            # Con otro N casi todos los IDs caerían en otra partición
+            raise ValueError(f"{directorio} está repartido en {guardada} particiones, no en {particiones}; "
+                             f"usar --particiones {guardada} o repartir los datos con migrar.py particionar")
+        self.directorio = directorio
+        self.particiones = [Almacen(*archivos_particion(directorio, k), compartido=compartido,
+                                    durabilidad=durabilidad, max_lote=max_lote,
+                                    intervalo_lote=intervalo_lote)
+                            for k in range(particiones)]
+
+    def _de(self, id_est):
+        return self.particiones[particion_de(id_est, len(self.particiones))]
+
+    def _repartir(self, elementos, clave):
+        """{partición: [(posición, elemento), ...]} según el ID de cada elemento."""
+        grupos = {}
+        for i, elemento in enumerate(elementos):
+            grupos.setdefault(self._de(clave(elemento)), []).append((i, elemento))
+        return grupos
+
+    def al_cambiar(self, funcion):
+        """Como Almacen.al_cambiar; cada partición avisa de sus propios cambios."""
+        for particion in self.particiones:
+            particion.al_cambiar(funcion)
+
+    def dejar_de_avisar(self, funcion):
+        """Como Almacen.dejar_de_avisar."""
+        for particion in self.particiones:
+            particion.dejar_de_avisar(funcion)
+
+    def cerrar(self):
+        for particion in self.particiones:
+            particion.cerrar()
+
+    def escritura_agrupada(self):
+        """Como Almacen.escritura_agrupada, sumando todas las particiones."""
+        todas = [e for p in self.particiones if (e := p.escritura_agrupada())]
+        if not todas:
+            return None
+        return {clave: sum(e[clave] for e in todas) for clave in todas[0]}
+
+    def esperas(self):
+        """Esperas de los candados, sumando las de todas las particiones."""
+        total = {}
+        for particion in self.particiones:
+            for archivo, esperas in particion.esperas().items():
+                for modo, h in esperas.items():
+                    total.setdefault(archivo, {}).setdefault(modo, Histograma()).sumar(h)
+        return total
+
+    def contar(self):
+        """(estudiantes, calificaciones) cargados."""
+        cuentas = [particion.contar() for particion in self.particiones]
+        return sum(e for e, _ in cuentas), sum(c for _, c in cuentas)
+
+    # ---------------- Carga ---------------- #
+    def cargar(self):
+        """Lee los CSV de cada partición."""
+        for particion in self.particiones:
+            particion.cargar()
+
+    # ---------------- Estudiantes ---------------- #
+    def estudiante_existe(self, id_est):
+        return self._de(id_est).estudiante_existe(id_est)
+
+    def existentes(self, ids):
+        """Subconjunto de `ids` que son estudiantes registrados."""
+        grupos = self._repartir(ids, lambda id_est: id_est)
+        return set().union(*(p.existentes([id_est for _, id_est in g]) for p, g in grupos.items()))
+
+    def nombres(self):
+        """{ID_Estudiante: Nombre} de todos los estudiantes."""
+        nombres = {}
+        for particion in self.particiones:
+            nombres.update(particion.nombres())
+        return nombres
+
+    def agregar_estudiante(self, id_est, nombre):
+        """Registra el estudiante; devuelve False si el ID ya existía."""
+        return self._de(id_est).agregar_estudiante(id_est, nombre)
+
+    def agregar_estudiantes(self, estudiantes):
+        """Registra varios (id, nombre), una escritura por partición; omite los ya registrados."""
+        grupos = self._repartir(estudiantes, lambda e: e[0])
+        return sum(p.agregar_estudiantes([e for _, e in g]) for p, g in grupos.items())
+
+    # ---------------- Calificaciones ---------------- #
+    def agregar_calificacion(self, id_est, materia, calif):
+        """Como Almacen.agregar_calificacion."""
+        return self._de(id_est).agregar_calificacion(id_est, materia, calif)
+
+    def agregar_calificaciones(self, filas):
+        """Agrega varias filas (id, materia, calif), una escritura por partición."""
+        nuevas = [None] * len(filas)
+        for particion, grupo in self._repartir(filas, lambda f: f[0]).items():
+            agregadas = particion.agregar_calificaciones([f for _, f in grupo])
+            for (i, _), fila in zip(grupo, agregadas):
+                nuevas[i] = fila
+        return nuevas
+
+    def actualizar_calificacion(self, id_est, materia, calif):
+        """Cambia la calificación de todas las filas (id, materia); devuelve cuántas cambió."""
+        return self._de(id_est).actualizar_calificacion(id_est, materia, calif)
+
+    def eliminar_calificaciones(self, id_est):
+        """Borra todas las filas del estudiante; devuelve cuántas borró."""
+        return self._de(id_est).eliminar_calificaciones(id_est)
+
+    def eliminar_pares(self, pares):
+        """Borra las filas de cada (id, materia) de `pares`, una reescritura por partición."""
+        grupos = self._repartir(set(pares), lambda par: par[0])
+        return sum(p.eliminar_pares([par for _, par in g]) for p, g in grupos.items())
+
+    def calificaciones_de(self, id_est):
+        return self._de(id_est).calificaciones_de(id_est)
+
+    def calificacion_de(self, id_est, materia):
+        return self._de(id_est).calificacion_de(id_est, materia)
+
+    def promedio_de(self, id_est):
+        return self._de(id_est).promedio_de(id_est)
+
+    def estadisticas_de(self, nrc):
+        # Cada estudiante está en una sola partición: las cuentas se suman sin repetir
+        acumulados = [a for p in self.particiones if (a := p.acumulado_de(nrc))]
+        if not acumulados:
+            return None
+        n, suma, cuadrados, estudiantes = (sum(columna) for columna in zip(*acumulados))
+        resumen = Agregados.resumen((n, suma, cuadrados))
+        resumen["estudiantes"] = estudiantes
+        return resumen
+
+    def ranking_de(self, nrc, k):
+        claves = heapq.merge(*(p.claves_ranking_de(nrc, k) for p in self.particiones))
+        return Agregados.formatear_ranking(islice(claves, k))
+
+    def todas(self):
+        return list(chain.from_iterable(p.todas() for p in self.particiones))
+
+    def pagina(self, desde, limite):
+        """Devuelve (filas[desde:desde+limite], total de filas)."""
+        filas, total = [], 0
+        for particion in self.particiones:
+            inicio = max(desde - total, 0)
+            if len(filas) < limite:
+                trozo, n = particion.pagina(inicio, limite - len(filas))
+                filas.extend(trozo)
+            else:
+                n = particion.contar()[1]
+            total += n
+        return filas, total
+
+    def iterar(self, bloque=1000):
+        """Recorre las particiones una tras otra (ver Almacen.iterar)."""
+        for particion in self.particiones:
+            yield from particion.iterar(bloque)
@@ -0,0 +1,261 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from agregados import Agregados
+from almacen import DURABILIDADES
+from escritura_agrupada import EscrituraAgrupada
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS estudiantes (
+    id_estudiante TEXT PRIMARY KEY,
+    nombre        TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS calificaciones (
+    fila          INTEGER PRIMARY KEY,
+    id_estudiante TEXT NOT NULL,
+    materia       TEXT NOT NULL,
+    calificacion  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calificaciones_estudiante ON calificaciones (id_estudiante, materia);
+CREATE INDEX IF NOT EXISTS calificaciones_materia ON calificaciones (materia, id_estudiante);
+"""
+
+# synchronous de SQLite para cada durabilidad de Almacen: en modo WAL,
+# NORMAL no hace fsync en cada COMMIT (se pierde lo último si se corta la
+# luz, no si se cae el proceso) y FULL sí lo hace.
+SINCRONIZACION = {'none': 'NORMAL', 'batch': 'FULL', 'every-write': 'FULL'}
+
+# Las sentencias son constantes: el módulo sqlite3 guarda cada una ya
+# preparada por conexión y la reutiliza en las siguientes llamadas.
+SQL_EXISTE = "SELECT 1 FROM estudiantes WHERE id_estudiante = ?"
+SQL_AGREGAR_ESTUDIANTE = "INSERT OR IGNORE INTO estudiantes (id_estudiante, nombre) VALUES (?, ?)"
+SQL_AGREGAR = "INSERT INTO calificaciones (id_estudiante, materia, calificacion) VALUES (?, ?, ?)"
+SQL_ACTUALIZAR = "UPDATE calificaciones SET calificacion = ? WHERE id_estudiante = ? AND materia = ?"
+SQL_ELIMINAR = "DELETE FROM calificaciones WHERE id_estudiante = ?"
+SQL_ELIMINAR_PAR = "DELETE FROM calificaciones WHERE id_estudiante = ? AND materia = ?"
+SQL_DE_ESTUDIANTE = ("SELECT id_estudiante, materia, calificacion FROM calificaciones "
+                     "WHERE id_estudiante = ? ORDER BY fila")
+SQL_DE_PAR = ("SELECT id_estudiante, materia, calificacion FROM calificaciones "
+              "WHERE id_estudiante = ? AND materia = ? ORDER BY fila")
+SQL_PROMEDIO = ("SELECT COUNT(*), SUM(CAST(calificacion AS REAL)), "
+                "SUM(CAST(calificacion AS REAL) * CAST(calificacion AS REAL)) "
+                "FROM calificaciones WHERE id_estudiante = ?")
+SQL_ESTADISTICAS = ("SELECT COUNT(*), SUM(CAST(calificacion AS REAL)), "
+                    "SUM(CAST(calificacion AS REAL) * CAST(calificacion AS REAL)), "
+                    "COUNT(DISTINCT id_estudiante) FROM calificaciones WHERE materia = ?")
+SQL_RANKING = ("SELECT id_estudiante, AVG(CAST(calificacion AS REAL)) AS promedio FROM calificaciones "
+               "WHERE materia = ? GROUP BY id_estudiante ORDER BY promedio DESC, id_estudiante LIMIT ?")
+SQL_TODAS = "SELECT id_estudiante, materia, calificacion FROM calificaciones ORDER BY fila"
+SQL_PAGINA = ("SELECT id_estudiante, materia, calificacion FROM calificaciones "
+              "ORDER BY fila LIMIT ? OFFSET ?")
+SQL_DESDE = ("SELECT fila, id_estudiante, materia, calificacion FROM calificaciones "
+             "WHERE fila > ? ORDER BY fila LIMIT ?")
+SQL_TOTAL = "SELECT COUNT(*) FROM calificaciones"
+SQL_CONTAR = "SELECT (SELECT COUNT(*) FROM estudiantes), (SELECT COUNT(*) FROM calificaciones)"
+
+
+def _fila(row):
+    return {'ID_Estudiante': row[0], 'Materia': row[1], 'Calificación': row[2]}
+
+
+class AlmacenSQLite:
+    """Misma interfaz que Almacen, guardando los datos en una base SQLite.
+
+    No hay copia en memoria: cada consulta va a la base, que tiene índices
+    por (ID_Estudiante, Materia) y por (Materia, ID_Estudiante). ACTUALIZAR
+    y ELIMINAR tocan solo las filas afectadas en vez de reescribir el CSV.
+
+    La base usa modo WAL: los lectores no esperan al escritor. Cada hilo
+    tiene su propia conexión y las escrituras de este proceso pasan de a una
+    por `_escritor`. Varios procesos (lanzador.py) pueden abrir la misma
+    base; SQLite los coordina, así que `compartido` no cambia nada.
+    """
+
+    def __init__(self, archivo, compartido=False, durabilidad='every-write', max_lote=500,
+                 intervalo_lote=0):
+        if durabilidad not in DURABILIDADES:
+            raise ValueError(f"Durabilidad desconocida: {durabilidad}")
+        self.archivo = archivo
+        self.compartido = compartido
+        self.durabilidad = durabilidad
+        self._local = threading.local()
+        self._conexiones = []
+        self._conexiones_lock = threading.Lock()
+        self._escritor = threading.Lock()
+        self._observadores = []
+        self._agrupada = None
+        if durabilidad != 'every-write':
+            self._agrupada = EscrituraAgrupada(self.agregar_calificaciones, max_lote, intervalo_lote)
+
+    def _conexion(self):
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = sqlite3.connect(self.archivo, timeout=30, isolation_level=None,
+                                  check_same_thread=False, cached_statements=64)
+            con.execute("PRAGMA journal_mode = WAL")
+            con.execute(f"PRAGMA synchronous = {SINCRONIZACION[self.durabilidad]}")
+            self._local.con = con
+            with self._conexiones_lock:
+                self._conexiones.append(con)
+        return con
+
+    def al_cambiar(self, funcion):
+        """Como Almacen.al_cambiar: se avisa después de cada COMMIT que cambió calificaciones."""
+        self._observadores.append(funcion)
+
+    def dejar_de_avisar(self, funcion):
+        """Como Almacen.dejar_de_avisar."""
+        self._observadores.remove(funcion)
+
+    def _avisar(self, ids):
+        for funcion in self._observadores:
+            funcion(ids)
+
+    @contextmanager
+    def _transaccion(self):
+        """Transacción de escritura: BEGIN IMMEDIATE ... COMMIT (o ROLLBACK)."""
+        con = self._conexion()
+        with self._escritor:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                yield con
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            con.execute("COMMIT")
+
+    def escritura_agrupada(self):
+        """Como Almacen.escritura_agrupada."""
+        return self._agrupada.estadisticas() if self._agrupada is not None else None
+
+    def esperas(self):
+        """Sin candados de lectura: SQLite en modo WAL no hace esperar a los lectores."""
+        return {}
+
+    def cerrar(self):
+        """Escribe lo que siga en el búfer y cierra las conexiones."""
+        if self._agrupada is not None:
+            self._agrupada.cerrar()
+        with self._conexiones_lock:
+            for con in self._conexiones:
+                con.close()
+            self._conexiones.clear()
+        self._local = threading.local()
+
+    # ---------------- Carga ---------------- #
+    def cargar(self):
+        """Crea las tablas e índices si la base es nueva."""
+        self._conexion().executescript(ESQUEMA)
+
+    def contar(self):
+        """(estudiantes, calificaciones) guardados."""
+        return self._conexion().execute(SQL_CONTAR).fetchone()
+
+    # ---------------- Estudiantes ---------------- #
+    def estudiante_existe(self, id_est):
+        return self._conexion().execute(SQL_EXISTE, (id_est,)).fetchone() is not None
+
+    def existentes(self, ids):
+        """Subconjunto de `ids` que son estudiantes registrados."""
+        con = self._conexion()
+        return {id_est for id_est in ids if con.execute(SQL_EXISTE, (id_est,)).fetchone()}
+
+    def nombres(self):
+        """{ID_Estudiante: Nombre} de todos los estudiantes."""
+        return dict(self._conexion().execute("SELECT id_estudiante, nombre FROM estudiantes"))
+
+    def agregar_estudiante(self, id_est, nombre):
+        """Registra el estudiante; devuelve False si el ID ya existía."""
+        with self._transaccion() as con:
+            return con.execute(SQL_AGREGAR_ESTUDIANTE, (id_est, nombre)).rowcount == 1
+
+    def agregar_estudiantes(self, estudiantes):
+        """Registra varios (id, nombre) en una transacción; omite los ya registrados."""
+        with self._transaccion() as con:
+            antes = con.total_changes
+            con.executemany(SQL_AGREGAR_ESTUDIANTE, estudiantes)
+            return con.total_changes - antes
+
+    # ---------------- Calificaciones ---------------- #
+    def agregar_calificacion(self, id_est, materia, calif):
+        """Como Almacen.agregar_calificacion."""
+        if self._agrupada is not None:
+            return self._agrupada.agregar((id_est, materia, calif))
+        return self.agregar_calificaciones([(id_est, materia, calif)])[0]
+
+    def agregar_calificaciones(self, filas):
+        """Agrega varias filas (id, materia, calif) en una sola transacción."""
+        filas = [(id_est, materia, str(calif)) for id_est, materia, calif in filas]
+        with self._transaccion() as con:
+            con.executemany(SQL_AGREGAR, filas)
+        self._avisar({id_est for id_est, _, _ in filas})
+        return [_fila(f) for f in filas]
+
+    def actualizar_calificacion(self, id_est, materia, calif):
+        """Cambia la calificación de todas las filas (id, materia); devuelve cuántas cambió."""
+        with self._transaccion() as con:
+            cambiadas = con.execute(SQL_ACTUALIZAR, (str(calif), id_est, materia)).rowcount
+        self._avisar({id_est})
+        return cambiadas
+
+    def eliminar_calificaciones(self, id_est):
+        """Borra todas las filas del estudiante; devuelve cuántas borró."""
+        with self._transaccion() as con:
+            borradas = con.execute(SQL_ELIMINAR, (id_est,)).rowcount
+        self._avisar({id_est})
+        return borradas
+
+    def eliminar_pares(self, pares):
+        """Borra las filas de cada (id, materia) de `pares` en una transacción."""
+        pares = set(pares)
+        with self._transaccion() as con:
+            antes = con.total_changes
+            con.executemany(SQL_ELIMINAR_PAR, pares)
+            borradas = con.total_changes - antes
+        self._avisar({id_est for id_est, _ in pares})
+        return borradas
+
+    def calificaciones_de(self, id_est):
+        return [_fila(r) for r in self._conexion().execute(SQL_DE_ESTUDIANTE, (id_est,))]
+
+    def calificacion_de(self, id_est, materia):
+        return [_fila(r) for r in self._conexion().execute(SQL_DE_PAR, (id_est, materia))]
+
+    def promedio_de(self, id_est):
+        n, suma, cuadrados = self._conexion().execute(SQL_PROMEDIO, (id_est,)).fetchone()
+        return Agregados.resumen((n, suma, cuadrados)) if n else None
+
+    def estadisticas_de(self, nrc):
+        n, suma, cuadrados, estudiantes = self._conexion().execute(SQL_ESTADISTICAS, (nrc,)).fetchone()
+        if not n:
+            return None
+        resumen = Agregados.resumen((n, suma, cuadrados))
+        resumen["estudiantes"] = estudiantes
+        return resumen
+
+    def ranking_de(self, nrc, k):
+        return [{"ID_Estudiante": id_est, "promedio": round(promedio, 2)}
+                for id_est, promedio in self._conexion().execute(SQL_RANKING, (nrc, k))]
+
+    def todas(self):
+        return [_fila(r) for r in self._conexion().execute(SQL_TODAS)]
+
+    def pagina(self, desde, limite):
+        """Devuelve (filas[desde:desde+limite], total de filas)."""
+        con = self._conexion()
+        filas = [_fila(r) for r in con.execute(SQL_PAGINA, (limite, desde))]
+        return filas, con.execute(SQL_TOTAL).fetchone()[0]
+
+    def iterar(self, bloque=1000):
+        """Recorre las filas por bloques, sin mantener abierta una lectura larga."""
+        con = self._conexion()
+        ultima = 0
+        while True:
+            trozo = con.execute(SQL_DESDE, (ultima, bloque)).fetchall()
+            if not trozo:
+                return
+            for r in trozo:
+                yield _fila(r[1:])
+            ultima = trozo[-1][0]
+
@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheNRC:
+    """Caché LRU con caducidad de las respuestas de BUSCAR_NRC.
+
+    Se guardan tanto los NRC encontrados (`status` ok) como los inexistentes
+    (`not_found`, con su propio TTL, normalmente más corto). Los errores de
+    red nunca se guardan para no ocultar que el servidor NRC volvió.
+    """
+
+    def __init__(self, ttl=300, ttl_negativo=30, max_entradas=1024, reloj=time.monotonic):
+        self.ttl = ttl
+        self.ttl_negativo = ttl_negativo
+        self.max_entradas = max_entradas
+        self._reloj = reloj
+        self._entradas = OrderedDict()   # NRC -> (vence, respuesta)
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+
+    def obtener(self, nrc):
+        """Devuelve la respuesta guardada para `nrc` o None si no hay una vigente."""
+        with self._lock:
+            entrada = self._entradas.get(nrc)
+            if entrada is not None:
+                if entrada[0] > self._reloj():
+                    self._entradas.move_to_end(nrc)
+                    self.aciertos += 1
+                    return entrada[1]
+                del self._entradas[nrc]
+            self.fallos += 1
+            return None
+
+    def guardar(self, nrc, respuesta):
+        estado = respuesta.get("status")
+        if estado == "ok":
+            ttl = self.ttl
+        elif estado == "not_found":
+            ttl = self.ttl_negativo
+        else:
+            return
+        with self._lock:
+            self._entradas[nrc] = (self._reloj() + ttl, respuesta)
+            self._entradas.move_to_end(nrc)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, nrc=None):
+        """Descarta un NRC o, sin argumento, toda la caché."""
+        with self._lock:
+            if nrc is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(nrc, None)
+            self.invalidaciones += 1
+
+    def estadisticas(self):
+        with self._lock:
+            return {"entradas": len(self._entradas), "aciertos": self.aciertos,
+                    "fallos": self.fallos, "invalidaciones": self.invalidaciones}
@@ -0,0 +1,75 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from metricas import Histograma
+
+
+class CandadoLE:
+    """Candado de lectores y escritor.
+
+    - `lectura()`: varios hilos a la vez.
+    - `escritura()`: un solo escritor a la vez, pero los lectores siguen
+      entrando; ahí se hace lo lento (escribir el archivo).
+    - `exclusivo()`: dentro de `escritura()`, espera a que salgan los
+      lectores y no deja entrar nuevos; ahí se modifican los índices.
+
+    Así un BUSCAR solo espera lo que tarda actualizar la memoria, no la
+    escritura en disco. No es reentrante.
+
+    Se mide cuánto espera cada modo hasta entrar (ver `esperas`).
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._escritor = threading.Lock()
+        self._lectores = 0
+        self._exclusivo = False
+        self._esperas = {'lectura': Histograma(), 'escritura': Histograma(),
+                         'exclusivo': Histograma()}
+
+    @contextmanager
+    def lectura(self):
+        inicio = time.perf_counter()
+        with self._cond:
+            while self._exclusivo:
+                self._cond.wait()
+            self._lectores += 1
+            self._esperas['lectura'].observar(time.perf_counter() - inicio)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._lectores -= 1
+                if not self._lectores and self._exclusivo:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def escritura(self):
+        inicio = time.perf_counter()
+        with self._escritor:
+            espera = time.perf_counter() - inicio
+            with self._cond:
+                self._esperas['escritura'].observar(espera)
+            yield
+
+    @contextmanager
+    def exclusivo(self):
+        """Requiere estar dentro de `escritura()`."""
+        inicio = time.perf_counter()
+        with self._cond:
+            self._exclusivo = True   # los lectores nuevos esperan
+            while self._lectores:
+                self._cond.wait()
+            self._esperas['exclusivo'].observar(time.perf_counter() - inicio)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusivo = False
+                self._cond.notify_all()
+
+    def esperas(self):
+        """Copia de los histogramas de espera: {modo: Histograma}."""
+        with self._cond:
+            return {modo: h.copia() for modo, h in self._esperas.items()}
@@ -0,0 +1,66 @@
+import threading
+import time
+
+CERRADO = 'cerrado'
+ABIERTO = 'abierto'
+SEMIABIERTO = 'semiabierto'
+
+
+class Circuito:
+    """Cortacircuitos para un servicio remoto (el servidor de NRCs).
+
+    Tras `umbral` fallos seguidos el circuito se abre y durante `espera`
+    segundos las consultas fallan al instante en vez de agotar su timeout.
+    Pasado ese tiempo se deja pasar una sola consulta de prueba: si responde
+    se cierra, si falla vuelve a abrirse.
+    """
+
+    def __init__(self, umbral=5, espera=10, reloj=time.monotonic):
+        self.umbral = umbral
+        self.espera = espera
+        self._reloj = reloj
+        self._lock = threading.Lock()
+        self._estado = CERRADO
+        self._fallos = 0
+        self._abierto_desde = 0.0
+        self._probando = False
+        self.rechazadas = 0
+        self.aperturas = 0
+
+    def permitir(self):
+        """Indica si se puede consultar ahora; si no, hay que fallar rápido."""
+        with self._lock:
+            if self._estado == CERRADO:
+                return True
+            if self._estado == ABIERTO and self._reloj() - self._abierto_desde >= self.espera:
+                self._estado = SEMIABIERTO
+            if self._estado == SEMIABIERTO and not self._probando:
+                self._probando = True
+                return True
+            self.rechazadas += 1
+            return False
+
+    def exito(self):
+        with self._lock:
+            self._estado = CERRADO
+            self._fallos = 0
+            self._probando = False
+
+    def fallo(self):
+        with self._lock:
+            self._fallos += 1
+            if self._estado == SEMIABIERTO or self._fallos >= self.umbral:
+                if self._estado != ABIERTO:
+                    self.aperturas += 1
+                self._estado = ABIERTO
+                self._abierto_desde = self._reloj()
+                self._probando = False
+
+    def estado(self):
+        with self._lock:
+            return self._estado
+
+    def estadisticas(self):
+        with self._lock:
+            return {"estado": self._estado, "fallos_seguidos": self._fallos,
+                    "rechazadas": self.rechazadas, "aperturas": self.aperturas}
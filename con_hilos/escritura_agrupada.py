@@ -0,0 +1,103 @@
+import logging
+import threading
+import time
+
+# Hijo del logger del servidor: sale por la misma cola (ver registro.py)
+LOG = logging.getLogger('calificaciones.escritura')
+
+
+class _Pendiente:
+    __slots__ = ('fila', 'listo', 'resultado', 'error')
+
+    def __init__(self, fila):
+        self.fila = fila
+        self.listo = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+class EscrituraAgrupada:
+    """Junta filas enviadas por muchos hilos en una sola escritura.
+
+    Un hilo escritor toma lo acumulado y llama a `escribir(filas)`, que
+    devuelve un resultado por fila. Con `intervalo=0` escribe apenas queda
+    libre: lo que llega mientras escribe (p. ej. durante un fsync) forma el
+    siguiente lote. Con `intervalo>0` espera hasta ese tiempo, o hasta
+    juntar `max_filas`, antes de escribir.
+
+    Quien llama a `agregar` vuelve cuando su lote ya se escribió (y, en
+    Almacen, ya está en los índices); si la escritura falla, recibe el error.
+    """
+
+    def __init__(self, escribir, max_filas=500, intervalo=0, nombre='escritor'):
+        self._escribir = escribir
+        self.max_filas = max_filas
+        self.intervalo = intervalo
+        self._nombre = nombre
+        self._cond = threading.Condition()
+        self._pendientes = []
+        self._hilo = None
+        self._cerrando = False
+        self.lotes = 0
+        self.filas = 0
+
+    def agregar(self, fila):
+        pendiente = _Pendiente(fila)
+        with self._cond:
+            if self._cerrando:
+                raise RuntimeError("La escritura agrupada está cerrada")
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._trabajar, name=self._nombre, daemon=True)
+                self._hilo.start()
+            self._pendientes.append(pendiente)
+            if len(self._pendientes) == 1 or len(self._pendientes) >= self.max_filas:
+                self._cond.notify()
+        pendiente.listo.wait()
+        if pendiente.error is not None:
+            raise pendiente.error
+        return pendiente.resultado
+
+    def _tomar_lote(self):
+        with self._cond:
+            while not self._pendientes and not self._cerrando:
+                self._cond.wait()
+            limite = time.monotonic() + self.intervalo
+            while len(self._pendientes) < self.max_filas and not self._cerrando:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                self._cond.wait(restante)
+            lote = self._pendientes[:self.max_filas]
+            del self._pendientes[:self.max_filas]
+            return lote
+
+    def _trabajar(self):
+        while True:
+            lote = self._tomar_lote()
+            if not lote:
+                return   # cerrando y sin pendientes
+            try:
+                resultados = self._escribir([p.fila for p in lote])
+                for p, resultado in zip(lote, resultados):
+                    p.resultado = resultado
+            except Exception as e:
+                LOG.error("Error en escritura agrupada",
+                          extra={'campos': {'escritor': self._nombre, 'filas': len(lote), 'error': e}})
+                for p in lote:
+                    p.error = e
+            self.lotes += 1
+            self.filas += len(lote)
+            for p in lote:
+                p.listo.set()
+
+    def estadisticas(self):
+        return {"lotes": self.lotes, "filas": self.filas}
+
+    def cerrar(self):
+        """Escribe lo pendiente y detiene el hilo."""
+        with self._cond:
+            self._cerrando = True
+            self._cond.notify()
+            hilo = self._hilo
+        if hilo is not None:
+            hilo.join()
@@ -0,0 +1,54 @@
+import sys
+
+# Texto de la calificación -> (nota, texto compartido). Las notas distintas
+# son pocas (0–20 con algún decimal), así que todas las filas comparten
+# los mismos objetos
+_NOTAS = {}
+MAX_NOTAS = 100_000
+
+
+def nota_de(texto):
+    """(float o None si no es numérica, texto) con objetos compartidos entre filas."""
+    par = _NOTAS.get(texto)
+    if par is None:
+        try:
+            nota = float(texto)
+        except ValueError:
+            nota = None
+        par = (nota, sys.intern(texto))
+        if len(_NOTAS) < MAX_NOTAS:
+            _NOTAS[texto] = par
+    return par
+
+
+class Fila:
+    """Una calificación cargada en memoria.
+
+    Ocupa mucho menos que el dict por fila de csv.DictReader: sin diccionario
+    por instancia, con el ID y la materia internados (cada estudiante y cada
+    NRC se guardan una sola vez aunque aparezcan en muchas filas) y la nota
+    ya convertida a float para los agregados. Se conserva además el texto
+    de la calificación tal como está en el CSV, así las respuestas y las
+    reescrituras no cambian "12" por "12.0".
+
+    Hacia afuera de Almacen las filas siguen saliendo como dicts (como_dict).
+    """
+
+    __slots__ = ('id_est', 'materia', 'nota', 'texto')
+
+    def __init__(self, id_est, materia, calif):
+        self.id_est = sys.intern(id_est)
+        self.materia = sys.intern(materia)
+        self.nota, self.texto = nota_de(calif)
+
+    def cambiar(self, calif):
+        self.nota, self.texto = nota_de(calif)
+
+    def copia(self):
+        return Fila(self.id_est, self.materia, self.texto)
+
+    def como_lista(self):
+        return [self.id_est, self.materia, self.texto]
+
+    def como_dict(self):
+        return {'ID_Estudiante': self.id_est, 'Materia': self.materia, 'Calificación': self.texto}
@@ -0,0 +1,195 @@
+"""Importación y exportación masiva de calificaciones.
+
+    python importador.py importar entrada.csv [--datos DIR] [--procesos N]
+    python importador.py exportar salida.csv [--datos DIR]
+
+El archivo de entrada tiene las columnas ID_Estudiante, Nombre, Materia y
+Calificación (Nombre puede ir vacío si el estudiante ya está registrado).
+Se aplican las mismas reglas que AGREGAR_ESTUDIANTE y AGREGAR en server.py:
+estudiantes sin duplicar, NRC existente y calificación entre 0 y 20. La
+entrada se lee por trozos, los trozos se validan en paralelo en varios
+procesos y las filas aceptadas se escriben en una sola pasada; las
+rechazadas van a un CSV aparte con el motivo. Un estudiante nuevo solo se
+registra si se acepta alguna de sus filas. Si el servidor de NRCs no
+responde, las filas cuyos NRCs no se pudieron verificar se rechazan con el
+motivo "Servicio NRC no disponible", para importarlas otra vez más tarde.
+
+Conviene ejecutarlo con el servidor detenido o lanzado con lanzador.py
+(--reuseport), que relee lo que otros procesos agregan a los CSV.
+"""
+import argparse
+import csv
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import server
+from almacen import CODIFICACION, fcntl
+
+CAMPOS_ENTRADA = ['ID_Estudiante', 'Nombre', 'Materia', 'Calificación']
+MOTIVO_SIN_SERVICIO = "Servicio NRC no disponible"
+
+
+def leer_trozos(archivo, tamano):
+    """Genera listas de hasta `tamano` filas [id, nombre, materia, calif]."""
+    with open(archivo, 'r', newline='', encoding=CODIFICACION) as f:
+        lector = csv.reader(f)
+        next(lector, None)
+        while True:
+            trozo = list(islice(lector, tamano))
+            if not trozo:
+                return
+            yield trozo
+
+
+def validar_trozo(filas):
+    """Valida formato y rango de un trozo (se ejecuta en otro proceso).
+
+    Devuelve por fila (id, nombre, NRC, calificación) o (fila, motivo).
+    """
+    resultado = []
+    for row in filas:
+        if len(row) != 4 or not row[0].strip():
+            resultado.append((row, "Fila con formato inválido"))
+            continue
+        id_est, nombre, materia, calif = (c.strip() for c in row)
+        calif_float, error = server.validar_calificacion(calif)
+        if error:
+            resultado.append((row, error["mensaje"]))
+        else:
+            resultado.append((id_est, nombre, materia.upper(), calif_float))
+    return resultado
+
+
+def validar_en_paralelo(trozos, procesos):
+    """Como map(validar_trozo, trozos) pero con pocos trozos en vuelo a la vez."""
+    if procesos <= 1:
+        yield from map(validar_trozo, trozos)
+        return
+    with ProcessPoolExecutor(procesos) as ex:
+        pendientes = deque()
+        for trozo in trozos:
+            pendientes.append(ex.submit(validar_trozo, trozo))
+            if len(pendientes) >= 2 * procesos:
+                yield pendientes.popleft().result()
+        while pendientes:
+            yield pendientes.popleft().result()
+
+
+def cargar_catalogo(archivo):
+    """NRCs válidos leídos de un nrcs.csv local (validación sin servidor)."""
+    with open(archivo, 'r', newline='', encoding=CODIFICACION) as f:
+        return {row['NRC'].strip().upper() for row in csv.DictReader(f)}
+
+
+def importar(args):
+    almacen = server.crear_almacen(compartido=fcntl is not None)
+    almacen.cargar()
+    catalogo = cargar_catalogo(args.catalogo) if args.catalogo else None
+    nrc_validos = set()
+    aceptadas = rechazadas = nuevos = 0
+    inicio = time.perf_counter()
+
+    with open(args.rechazos, 'w', newline='', encoding=CODIFICACION) as f_rech:
+        rechazos = csv.writer(f_rech)
+        rechazos.writerow(CAMPOS_ENTRADA + ['Motivo'])
+        for validadas in validar_en_paralelo(leer_trozos(args.entrada, args.trozo), args.procesos):
+            # NRCs de este trozo que aún no se conocen: una sola consulta
+            # (los que no se pudieron verificar se vuelven a consultar en el siguiente)
+            nuevos_nrc = {v[2] for v in validadas if len(v) == 4} - nrc_validos
+            sin_verificar = set()
+            if catalogo is not None:
+                nrc_validos |= nuevos_nrc & catalogo
+            elif nuevos_nrc:
+                respuestas = server.consultar_nrcs(nuevos_nrc)
+                nrc_validos |= {n for n, r in respuestas.items() if r.get("status") == "ok"}
+                sin_verificar = {n for n, r in respuestas.items() if r.get("sin_servicio")}
+
+            estudiantes = []
+            calificaciones = []
+            registrados = almacen.existentes({v[0] for v in validadas if len(v) == 4})
+            for v in validadas:
+                if len(v) == 2:
+                    rechazos.writerow(list(v[0]) + [v[1]])
+                    rechazadas += 1
+                    continue
+                id_est, nombre, materia, calif = v
+                if id_est not in registrados and not nombre:
+                    rechazos.writerow([id_est, nombre, materia, calif, "Estudiante no registrado"])
+                    rechazadas += 1
+                    continue
+                if materia not in nrc_validos:
+                    motivo = MOTIVO_SIN_SERVICIO if materia in sin_verificar else "NRC no encontrado"
+                    rechazos.writerow([id_est, nombre, materia, calif, motivo])
+                    rechazadas += 1
+                    continue
+                # El estudiante se registra solo si alguna de sus filas se acepta
+                if id_est not in registrados:
+                    registrados.add(id_est)
+                    estudiantes.append((id_est, nombre))
+                calificaciones.append((id_est, materia, calif))
+
+            if estudiantes:
+                nuevos += almacen.agregar_estudiantes(estudiantes)
+            if calificaciones:
+                almacen.agregar_calificaciones(calificaciones)
+            aceptadas += len(calificaciones)
+
+    segundos = time.perf_counter() - inicio
+    total = aceptadas + rechazadas
+    print(f"{total} filas en {segundos:.1f} s ({total / segundos if segundos else 0:.0f} filas/s): "
+          f"{aceptadas} calificaciones agregadas, {nuevos} estudiantes nuevos, "
+          f"{rechazadas} rechazadas (ver {args.rechazos})")
+
+
+def exportar(args):
+    """Escribe todas las calificaciones con el nombre del estudiante, en streaming."""
+    almacen = server.crear_almacen()
+    almacen.cargar()
+    nombres = almacen.nombres()
+    inicio = time.perf_counter()
+    n = 0
+    with open(args.salida, 'w', newline='', encoding=CODIFICACION) as f:
+        escritor = csv.writer(f)
+        escritor.writerow(CAMPOS_ENTRADA)
+        for row in almacen.iterar():
+            escritor.writerow([row['ID_Estudiante'], nombres.get(row['ID_Estudiante'], ''),
+                               row['Materia'], row['Calificación']])
+            n += 1
+    segundos = time.perf_counter() - inicio
+    print(f"{n} filas exportadas en {segundos:.1f} s ({n / segundos if segundos else 0:.0f} filas/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importación/exportación masiva de calificaciones")
+    parser.add_argument('--datos', help="carpeta con estudiantes.csv y calificaciones.csv")
+    parser.add_argument('--puerto-nrc', type=int, help="puerto del servidor de NRCs")
+    parser.add_argument('--almacenamiento', choices=server.ALMACENAMIENTOS,
+                        help="csv (por defecto), sqlite o particionado")
+    parser.add_argument('--particiones', type=int, help="con --almacenamiento particionado")
+    sub = parser.add_subparsers(dest='accion', required=True)
+
+    imp = sub.add_parser('importar', help="agregar calificaciones desde un CSV")
+    imp.add_argument('entrada')
+    imp.add_argument('--rechazos', default='rechazados.csv', help="CSV con las filas rechazadas")
+    imp.add_argument('--trozo', type=int, default=50_000, help="filas por trozo")
+    imp.add_argument('--procesos', type=int, default=os.cpu_count() or 1,
+                     help="procesos que validan trozos en paralelo")
+    imp.add_argument('--catalogo', help="validar NRCs contra este nrcs.csv en vez del servidor")
+
+    exp = sub.add_parser('exportar', help="escribir todas las calificaciones en un CSV")
+    exp.add_argument('salida')
+
+    args = parser.parse_args()
+    server.configurar(args.datos, puerto_nrc=args.puerto_nrc, almacenamiento=args.almacenamiento,
+                     particiones=args.particiones)
+    if args.accion == 'importar':
+        importar(args)
+    else:
+        exportar(args)
+
+
+if __name__ == '__main__':
+    main()
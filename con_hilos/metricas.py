@@ -0,0 +1,137 @@
+import threading
+from bisect import bisect_left
+
+# Límites superiores (segundos) de los cubos de los histogramas de latencia
+CUBOS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+         0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histograma:
+    """Histograma de latencias con cubos fijos (como los de Prometheus).
+
+    Observar es O(log cubos) y no guarda las muestras. No es seguro entre
+    hilos: quien lo usa lo protege con su propio candado.
+    """
+
+    __slots__ = ('cuentas', 'cantidad', 'suma', 'maximo')
+
+    def __init__(self):
+        self.cuentas = [0] * (len(CUBOS) + 1)   # el último cubo es +Inf
+        self.cantidad = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def observar(self, segundos):
+        self.cuentas[bisect_left(CUBOS, segundos)] += 1
+        self.cantidad += 1
+        self.suma += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+
+    def percentil(self, p):
+        """Límite superior del cubo donde cae el percentil `p` (0-1)."""
+        if not self.cantidad:
+            return 0.0
+        objetivo = p * self.cantidad
+        acumulado = 0
+        for limite, cuenta in zip(CUBOS, self.cuentas):
+            acumulado += cuenta
+            if acumulado >= objetivo:
+                return min(limite, self.maximo)
+        return self.maximo
+
+    def resumen(self):
+        media = self.suma / self.cantidad if self.cantidad else 0.0
+        return {"cantidad": self.cantidad, "media_ms": _ms(media),
+                "p50_ms": _ms(self.percentil(0.50)), "p95_ms": _ms(self.percentil(0.95)),
+                "p99_ms": _ms(self.percentil(0.99)), "max_ms": _ms(self.maximo)}
+
+    def sumar(self, otro):
+        """Agrega las muestras de `otro` a este histograma."""
+        self.cuentas = [a + b for a, b in zip(self.cuentas, otro.cuentas)]
+        self.cantidad += otro.cantidad
+        self.suma += otro.suma
+        self.maximo = max(self.maximo, otro.maximo)
+
+    def copia(self):
+        otro = Histograma()
+        otro.cuentas = list(self.cuentas)
+        otro.cantidad, otro.suma, otro.maximo = self.cantidad, self.suma, self.maximo
+        return otro
+
+
+def _ms(segundos):
+    return round(segundos * 1000, 3)
+
+
+class Metricas:
+    """Contadores e histogramas por nombre y etiquetas, seguros entre hilos.
+
+    `observar('comando', 0.0012, op='BUSCAR')` suma una muestra al
+    histograma de BUSCAR; `contar('respuestas', op='BUSCAR', status='ok')`
+    suma uno al contador correspondiente.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histogramas = {}   # (nombre, ((etiqueta, valor), ...)) -> Histograma
+        self._contadores = {}    # (nombre, ((etiqueta, valor), ...)) -> int
+
+    def observar(self, nombre, segundos, **etiquetas):
+        clave = (nombre, tuple(etiquetas.items()))
+        with self._lock:
+            h = self._histogramas.get(clave)
+            if h is None:
+                h = self._histogramas[clave] = Histograma()
+            h.observar(segundos)
+
+    def contar(self, nombre, n=1, **etiquetas):
+        clave = (nombre, tuple(etiquetas.items()))
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + n
+
+    def capturar(self):
+        """Copia de los histogramas y contadores, tomada de una sola vez."""
+        with self._lock:
+            return ({k: h.copia() for k, h in self._histogramas.items()}, dict(self._contadores))
+
+
+def prometheus(prefijo, histogramas, contadores, medidores=()):
+    """Texto en formato de exposición de Prometheus.
+
+    `histogramas` y `contadores` son los que devuelve Metricas.capturar();
+    `medidores` es una lista de (nombre, {etiqueta: valor}, valor).
+    """
+    lineas = []
+    vistos = set()
+
+    def tipo(nombre, clase):
+        if nombre not in vistos:
+            vistos.add(nombre)
+            lineas.append(f"# TYPE {nombre} {clase}")
+
+    for (nombre, etiquetas), h in sorted(histogramas.items()):
+        completo = f"{prefijo}_{nombre}_segundos"
+        tipo(completo, 'histogram')
+        acumulado = 0
+        for limite, cuenta in zip(CUBOS + ('+Inf',), h.cuentas):
+            acumulado += cuenta
+            lineas.append(f"{completo}_bucket{_etiquetas(etiquetas, le=limite)} {acumulado}")
+        lineas.append(f"{completo}_sum{_etiquetas(etiquetas)} {h.suma}")
+        lineas.append(f"{completo}_count{_etiquetas(etiquetas)} {h.cantidad}")
+    for (nombre, etiquetas), valor in sorted(contadores.items()):
+        completo = f"{prefijo}_{nombre}_total"
+        tipo(completo, 'counter')
+        lineas.append(f"{completo}{_etiquetas(etiquetas)} {valor}")
+    for nombre, etiquetas, valor in medidores:
+        completo = f"{prefijo}_{nombre}"
+        tipo(completo, 'gauge')
+        lineas.append(f"{completo}{_etiquetas(tuple(etiquetas.items()))} {valor}")
+    return '\n'.join(lineas) + '\n'
+
+
+def _etiquetas(etiquetas, **extra):
+    todas = etiquetas + tuple(extra.items())
+    if not todas:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in todas) + '}'
@@ -0,0 +1,177 @@
+"""Migración de los datos entre los CSV, la base SQLite y las particiones.
+
+    python migrar.py a-sqlite    [--datos DIR] [--base calificaciones.db]
+    python migrar.py a-csv       [--datos DIR] [--base calificaciones.db]
+    python migrar.py particionar [--datos DIR] [--particiones N]
+    python migrar.py unir        [--datos DIR] [--particiones N]
+
+a-sqlite lee estudiantes.csv y calificaciones.csv y los carga en la base
+(que debe estar vacía, salvo con --reemplazar). a-csv hace lo contrario y
+reemplaza los CSV de forma atómica. Las calificaciones conservan su orden y su
+valor se copia tal cual, así una ida y vuelta deja el mismo calificaciones.csv.
+
+particionar reparte estudiantes.csv y calificaciones.csv en los N pares de
+archivos de particiones/ (ver AlmacenParticionado) y anota N en
+particiones/particiones.txt; para cambiar N hay que volver a particionar con
+--reemplazar. unir los junta otra vez en los dos CSV: cada archivo conserva
+su orden, pero las filas quedan agrupadas por partición.
+
+Ejecutarlo con el servidor detenido; después arrancar server.py con
+--almacenamiento sqlite, particionado (con las mismas --particiones) o csv.
+"""
+import argparse
+import csv
+import glob
+import os
+import time
+from itertools import islice
+
+import server
+from almacen import CAMPOS_CALIFICACIONES, CAMPOS_ESTUDIANTES, CODIFICACION
+from almacen_particionado import AlmacenParticionado, archivos_particion, guardar_cantidad, particion_de
+from almacen_sqlite import AlmacenSQLite
+
+FILAS_POR_TRANSACCION = 50_000
+
+
+def _leer(ruta):
+    with open(ruta, 'r', newline='', encoding=CODIFICACION) as f:
+        lector = csv.reader(f)
+        next(lector, None)
+        yield from lector
+
+
+def _por_trozos(filas, tamano):
+    while trozo := list(islice(filas, tamano)):
+        yield trozo
+
+
+def a_sqlite(args):
+    if args.reemplazar and os.path.exists(args.base):
+        for sufijo in ('', '-wal', '-shm'):
+            if os.path.exists(args.base + sufijo):
+                os.remove(args.base + sufijo)
+    base = AlmacenSQLite(args.base, durabilidad='none')
+    base.cargar()
+    if any(base.contar()):
+        raise SystemExit(f"{args.base} ya tiene datos; usar --reemplazar para empezar de cero")
+    inicio = time.perf_counter()
+    estudiantes = calificaciones = 0
+    for trozo in _por_trozos((r[:2] for r in _leer(server.ARCHIVO_ESTUDIANTES) if len(r) >= 2),
+                             FILAS_POR_TRANSACCION):
+        estudiantes += base.agregar_estudiantes(trozo)
+    for trozo in _por_trozos((r[:3] for r in _leer(server.ARCHIVO_CALIFICACIONES) if len(r) >= 3),
+                             FILAS_POR_TRANSACCION):
+        base.agregar_calificaciones(trozo)
+        calificaciones += len(trozo)
+    base.cerrar()
+    print(f"{estudiantes} estudiantes y {calificaciones} calificaciones copiados a {args.base} "
+          f"en {time.perf_counter() - inicio:.1f} s")
+
+
+def _escribir_csv(ruta, campos, filas):
+    tmp = ruta + '.tmp'
+    with open(tmp, 'w', newline='', encoding=CODIFICACION) as f:
+        escritor = csv.writer(f)
+        escritor.writerow(campos)
+        n = 0
+        for fila in filas:
+            escritor.writerow(fila)
+            n += 1
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, ruta)
+    return n
+
+
+def a_csv(args):
+    if not os.path.exists(args.base):
+        raise SystemExit(f"No existe {args.base}")
+    base = AlmacenSQLite(args.base)
+    inicio = time.perf_counter()
+    estudiantes = _escribir_csv(server.ARCHIVO_ESTUDIANTES, CAMPOS_ESTUDIANTES, base.nombres().items())
+    calificaciones = _escribir_csv(server.ARCHIVO_CALIFICACIONES, CAMPOS_CALIFICACIONES,
+                                   (list(f.values()) for f in base.iterar(FILAS_POR_TRANSACCION)))
+    base.cerrar()
+    print(f"{estudiantes} estudiantes y {calificaciones} calificaciones copiados desde {args.base} "
+          f"en {time.perf_counter() - inicio:.1f} s")
+
+
+def _repartir_csv(origen, campos, rutas):
+    """Copia cada fila de `origen` al archivo de `rutas` que le toca según su ID."""
+    tmps = [ruta + '.tmp' for ruta in rutas]
+    archivos = [open(tmp, 'w', newline='', encoding=CODIFICACION) for tmp in tmps]
+    try:
+        escritores = [csv.writer(f) for f in archivos]
+        for escritor in escritores:
+            escritor.writerow(campos)
+        n = 0
+        for fila in _leer(origen):
+            if len(fila) >= len(campos):
+                escritores[particion_de(fila[0], len(rutas))].writerow(fila[:len(campos)])
+                n += 1
+        for f in archivos:
+            f.flush()
+            os.fsync(f.fileno())
+    finally:
+        for f in archivos:
+            f.close()
+    for tmp, ruta in zip(tmps, rutas):
+        os.replace(tmp, ruta)
+    return n
+
+
+def _archivos_particiones(directorio):
+    return glob.glob(os.path.join(directorio, 'estudiantes.*.csv')) + \
+        glob.glob(os.path.join(directorio, 'calificaciones.*.csv'))
+
+
+def particionar(args):
+    directorio = server.DIRECTORIO_PARTICIONES
+    existentes = _archivos_particiones(directorio)
+    if existentes and not args.reemplazar:
+        raise SystemExit(f"{directorio} ya tiene particiones; usar --reemplazar para repartir de nuevo")
+    for ruta in existentes:
+        os.remove(ruta)
+    os.makedirs(directorio, exist_ok=True)
+    rutas = [archivos_particion(directorio, k) for k in range(args.particiones)]
+    inicio = time.perf_counter()
+    estudiantes = _repartir_csv(server.ARCHIVO_ESTUDIANTES, CAMPOS_ESTUDIANTES, [e for e, _ in rutas])
+    calificaciones = _repartir_csv(server.ARCHIVO_CALIFICACIONES, CAMPOS_CALIFICACIONES, [c for _, c in rutas])
+    guardar_cantidad(directorio, args.particiones)
+    print(f"{estudiantes} estudiantes y {calificaciones} calificaciones repartidos en "
+          f"{args.particiones} particiones en {time.perf_counter() - inicio:.1f} s")
+
+
+def unir(args):
+    directorio = server.DIRECTORIO_PARTICIONES
+    if not _archivos_particiones(directorio):
+        raise SystemExit(f"No hay particiones en {directorio}")
+    particionado = AlmacenParticionado(directorio, args.particiones)
+    particionado.cargar()
+    inicio = time.perf_counter()
+    estudiantes = _escribir_csv(server.ARCHIVO_ESTUDIANTES, CAMPOS_ESTUDIANTES, particionado.nombres().items())
+    calificaciones = _escribir_csv(server.ARCHIVO_CALIFICACIONES, CAMPOS_CALIFICACIONES,
+                                   (list(f.values()) for f in particionado.iterar(FILAS_POR_TRANSACCION)))
+    print(f"{estudiantes} estudiantes y {calificaciones} calificaciones copiados desde {directorio} "
+          f"en {time.perf_counter() - inicio:.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migración entre los CSV, la base SQLite y las particiones")
+    parser.add_argument('accion', choices=['a-sqlite', 'a-csv', 'particionar', 'unir'])
+    parser.add_argument('--datos', help="carpeta con estudiantes.csv y calificaciones.csv")
+    parser.add_argument('--base', help="archivo SQLite (por defecto calificaciones.db junto a los CSV)")
+    parser.add_argument('--particiones', type=int, default=server.PARTICIONES,
+                        help=f"particionar/unir: cantidad de particiones (por defecto {server.PARTICIONES})")
+    parser.add_argument('--reemplazar', action='store_true',
+                        help="a-sqlite: borrar la base si existe; particionar: borrar las particiones")
+    args = parser.parse_args()
+    server.configurar(args.datos)
+    args.base = args.base or server.ARCHIVO_BASE_DATOS
+    acciones = {'a-sqlite': a_sqlite, 'a-csv': a_csv, 'particionar': particionar, 'unir': unir}
+    acciones[args.accion](args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import csv
+import os
+import threading
+from contextlib import nullcontext
+
+from almacen import bloqueo_archivo
+
+CAMPOS = ['ID_Estudiante', 'Materia', 'Calificación']
+
+
+class PendientesNRC:
+    """Calificaciones aceptadas en modo degradado, con el NRC sin verificar.
+
+    La calificación ya está en calificaciones.csv; aquí queda anotada hasta
+    que el servidor de NRCs vuelva y se confirme o descarte. La lista vive
+    solo en el archivo (es corta y se consulta poco), así un reinicio no la
+    pierde y, con `compartido=True`, varios procesos la comparten con flock.
+    """
+
+    def __init__(self, archivo, compartido=False):
+        self.archivo = archivo
+        self.compartido = compartido
+        self._lock = threading.Lock()
+
+    def _bloqueo(self):
+        if not self.compartido:
+            return nullcontext()
+        return bloqueo_archivo(self.archivo + '.lock', True)
+
+    def _leer(self):
+        if not os.path.exists(self.archivo):
+            return []
+        with open(self.archivo, 'r', newline='') as f:
+            lector = csv.reader(f)
+            next(lector, None)
+            return [tuple(row) for row in lector if len(row) == 3]
+
+    def agregar(self, id_est, materia, calif):
+        with self._lock, self._bloqueo():
+            nuevo = not os.path.exists(self.archivo)
+            with open(self.archivo, 'a', newline='') as f:
+                escritor = csv.writer(f)
+                if nuevo:
+                    escritor.writerow(CAMPOS)
+                escritor.writerow([id_est, materia, calif])
+
+    def filas(self):
+        """Lista de (ID_Estudiante, Materia, Calificación) pendientes."""
+        with self._lock, self._bloqueo():
+            return self._leer()
+
+    def resolver(self, resueltas):
+        """Quita de la lista las filas ya confirmadas o descartadas."""
+        resueltas = set(resueltas)
+        with self._lock, self._bloqueo():
+            quedan = [f for f in self._leer() if f not in resueltas]
+            tmp = self.archivo + '.tmp'
+            with open(tmp, 'w', newline='') as f:
+                escritor = csv.writer(f)
+                escritor.writerow(CAMPOS)
+                escritor.writerows(quedan)
+            os.replace(tmp, self.archivo)
@@ -0,0 +1,64 @@
+import queue
+import socket
+import threading
+
+from protocolo import enviar_mensaje, recibir_mensaje
+
+
+class PoolConexiones:
+    """Conjunto acotado de conexiones persistentes al servidor de NRCs.
+
+    Como mucho `tamano` consultas usan el servidor a la vez; cada una toma
+    una conexión libre (o abre una nueva) y la devuelve al terminar. Si una
+    conexión reutilizada resulta estar cerrada por el servidor, se descarta
+    y la consulta se reintenta una vez con una conexión nueva.
+    """
+
+    def __init__(self, host, port, tamano=8, timeout=5):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._libres = queue.LifoQueue()
+        self._permisos = threading.BoundedSemaphore(tamano)
+
+    def _conectar(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def consultar(self, datos):
+        """Envía un mensaje y devuelve la respuesta (bytes)."""
+        if not self._permisos.acquire(timeout=self.timeout):
+            raise socket.timeout("No hay conexiones libres al servidor NRC")
+        try:
+            while True:
+                try:
+                    sock = self._libres.get_nowait()
+                    reutilizada = True
+                except queue.Empty:
+                    sock = self._conectar()
+                    reutilizada = False
+                try:
+                    enviar_mensaje(sock, datos)
+                    resp = recibir_mensaje(sock)
+                    if resp is None:
+                        raise ConnectionResetError("El servidor NRC cerró la conexión")
+                except ConnectionError:
+                    sock.close()
+                    if reutilizada:
+                        continue
+                    raise
+                except Exception:
+                    sock.close()
+                    raise
+                self._libres.put(sock)
+                return resp
+        finally:
+            self._permisos.release()
+
+    def cerrar(self):
+        while True:
+            try:
+                self._libres.get_nowait().close()
+            except queue.Empty:
+                break
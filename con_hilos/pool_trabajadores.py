@@ -0,0 +1,65 @@
+import logging
+import queue
+import threading
+import time
+
+# Hijo del logger del servidor: sale por la misma cola (ver registro.py)
+LOG = logging.getLogger('calificaciones.trabajadores')
+
+
+class PoolTrabajadores:
+    """Número fijo de hilos que atienden tareas desde una cola acotada.
+
+    `enviar` nunca bloquea: si la cola está llena devuelve False y quien
+    llama decide cómo rechazar la tarea. Se mide la profundidad de la cola y
+    cuánto espera cada tarea antes de que un hilo la tome.
+    """
+
+    def __init__(self, funcion, hilos=32, max_cola=256, nombre='trabajador'):
+        self._funcion = funcion
+        self._cola = queue.Queue(max_cola)
+        self._lock = threading.Lock()
+        self.nombre = nombre
+        self.hilos = hilos
+        self.max_cola = max_cola
+        self.atendidas = 0
+        self.rechazadas = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.cola_max = 0
+        for i in range(hilos):
+            threading.Thread(target=self._trabajar, name=f"{nombre}-{i}", daemon=True).start()
+
+    def enviar(self, *args):
+        try:
+            self._cola.put_nowait((time.monotonic(), args))
+        except queue.Full:
+            with self._lock:
+                self.rechazadas += 1
+            return False
+        profundidad = self._cola.qsize()
+        if profundidad > self.cola_max:
+            self.cola_max = profundidad
+        return True
+
+    def _trabajar(self):
+        while True:
+            encolada, args = self._cola.get()
+            espera = time.monotonic() - encolada
+            with self._lock:
+                self.atendidas += 1
+                self.espera_total += espera
+                if espera > self.espera_max:
+                    self.espera_max = espera
+            try:
+                self._funcion(*args)
+            except Exception as e:
+                LOG.error("Error en tarea del pool", extra={'campos': {'pool': self.nombre, 'error': e}})
+
+    def metricas(self):
+        with self._lock:
+            media = self.espera_total / self.atendidas if self.atendidas else 0.0
+            return {"hilos": self.hilos, "en_cola": self._cola.qsize(), "max_cola": self.max_cola,
+                    "cola_max_observada": self.cola_max, "atendidas": self.atendidas,
+                    "rechazadas": self.rechazadas, "espera_media_ms": round(media * 1000, 3),
+                    "espera_max_ms": round(self.espera_max * 1000, 3)}
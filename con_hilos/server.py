@@ -1,171 +1,1003 @@
+import argparse
+import asyncio
 import socket
 import threading
 import csv
 import json
 import os
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from almacen import CODIFICACION, DURABILIDADES, Almacen
+from almacen_sqlite import AlmacenSQLite
+from almacen_particionado import AlmacenParticionado
 
 BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(BASE)  # módulos compartidos con nrcs_server.py
+
+from protocolo import (CABECERA, CABECERA_FLUJO, enviar_flujo, enviar_mensaje,  # noqa: E402
+                       es_enmarcado, escribir_mensaje, leer_mensaje, recibir_mensaje)
+from pool_nrc import PoolConexiones  # noqa: E402
+from pool_trabajadores import PoolTrabajadores  # noqa: E402
+from cache_nrc import CacheNRC  # noqa: E402
+from cache_respuestas import CacheRespuestas  # noqa: E402
+from circuito import Circuito  # noqa: E402
+from metricas import Metricas, prometheus  # noqa: E402
+from pendientes_nrc import PendientesNRC  # noqa: E402
+import registro  # noqa: E402
+
 ARCHIVO_ESTUDIANTES = os.path.join(BASE, 'estudiantes.csv')
 ARCHIVO_CALIFICACIONES = os.path.join(BASE, 'calificaciones.csv')
+ARCHIVO_PENDIENTES = os.path.join(BASE, 'nrc_pendientes.csv')
+ARCHIVO_BASE_DATOS = os.path.join(BASE, 'calificaciones.db')
+DIRECTORIO_PARTICIONES = os.path.join(BASE, 'particiones')
 
 HOST = 'localhost'
 PORT = 12345
 NRC_SERVER_HOST = 'localhost'
 NRC_SERVER_PORT = 12346
+NRC_TIMEOUT = 5
+USAR_POOL_NRC = True
+NRC_POOL_TAMANO = 8
+CACHE_NRC_TTL = 300           # segundos que se recuerda un NRC válido
+CACHE_NRC_TTL_NEGATIVO = 30   # segundos que se recuerda un NRC inexistente
+CACHE_NRC_MAX = 1024
+CACHE_RESPUESTAS_MB = 64        # respuestas de BUSCAR/LISTAR ya serializadas (0: sin caché)
+CACHE_RESPUESTAS_MAX = 10000
+CIRCUITO_UMBRAL = 5      # fallos seguidos del servidor NRC antes de dejar de consultarlo
+CIRCUITO_ESPERA = 10     # segundos sin consultar antes de volver a probar
+MODO_DEGRADADO = False   # aceptar calificaciones si el servidor NRC no responde
+INTERVALO_VERIFICACION = 10   # segundos entre verificaciones de NRCs pendientes
 CLIENT_TIMEOUT = 30
 MAX_RECV = 4096
+FILAS_POR_TROZO = 1000   # filas por mensaje en LISTAR_FLUJO
+HILOS_TRABAJADORES = 32       # hilos que atienden conexiones
+MAX_COLA_CONEXIONES = 256     # conexiones aceptadas esperando un hilo libre
+HILOS_RECHAZO = 2             # hilos que responden 'busy' cuando la cola está llena
+ESPERA_RECHAZO = 0.05         # segundos que se espera el primer byte antes de responder 'busy'
+REUSEPORT = False             # varios procesos escuchando en el mismo puerto (ver lanzador.py)
+BACKLOG_ASYNC = 1024   # cola de conexiones pendientes en modo asyncio
+HILOS_EXECUTOR = 16    # hilos para E/S de archivos en modo asyncio
+DURABILIDAD = 'none'   # cuándo se confirma un AGREGAR (ver almacen.DURABILIDADES); 'none'
+                       # no hace fsync, como antes; 'batch' lo hace una vez por lote
+MAX_LOTE_ESCRITURA = 500   # filas por escritura agrupada
+INTERVALO_ESCRITURA = 0    # segundos extra para juntar filas (0: lo que llegue durante un fsync)
+ALMACENAMIENTOS = ('csv', 'sqlite', 'particionado')
+ALMACENAMIENTO = 'csv'     # 'csv': Almacen sobre los CSV; 'sqlite': AlmacenSQLite; 'particionado':
+                           # AlmacenParticionado (ver migrar.py)
+PARTICIONES = 8            # archivos en que se reparten los estudiantes con 'particionado'
+NIVEL_LOG = 'INFO'         # DEBUG muestra cada comando y cada respuesta del servidor NRC
+FORMATO_LOG = 'texto'      # 'texto' o 'json' (una línea JSON por mensaje)
+MUESTREO_LOG = 1           # escribir 1 de cada N mensajes DEBUG
+PUERTO_METRICAS = None     # puerto HTTP con las métricas en formato Prometheus (None: apagado)
+
+def crear_almacen(compartido=False):
+    """Almacen, AlmacenSQLite o AlmacenParticionado según ALMACENAMIENTO; todos
+    tienen la misma interfaz."""
+    if ALMACENAMIENTO == 'sqlite':
+        return AlmacenSQLite(ARCHIVO_BASE_DATOS, compartido=compartido, durabilidad=DURABILIDAD,
+                             max_lote=MAX_LOTE_ESCRITURA, intervalo_lote=INTERVALO_ESCRITURA)
+    if ALMACENAMIENTO == 'particionado':
+        return AlmacenParticionado(DIRECTORIO_PARTICIONES, PARTICIONES, compartido=compartido,
+                                   durabilidad=DURABILIDAD, max_lote=MAX_LOTE_ESCRITURA,
+                                   intervalo_lote=INTERVALO_ESCRITURA)
+    return Almacen(ARCHIVO_ESTUDIANTES, ARCHIVO_CALIFICACIONES, compartido=compartido,
+                   durabilidad=DURABILIDAD, max_lote=MAX_LOTE_ESCRITURA,
+                   intervalo_lote=INTERVALO_ESCRITURA)
 
-CSV_LOCK = threading.Lock()
+def crear_cache_respuestas(almacen, compartido=False):
+    """Caché de BUSCAR/LISTAR invalidada por los cambios de `almacen`, o None.
+
+    Con `compartido` otros procesos cambian los datos sin que este se entere,
+    así que no se usa caché.
+    """
+    if not CACHE_RESPUESTAS_MB or compartido:
+        return None
+    cache = CacheRespuestas(CACHE_RESPUESTAS_MB * 1024 * 1024, CACHE_RESPUESTAS_MAX)
+    almacen.al_cambiar(cache.invalidar)
+    return cache
+
+def crear_cache_nrc(compartido=False):
+    """CacheNRC; con `compartido` (--reuseport) no guarda nada: INVALIDAR_NRC
+    llega por el puerto compartido a un solo proceso y los demás seguirían
+    respondiendo con NRCs viejos hasta que venza el TTL."""
+    return CacheNRC(CACHE_NRC_TTL, CACHE_NRC_TTL_NEGATIVO, 0 if compartido else CACHE_NRC_MAX)
+
+ALMACEN = crear_almacen()
+CACHE_RESPUESTAS = crear_cache_respuestas(ALMACEN)
+POOL_NRC = PoolConexiones(NRC_SERVER_HOST, NRC_SERVER_PORT, NRC_POOL_TAMANO, NRC_TIMEOUT)
+POOL_TRABAJADORES = None
+CACHE_NRC = crear_cache_nrc()
+CIRCUITO_NRC = Circuito(CIRCUITO_UMBRAL, CIRCUITO_ESPERA)
+PENDIENTES = PendientesNRC(ARCHIVO_PENDIENTES)
+_EN_VUELO = {}   # NRC -> Future de la consulta en curso
+_EN_VUELO_LOCK = threading.Lock()
+METRICAS = Metricas()
+LOG = registro.obtener('calificaciones')
 
 AGREGAR_ESTUDIANTE = "AGREGAR_ESTUDIANTE"
 AGREGAR = "AGREGAR"
+AGREGAR_LOTE = "AGREGAR_LOTE"
 BUSCAR = "BUSCAR"
 ACTUALIZAR = "ACTUALIZAR"
 LISTAR = "LISTAR"
+LISTAR_FLUJO = "LISTAR_FLUJO"
 ELIMINAR = "ELIMINAR"
+INVALIDAR_NRC = "INVALIDAR_NRC"
+PROMEDIO = "PROMEDIO"
+ESTADISTICAS_NRC = "ESTADISTICAS_NRC"
+RANKING = "RANKING"
+STATS = "STATS"
+MAX_RANKING = 1000
+COMANDOS = {AGREGAR_ESTUDIANTE, AGREGAR, AGREGAR_LOTE, BUSCAR, ACTUALIZAR, LISTAR, LISTAR_FLUJO,
+            ELIMINAR, INVALIDAR_NRC, PROMEDIO, ESTADISTICAS_NRC, RANKING, STATS}
 
 # ---------------- Inicialización ---------------- #
+def configurar(directorio=None, puerto=None, puerto_nrc=None, hilos=None, cola=None, reuseport=False,
+               durabilidad=None, degradado=None, almacenamiento=None, particiones=None,
+               cache_respuestas=None):
+    """Cambia la carpeta de datos, los puertos, el pool, la durabilidad, el
+    modo degradado, el almacenamiento (y sus particiones) y el tamaño de la
+    caché de respuestas (MB, 0 la apaga) antes de arrancar.
+
+    Con `reuseport` el proceso comparte el puerto con otros procesos iguales y
+    los CSV se coordinan con flock (ver Almacen); las cachés de NRC y de
+    respuestas quedan apagadas porque no se enterarían de los cambios.
+    """
+    global ARCHIVO_ESTUDIANTES, ARCHIVO_CALIFICACIONES, ALMACEN, PORT, NRC_SERVER_PORT, POOL_NRC
+    global HILOS_TRABAJADORES, MAX_COLA_CONEXIONES, REUSEPORT, DURABILIDAD
+    global ARCHIVO_PENDIENTES, PENDIENTES, MODO_DEGRADADO, ARCHIVO_BASE_DATOS, ALMACENAMIENTO
+    global DIRECTORIO_PARTICIONES, PARTICIONES, CACHE_RESPUESTAS, CACHE_RESPUESTAS_MB, CACHE_NRC
+    REUSEPORT = reuseport
+    CACHE_NRC = crear_cache_nrc(compartido=reuseport)
+    if cache_respuestas is not None:
+        CACHE_RESPUESTAS_MB = cache_respuestas
+    if almacenamiento:
+        ALMACENAMIENTO = almacenamiento
+    if particiones:
+        PARTICIONES = particiones
+    if degradado is not None:
+        MODO_DEGRADADO = degradado
+    if durabilidad:
+        DURABILIDAD = durabilidad
+    if hilos:
+        HILOS_TRABAJADORES = hilos
+    if cola:
+        MAX_COLA_CONEXIONES = cola
+    if directorio:
+        ARCHIVO_ESTUDIANTES = os.path.join(directorio, 'estudiantes.csv')
+        ARCHIVO_CALIFICACIONES = os.path.join(directorio, 'calificaciones.csv')
+        ARCHIVO_PENDIENTES = os.path.join(directorio, 'nrc_pendientes.csv')
+        ARCHIVO_BASE_DATOS = os.path.join(directorio, 'calificaciones.db')
+        DIRECTORIO_PARTICIONES = os.path.join(directorio, 'particiones')
+    nueva_cache = (directorio or reuseport or durabilidad or almacenamiento or particiones
+                   or cache_respuestas is not None)
+    if nueva_cache and CACHE_RESPUESTAS is not None:
+        # La caché anterior deja de recibir avisos (y de quedar referenciada)
+        ALMACEN.dejar_de_avisar(CACHE_RESPUESTAS.invalidar)
+    if directorio or reuseport or durabilidad or almacenamiento or particiones:
+        ALMACEN = crear_almacen(compartido=reuseport)
+    if nueva_cache:
+        CACHE_RESPUESTAS = crear_cache_respuestas(ALMACEN, compartido=reuseport)
+        PENDIENTES = PendientesNRC(ARCHIVO_PENDIENTES, compartido=reuseport)
+    if puerto:
+        PORT = puerto
+    if puerto_nrc:
+        NRC_SERVER_PORT = puerto_nrc
+        POOL_NRC = PoolConexiones(NRC_SERVER_HOST, NRC_SERVER_PORT, NRC_POOL_TAMANO, NRC_TIMEOUT)
+
 def inicializar_csvs():
+    if ALMACENAMIENTO == 'sqlite':
+        ALMACEN.cargar()
+        estudiantes, calificaciones = ALMACEN.contar()
+        print(f"Datos en {ARCHIVO_BASE_DATOS}: {estudiantes} estudiantes, {calificaciones} calificaciones")
+        return
+    if ALMACENAMIENTO == 'particionado':
+        ALMACEN.cargar()
+        estudiantes, calificaciones = ALMACEN.contar()
+        print(f"Datos en {DIRECTORIO_PARTICIONES} ({PARTICIONES} particiones): "
+              f"{estudiantes} estudiantes, {calificaciones} calificaciones")
+        if not estudiantes and os.path.exists(ARCHIVO_ESTUDIANTES):
+            print("Las particiones están vacías; para usar los CSV actuales: migrar.py particionar")
+        return
+
     if not os.path.exists(ARCHIVO_ESTUDIANTES):
-        with open(ARCHIVO_ESTUDIANTES, 'w', newline='') as f:
+        with open(ARCHIVO_ESTUDIANTES, 'w', newline='', encoding=CODIFICACION) as f:
             writer = csv.writer(f)
             writer.writerow(['ID_Estudiante', 'Nombre'])
         print("Archivo estudiantes.csv creado")
 
     if not os.path.exists(ARCHIVO_CALIFICACIONES):
-        with open(ARCHIVO_CALIFICACIONES, 'w', newline='') as f:
+        with open(ARCHIVO_CALIFICACIONES, 'w', newline='', encoding=CODIFICACION) as f:
             writer = csv.writer(f)
             writer.writerow(['ID_Estudiante', 'Materia', 'Calificación'])
         print("Archivo calificaciones.csv creado")
 
+    ALMACEN.cargar()
+    estudiantes, calificaciones = ALMACEN.contar()
+    print(f"Datos cargados: {estudiantes} estudiantes, {calificaciones} calificaciones")
+
 # ---------------- Funciones NRC ---------------- #
+def _consultar_nrc_directo(comando):
+    """Abre una conexión nueva para una sola consulta (protocolo antiguo)."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.settimeout(NRC_TIMEOUT)
+        s.connect((NRC_SERVER_HOST, NRC_SERVER_PORT))
+        s.sendall(comando.encode('utf-8'))
+        return s.recv(4096).decode('utf-8')
+
 def consultar_nrc(nrc):
-    """Consulta al servidor de NRCs si el NRC existe."""
+    """Consulta si el NRC existe, usando la caché antes que el servidor de NRCs.
+
+    Si otro hilo ya está consultando el mismo NRC se espera su respuesta en
+    vez de hacer una consulta más.
+    """
+    inicio = time.perf_counter()
+    clave = nrc.strip().upper()
+    res = CACHE_NRC.obtener(clave)
+    if res is not None:
+        METRICAS.observar('espera_nrc', time.perf_counter() - inicio, origen='cache')
+        return res
+    with _EN_VUELO_LOCK:
+        consulta = _EN_VUELO.get(clave)
+        propia = consulta is None
+        if propia:
+            consulta = _EN_VUELO[clave] = Future()
+    if not propia:
+        res = consulta.result()
+        METRICAS.observar('espera_nrc', time.perf_counter() - inicio, origen='en_vuelo')
+        return res
+    try:
+        res = _consultar_nrc_remoto(clave)
+        CACHE_NRC.guardar(clave, res)
+        consulta.set_result(res)
+        METRICAS.observar('espera_nrc', time.perf_counter() - inicio, origen='servidor')
+        return res
+    except BaseException as e:
+        consulta.set_exception(e)
+        raise
+    finally:
+        with _EN_VUELO_LOCK:
+            del _EN_VUELO[clave]
+
+def _consultar_nrc_remoto(nrc):
+    return _enviar_a_nrc(f"BUSCAR_NRC|{nrc}")
+
+def consultar_nrcs(nrcs):
+    """Como consultar_nrc para varios NRCs; los que no están en caché se
+    resuelven juntos con un solo BUSCAR_NRCS. Devuelve {NRC: respuesta}."""
+    inicio = time.perf_counter()
+    resultados = {}
+    faltantes = []
+    for nrc in {n.strip().upper() for n in nrcs}:
+        res = CACHE_NRC.obtener(nrc)
+        if res is None:
+            faltantes.append(nrc)
+        else:
+            resultados[nrc] = res
+    if faltantes:
+        res = _enviar_a_nrc(f"BUSCAR_NRCS|{','.join(faltantes)}")
+        for nrc in faltantes:
+            if res.get("status") != "ok":
+                resultados[nrc] = res
+                continue
+            if nrc in res["data"]:
+                resultados[nrc] = {"status": "ok", "data": res["data"][nrc]}
+            else:
+                resultados[nrc] = {"status": "not_found", "mensaje": "NRC no encontrado"}
+            CACHE_NRC.guardar(nrc, resultados[nrc])
+    METRICAS.observar('espera_nrc', time.perf_counter() - inicio,
+                      origen='servidor' if faltantes else 'cache')
+    return resultados
+
+def _sin_servicio(mensaje):
+    """Error al hablar con el servidor NRC: el NRC quedó sin verificar."""
+    return {"status": "error", "mensaje": mensaje, "sin_servicio": True}
+
+def _enviar_a_nrc(comando):
+    """Envía un comando al servidor NRC pasando por el cortacircuitos."""
+    if not CIRCUITO_NRC.permitir():
+        return _sin_servicio("Servidor NRC no disponible (circuito abierto)")
     try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.settimeout(5)
-            s.connect((NRC_SERVER_HOST, NRC_SERVER_PORT))
-            comando = f"BUSCAR_NRC|{nrc.strip().upper()}"
-            s.sendall(comando.encode('utf-8'))
-            resp = s.recv(4096).decode('utf-8')
-            print(f"[DEBUG] Respuesta NRC: {resp}")  # Log de depuración
-            return json.loads(resp)
+        if USAR_POOL_NRC:
+            resp = POOL_NRC.consultar(comando.encode('utf-8')).decode('utf-8')
+        else:
+            resp = _consultar_nrc_directo(comando)
+        LOG.debug("Respuesta NRC", extra=registro.campos(comando=comando, respuesta=resp))
+        res = json.loads(resp)
     except socket.timeout:
-        return {"status": "error", "mensaje": "Tiempo de espera agotado al contactar servidor NRC"}
+        res = _sin_servicio("Tiempo de espera agotado al contactar servidor NRC")
     except ConnectionRefusedError:
-        return {"status": "error", "mensaje": "Servidor NRC no disponible (conexión rechazada)"}
+        res = _sin_servicio("Servidor NRC no disponible (conexión rechazada)")
     except json.JSONDecodeError as e:
-        return {"status": "error", "mensaje": f"Respuesta inválida del servidor NRC: {e}"}
+        res = _sin_servicio(f"Respuesta inválida del servidor NRC: {e}")
     except Exception as e:
-        return {"status": "error", "mensaje": f"Error consultando NRC: {e}"}
+        res = _sin_servicio(f"Error consultando NRC: {e}")
+    if res.get("sin_servicio"):
+        CIRCUITO_NRC.fallo()
+    else:
+        CIRCUITO_NRC.exito()
+    return res
+
+def invalidar_cache_nrc(nrc=None):
+    """Llamado por nrcs_server.py cuando cambia nrcs.csv."""
+    CACHE_NRC.invalidar(nrc.strip().upper() if nrc else None)
+    return {"status": "ok", "mensaje": "Caché de NRCs invalidada"}
+
+# ---------------- Modo degradado ---------------- #
+# Con MODO_DEGRADADO, si el servidor NRC no responde (o el circuito está
+# abierto) la calificación se acepta y se anota en PENDIENTES. Un hilo
+# vuelve a consultar esos NRCs cada INTERVALO_VERIFICACION segundos:
+# confirma las de NRCs existentes y elimina las de NRCs inexistentes.
+def _aceptar_sin_verificar(res_nrc):
+    return MODO_DEGRADADO and bool(res_nrc.get("sin_servicio"))
+
+def verificar_pendientes():
+    filas = PENDIENTES.filas()
+    if not filas:
+        return
+    respuestas = consultar_nrcs({materia for _, materia, _ in filas})
+    validos = {n for n, r in respuestas.items() if r.get("status") == "ok"}
+    invalidos = {n for n, r in respuestas.items() if r.get("status") == "not_found"}
+    if invalidos:
+        eliminadas = ALMACEN.eliminar_pares((id_est, materia) for id_est, materia, _ in filas
+                                            if materia in invalidos)
+        LOG.info("Calificaciones con NRC inexistente eliminadas",
+                 extra=registro.campos(nrcs=','.join(sorted(invalidos)), eliminadas=eliminadas))
+    resueltas = [f for f in filas if f[1] in validos or f[1] in invalidos]
+    if resueltas:
+        PENDIENTES.resolver(resueltas)
+
+def verificar_periodicamente():
+    while True:
+        time.sleep(INTERVALO_VERIFICACION)
+        try:
+            verificar_pendientes()
+        except Exception as e:
+            LOG.error("Error verificando NRCs pendientes", extra=registro.campos(error=e))
 
 # ---------------- Funciones Estudiantes ---------------- #
 def agregar_estudiante(id_est, nombre):
-    with CSV_LOCK:
-        if os.path.exists(ARCHIVO_ESTUDIANTES):
-            with open(ARCHIVO_ESTUDIANTES, 'r', newline='') as f:
-                for row in csv.DictReader(f):
-                    if row['ID_Estudiante'] == id_est:
-                        return {"status": "error", "mensaje": "Estudiante ya registrado"}
-        with open(ARCHIVO_ESTUDIANTES, 'a', newline='') as f:
-            csv.writer(f).writerow([id_est, nombre])
+    if not ALMACEN.agregar_estudiante(id_est, nombre):
+        return {"status": "error", "mensaje": "Estudiante ya registrado"}
     return {"status": "ok", "mensaje": f"Estudiante {nombre} registrado correctamente"}
 
 def estudiante_existe(id_est):
-    if not os.path.exists(ARCHIVO_ESTUDIANTES):
-        return False
-    with CSV_LOCK:
-        with open(ARCHIVO_ESTUDIANTES, 'r', newline='') as f:
-            for row in csv.DictReader(f):
-                if row['ID_Estudiante'] == id_est:
-                    return True
-    return False
+    return ALMACEN.estudiante_existe(id_est)
 
 # ---------------- Calificaciones ---------------- #
 def agregar_calificacion(id_est, materia, calif):
+    # Lo que se valida en memoria va primero: un AGREGAR inválido no espera al servidor NRC
     if not estudiante_existe(id_est):
         return {"status": "error", "mensaje": "Estudiante no registrado"}
 
+    calif_float, error = validar_calificacion(calif)
+    if error:
+        return error
+
     res_nrc = consultar_nrc(materia)
-    if res_nrc.get("status") != "ok":
+    return _guardar_calificacion(id_est, materia.strip().upper(), calif_float, res_nrc)
+
+def _guardar_calificacion(id_est, materia, calif_float, res_nrc):
+    """Guarda una calificación ya validada según la respuesta del servidor NRC."""
+    pendiente = res_nrc.get("status") != "ok"
+    if pendiente and not _aceptar_sin_verificar(res_nrc):
         return {"status": "error", "mensaje": res_nrc.get("mensaje", "NRC no válido")}
+    if pendiente:
+        PENDIENTES.agregar(id_est, materia, calif_float)
+    ALMACEN.agregar_calificacion(id_est, materia, calif_float)
+    if pendiente:
+        return {"status": "ok", "pendiente": True,
+                "mensaje": f"Calificación agregada para {id_est} (NRC pendiente de verificación)"}
+    return {"status": "ok", "mensaje": f"Calificación agregada para {id_est}"}
 
+def validar_calificacion(calif):
+    """Devuelve (valor, None) si es válida o (None, respuesta de error)."""
     try:
         calif_float = float(calif)
         if not (0 <= calif_float <= 20):
-            return {"status": "error", "mensaje": "Calificación fuera de rango (0–20)"}
+            return None, {"status": "error", "mensaje": "Calificación fuera de rango (0–20)"}
     except ValueError:
-        return {"status": "error", "mensaje": "Calificación no numérica"}
+        return None, {"status": "error", "mensaje": "Calificación no numérica"}
+    return calif_float, None
 
-    with CSV_LOCK:
-        with open(ARCHIVO_CALIFICACIONES, 'a', newline='') as f:
-            csv.writer(f).writerow([id_est, materia.upper(), calif_float])
+def agregar_lote(lote):
+    """Agrega varias calificaciones enviadas como JSON: [[id, materia, calif], ...].
 
-    return {"status": "ok", "mensaje": f"Calificación agregada para {id_est}"}
+    Valida a todos los estudiantes en una sola pasada por el índice, resuelve
+    los NRCs distintos con una sola consulta y agrega las filas válidas con
+    una sola escritura. Devuelve un resultado por fila, en el mismo orden.
+    """
+    try:
+        filas = json.loads(lote)
+        if not isinstance(filas, list) or not all(isinstance(f, list) and len(f) == 3 for f in filas):
+            raise ValueError
+    except ValueError:
+        return {"status": "error", "mensaje": "Lote inválido: se espera [[id, materia, calificación], ...]"}
+
+    filas = [(str(id_est), str(materia), str(calif)) for id_est, materia, calif in filas]
+    existentes = ALMACEN.existentes({f[0] for f in filas})
+
+    # Mismo orden que AGREGAR: estudiante y calificación en memoria, y solo
+    # las filas que pasan eso consultan su NRC
+    revisadas = []
+    for id_est, materia, calif in filas:
+        if id_est not in existentes:
+            revisadas.append({"status": "error", "mensaje": "Estudiante no registrado"})
+            continue
+        calif_float, error = validar_calificacion(calif)
+        revisadas.append(error or (id_est, materia.strip().upper(), calif_float))
+    nrcs = consultar_nrcs({r[1] for r in revisadas if isinstance(r, tuple)})
+
+    resultados = []
+    validas = []
+    for revisada in revisadas:
+        if isinstance(revisada, dict):
+            resultados.append(revisada)
+            continue
+        id_est, materia, calif_float = revisada
+        res_nrc = nrcs[materia]
+        pendiente = res_nrc.get("status") != "ok"
+        if pendiente and not _aceptar_sin_verificar(res_nrc):
+            resultados.append({"status": "error", "mensaje": res_nrc.get("mensaje", "NRC no válido")})
+            continue
+        validas.append((id_est, materia, calif_float))
+        if pendiente:
+            PENDIENTES.agregar(id_est, materia, calif_float)
+            resultados.append({"status": "ok", "pendiente": True,
+                               "mensaje": f"Calificación agregada para {id_est} (NRC pendiente de verificación)"})
+        else:
+            resultados.append({"status": "ok", "mensaje": f"Calificación agregada para {id_est}"})
+
+    if validas:
+        ALMACEN.agregar_calificaciones(validas)
+    return {"status": "ok", "agregadas": len(validas), "resultados": resultados}
 
 def buscar_por_id(id_est):
     if not estudiante_existe(id_est):
         return {"status": "error", "mensaje": "Estudiante no registrado"}
-    with CSV_LOCK:
-        if not os.path.exists(ARCHIVO_CALIFICACIONES):
-            return {"status": "ok", "data": []}
-        with open(ARCHIVO_CALIFICACIONES, 'r', newline='') as f:
-            data = [r for r in csv.DictReader(f) if r['ID_Estudiante'] == id_est]
-    return {"status": "ok", "data": data}
+    return {"status": "ok", "data": ALMACEN.calificaciones_de(id_est)}
+
+def actualizar_calificacion(id_est, materia, calif):
+    if not estudiante_existe(id_est):
+        return {"status": "error", "mensaje": "Estudiante no registrado"}
+    calif_float, error = validar_calificacion(calif)
+    if error:
+        return error
+    if not ALMACEN.actualizar_calificacion(id_est, materia.strip().upper(), calif_float):
+        return {"status": "not_found", "mensaje": "No existe calificación para esa materia"}
+    return {"status": "ok", "mensaje": "Calificación actualizada"}
+
+def eliminar_por_id(id_est):
+    if not ALMACEN.eliminar_calificaciones(id_est):
+        return {"status": "not_found", "mensaje": "El estudiante no tiene registros"}
+    return {"status": "ok", "mensaje": f"Registros eliminados para ID {id_est}"}
 
 def listar_todas():
-    with CSV_LOCK:
-        if not os.path.exists(ARCHIVO_CALIFICACIONES):
-            return {"status": "ok", "data": []}
-        with open(ARCHIVO_CALIFICACIONES, 'r', newline='') as f:
-            return {"status": "ok", "data": list(csv.DictReader(f))}
+    return {"status": "ok", "data": ALMACEN.todas()}
+
+def listar_pagina(desde, limite):
+    try:
+        desde, limite = int(desde), int(limite)
+        if desde < 0 or limite <= 0:
+            raise ValueError
+    except ValueError:
+        return {"status": "error", "mensaje": "Paginación inválida (desde >= 0, límite > 0)"}
+    data, total = ALMACEN.pagina(desde, limite)
+    return {"status": "ok", "data": data, "desde": desde,
+            "hay_mas": desde + len(data) < total, "total": total}
+
+def listar_flujo():
+    """Genera las calificaciones como trozos NDJSON de FILAS_POR_TROZO filas."""
+    trozo = []
+    for row in ALMACEN.iterar(FILAS_POR_TROZO):
+        trozo.append(json.dumps(row).encode('utf-8'))
+        if len(trozo) == FILAS_POR_TROZO:
+            yield b'\n'.join(trozo) + b'\n'
+            trozo = []
+    if trozo:
+        yield b'\n'.join(trozo) + b'\n'
+
+# ---------------- Agregados ---------------- #
+# Se responden con los acumulados que Almacen mantiene en cada cambio, sin
+# recorrer las calificaciones.
+def promedio_estudiante(id_est):
+    if not estudiante_existe(id_est):
+        return {"status": "error", "mensaje": "Estudiante no registrado"}
+    data = ALMACEN.promedio_de(id_est)
+    if data is None:
+        return {"status": "not_found", "mensaje": "Sin calificaciones registradas"}
+    return {"status": "ok", "data": dict(data, ID_Estudiante=id_est)}
+
+def estadisticas_nrc(nrc):
+    nrc = nrc.strip().upper()
+    data = ALMACEN.estadisticas_de(nrc)
+    if data is None:
+        return {"status": "not_found", "mensaje": "Sin calificaciones para ese NRC"}
+    return {"status": "ok", "data": dict(data, NRC=nrc)}
+
+def ranking_nrc(nrc, k):
+    try:
+        k = int(k)
+        if not 0 < k <= MAX_RANKING:
+            raise ValueError
+    except ValueError:
+        return {"status": "error", "mensaje": f"k debe estar entre 1 y {MAX_RANKING}"}
+    data = ALMACEN.ranking_de(nrc.strip().upper(), k)
+    if not data:
+        return {"status": "not_found", "mensaje": "Sin calificaciones para ese NRC"}
+    return {"status": "ok", "data": data}
+
+# ---------------- Métricas ---------------- #
+# Cada comando suma su latencia al histograma de su operación y una
+# respuesta al contador (operación, status). Los candados de Almacen miden
+# cuánto se espera para entrar y consultar_nrc cuánto se espera al NRC.
+def _medir_comando(op, res, segundos):
+    op = op if op in COMANDOS else 'INVALIDO'
+    if isinstance(res, dict):
+        estado = res.get("status", "?")
+    else:
+        estado = "ok" if isinstance(res, bytes) else "flujo"   # de la caché solo salen respuestas ok
+    METRICAS.observar('comando', segundos, op=op)
+    METRICAS.contar('respuestas', op=op, status=estado)
+
+def _esperas_candados():
+    return {('espera_candado', (('archivo', archivo), ('modo', modo))): h
+            for archivo, esperas in ALMACEN.esperas().items()
+            for modo, h in esperas.items()}
+
+def _componentes():
+    componentes = {"cache_nrc": CACHE_NRC.estadisticas(), "circuito_nrc": CIRCUITO_NRC.estadisticas()}
+    if CACHE_RESPUESTAS is not None:
+        componentes["cache_respuestas"] = CACHE_RESPUESTAS.estadisticas()
+    if POOL_TRABAJADORES is not None:
+        componentes["pool_trabajadores"] = POOL_TRABAJADORES.metricas()
+    escritura = ALMACEN.escritura_agrupada()
+    if escritura:
+        componentes["escritura_agrupada"] = escritura
+    return componentes
+
+def estadisticas():
+    """Respuesta de STATS: latencias por comando, esperas y estado de los componentes."""
+    histogramas, contadores = METRICAS.capturar()
+    histogramas.update(_esperas_candados())
+    data = {}
+    for (nombre, etiquetas), h in sorted(histogramas.items()):
+        data.setdefault(nombre, {})['/'.join(v for _, v in etiquetas)] = h.resumen()
+    respuestas = data['respuestas'] = {}
+    for (_, etiquetas), n in contadores.items():
+        op, estado = (v for _, v in etiquetas)
+        respuestas.setdefault(op, {})[estado] = n
+    data.update(_componentes())
+    return {"status": "ok", "data": data}
+
+# Valores de _componentes() que solo crecen: se exportan como counter
+# (con sufijo _total) para que rate() e increase() funcionen; el resto
+# (profundidad de cola, entradas, esperas) son gauge
+CONTADORES_COMPONENTES = {'atendidas', 'rechazadas', 'aciertos', 'fallos', 'invalidaciones',
+                          'descartadas', 'aperturas', 'lotes', 'filas'}
+
+def texto_prometheus():
+    histogramas, contadores = METRICAS.capturar()
+    histogramas.update(_esperas_candados())
+    medidores = []
+    for componente, valores in _componentes().items():
+        for clave, valor in valores.items():
+            if not isinstance(valor, (int, float)):
+                continue
+            if clave in CONTADORES_COMPONENTES:
+                contadores[(f"{componente}_{clave}", ())] = valor
+            else:
+                medidores.append((f"{componente}_{clave}", {}, valor))
+    medidores.append(("circuito_nrc_abierto", {}, int(CIRCUITO_NRC.estado() != 'cerrado')))
+    return prometheus('calificaciones', histogramas, contadores, medidores)
+
+class ManejadorMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        datos = texto_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def log_message(self, formato, *args):
+        LOG.debug("Métricas: " + formato, *args)
+
+def servir_metricas(puerto):
+    """Expone /metrics en formato Prometheus desde un hilo aparte."""
+    servidor = ThreadingHTTPServer((HOST, puerto), ManejadorMetricas)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name='metricas', daemon=True).start()
+    print(f"Métricas Prometheus en http://{HOST}:{puerto}/metrics")
+    return servidor
 
 # ---------------- Servidor con hilos ---------------- #
 def procesar_comando(cmd):
+    """Ejecuta un comando, mide cuánto tardó y devuelve la respuesta.
+
+    Los clientes con el protocolo con marco pueden enviar muchos comandos
+    seguidos por la misma conexión sin esperar cada respuesta (pipelining):
+    se procesan en orden y las respuestas salen en el mismo orden.
+    """
+    inicio = time.perf_counter()
+    res = _ejecutar_comando(cmd)
+    _medir_comando(cmd.strip().split('|', 1)[0], res, time.perf_counter() - inicio)
+    return res
+
+def _ejecutar_comando(cmd):
     p = cmd.strip().split('|')
     op = p[0]
-    if op == AGREGAR_ESTUDIANTE and len(p) == 3:
+    if op == AGREGAR_LOTE and len(p) >= 2:
+        return agregar_lote(cmd.strip().split('|', 1)[1])
+    elif op == AGREGAR_ESTUDIANTE and len(p) == 3:
         return agregar_estudiante(p[1], p[2])
     elif op == AGREGAR and len(p) == 4:
         return agregar_calificacion(p[1], p[2], p[3])
     elif op == BUSCAR and len(p) == 2:
-        return buscar_por_id(p[1])
+        return _con_cache((BUSCAR, p[1]), lambda: buscar_por_id(p[1]), p[1])
+    elif op == ACTUALIZAR and len(p) == 4:
+        return actualizar_calificacion(p[1], p[2], p[3])
+    elif op == ELIMINAR and len(p) == 2:
+        return eliminar_por_id(p[1])
+    elif op == PROMEDIO and len(p) == 2:
+        return promedio_estudiante(p[1])
+    elif op == ESTADISTICAS_NRC and len(p) == 2:
+        return estadisticas_nrc(p[1])
+    elif op == RANKING and len(p) == 3:
+        return ranking_nrc(p[1], p[2])
+    elif op == LISTAR and len(p) == 3:
+        return _con_cache((LISTAR, p[1], p[2]), lambda: listar_pagina(p[1], p[2]))
     elif op == LISTAR:
-        return listar_todas()
+        return _con_cache((LISTAR,), listar_todas)
+    elif op == LISTAR_FLUJO:
+        return listar_flujo()
+    elif op == INVALIDAR_NRC and len(p) <= 2:
+        return invalidar_cache_nrc(p[1] if len(p) == 2 else None)
+    elif op == STATS:
+        return estadisticas()
     else:
         return {"status": "error", "mensaje": "Comando inválido"}
 
+def _con_cache(clave, calcular, id_est=None):
+    """Respuesta de CACHE_RESPUESTAS (bytes) o la de calcular(), que se guarda si es ok.
+
+    `id_est` es el estudiante del que depende la respuesta (None: de todos).
+    """
+    if CACHE_RESPUESTAS is None:
+        return calcular()
+    datos = CACHE_RESPUESTAS.obtener(clave)
+    if datos is not None:
+        return datos
+    version = CACHE_RESPUESTAS.version()
+    res = calcular()
+    if res.get("status") != "ok":
+        return res
+    datos = json.dumps(res).encode('utf-8')
+    CACHE_RESPUESTAS.guardar(clave, datos, version, id_est)
+    return datos
+
+def responder(sock, res, enmarcado):
+    """Envía un resultado de procesar_comando: un dict, bytes ya serializados o
+    un generador de trozos."""
+    if isinstance(res, (dict, bytes)):
+        datos = json.dumps(res).encode('utf-8') if isinstance(res, dict) else res
+        if enmarcado:
+            enviar_mensaje(sock, datos)
+        else:
+            sock.sendall(datos)
+    else:
+        enviar_flujo(sock, res, enmarcado)
+
 def manejar_cliente(sock, addr):
+    """Atiende una conexión.
+
+    Con el protocolo con marco (ver protocolo.py) se responden comandos hasta
+    que el cliente cierre; con el protocolo antiguo, un solo comando.
+    """
     sock.settimeout(CLIENT_TIMEOUT)
-    hilo = threading.current_thread().name
     try:
-        data = sock.recv(MAX_RECV).decode('utf-8')
-        if not data:
-            return
-        print(f"[{hilo}] Comando recibido: {data}")
-        res = procesar_comando(data)
-        sock.sendall(json.dumps(res).encode('utf-8'))
+        enmarcado = es_enmarcado(sock)
+        if enmarcado:
+            while True:
+                data = recibir_mensaje(sock)
+                if data is None:
+                    break
+                data = data.decode('utf-8')
+                LOG.debug("Comando recibido", extra=registro.campos(cliente=addr, comando=data))
+                responder(sock, procesar_comando(data), True)
+        elif enmarcado is not None:
+            data = sock.recv(MAX_RECV).decode('utf-8')
+            LOG.debug("Comando recibido", extra=registro.campos(cliente=addr, comando=data))
+            responder(sock, procesar_comando(data), False)
+    except socket.timeout:
+        pass
     except Exception as e:
-        print(f"[{hilo}] Error: {e}")
+        LOG.error("Error atendiendo cliente", extra=registro.campos(cliente=addr, error=e))
     finally:
         sock.close()
-        print(f"[{hilo}] Conexión con {addr} cerrada")
+        LOG.debug("Conexión cerrada", extra=registro.campos(cliente=addr))
 
-def main():
-    inicializar_csvs()
+RESPUESTA_OCUPADO = json.dumps({"status": "busy", "mensaje": "Servidor ocupado, intente más tarde"}).encode('utf-8')
+
+def rechazar_cliente(sock, addr=None):
+    """Responde 'busy' sin ocupar un hilo trabajador.
+
+    Espera hasta ESPERA_RECHAZO el primer byte para saber qué protocolo usa el
+    cliente; si no llega a tiempo responde con marco, que es lo que usan
+    cliente.py y los clientes actuales.
+    """
+    try:
+        sock.settimeout(ESPERA_RECHAZO)
+        try:
+            data = sock.recv(MAX_RECV)  # descartar el comando para que close() no envíe RST
+        except socket.timeout:
+            data = b''
+        sock.settimeout(CLIENT_TIMEOUT)
+        if data and not data.startswith(b'\x00'):
+            sock.sendall(RESPUESTA_OCUPADO)
+        else:
+            enviar_mensaje(sock, RESPUESTA_OCUPADO)
+    except OSError:
+        pass
+    finally:
+        sock.close()
+
+def servir_con_hilos():
+    global POOL_TRABAJADORES
+    POOL_TRABAJADORES = PoolTrabajadores(manejar_cliente, HILOS_TRABAJADORES, MAX_COLA_CONEXIONES)
+    # Los rechazos esperan el primer byte en sus propios hilos, no en el bucle de accept
+    rechazos = PoolTrabajadores(rechazar_cliente, HILOS_RECHAZO, MAX_COLA_CONEXIONES, nombre='rechazo')
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if REUSEPORT:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
     s.bind((HOST, PORT))
     s.listen(10)
-    print(f"Servidor concurrente activo en {HOST}:{PORT}")
+    print(f"Servidor concurrente activo en {HOST}:{PORT} "
+          f"({HILOS_TRABAJADORES} hilos, cola de {MAX_COLA_CONEXIONES})")
     try:
         while True:
             cli, addr = s.accept()
-            threading.Thread(target=manejar_cliente, args=(cli, addr), daemon=True).start()
+            if not POOL_TRABAJADORES.enviar(cli, addr) and not rechazos.enviar(cli, addr):
+                cli.close()
+    finally:
+        s.close()
+        print(f"Pool de trabajadores: {POOL_TRABAJADORES.metricas()}")
+
+# ---------------- Servidor asyncio ---------------- #
+# Alternativa al hilo por conexión: un solo bucle de eventos atiende todas
+# las conexiones. La consulta de NRC usa conexiones asyncio propias y las
+# operaciones que tocan archivos se ejecutan en un pool de hilos.
+
+class PoolNRCAsync:
+    """Versión asyncio de PoolConexiones."""
+
+    def __init__(self, host, port, tamano=8, timeout=5):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._libres = []
+        self._semaforo = asyncio.Semaphore(tamano)
+
+    async def consultar(self, datos):
+        async with self._semaforo:
+            while True:
+                reutilizada = bool(self._libres)
+                if reutilizada:
+                    reader, writer = self._libres.pop()
+                else:
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection(self.host, self.port), self.timeout)
+                try:
+                    escribir_mensaje(writer, datos)
+                    await writer.drain()
+                    resp = await asyncio.wait_for(leer_mensaje(reader), self.timeout)
+                    if resp is None:
+                        raise ConnectionResetError("El servidor NRC cerró la conexión")
+                except ConnectionError:
+                    writer.close()
+                    if reutilizada:
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                self._libres.append((reader, writer))
+                return resp
+
+    def cerrar(self):
+        while self._libres:
+            self._libres.pop()[1].close()
+
+POOL_NRC_ASYNC = None
+_EN_VUELO_ASYNC = {}   # NRC -> asyncio.Future de la consulta en curso
+
+async def _consultar_nrc_remoto_async(clave):
+    if not CIRCUITO_NRC.permitir():
+        return _sin_servicio("Servidor NRC no disponible (circuito abierto)")
+    try:
+        resp = await POOL_NRC_ASYNC.consultar(f"BUSCAR_NRC|{clave}".encode('utf-8'))
+        res = json.loads(resp)
+    except asyncio.TimeoutError:
+        res = _sin_servicio("Tiempo de espera agotado al contactar servidor NRC")
+    except ConnectionRefusedError:
+        res = _sin_servicio("Servidor NRC no disponible (conexión rechazada)")
+    except json.JSONDecodeError as e:
+        res = _sin_servicio(f"Respuesta inválida del servidor NRC: {e}")
+    except Exception as e:
+        res = _sin_servicio(f"Error consultando NRC: {e}")
+    if res.get("sin_servicio"):
+        CIRCUITO_NRC.fallo()
+    else:
+        CIRCUITO_NRC.exito()
+    return res
+
+async def consultar_nrc_async(nrc):
+    inicio = time.perf_counter()
+    clave = nrc.strip().upper()
+    res = CACHE_NRC.obtener(clave)
+    if res is not None:
+        METRICAS.observar('espera_nrc', time.perf_counter() - inicio, origen='cache')
+        return res
+    consulta = _EN_VUELO_ASYNC.get(clave)
+    if consulta is not None:
+        res = await asyncio.shield(consulta)
+        METRICAS.observar('espera_nrc', time.perf_counter() - inicio, origen='en_vuelo')
+        return res
+    consulta = _EN_VUELO_ASYNC[clave] = asyncio.get_running_loop().create_future()
+    try:
+        res = await _consultar_nrc_remoto_async(clave)
+        CACHE_NRC.guardar(clave, res)
+        consulta.set_result(res)
+        METRICAS.observar('espera_nrc', time.perf_counter() - inicio, origen='servidor')
+        return res
+    except BaseException:
+        consulta.cancel()   # p. ej. la conexión del cliente se canceló
+        raise
+    finally:
+        del _EN_VUELO_ASYNC[clave]
+
+async def agregar_calificacion_async(id_est, materia, calif):
+    if not estudiante_existe(id_est):
+        return {"status": "error", "mensaje": "Estudiante no registrado"}
+
+    calif_float, error = validar_calificacion(calif)
+    if error:
+        return error
+
+    res_nrc = await consultar_nrc_async(materia)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _guardar_calificacion, id_est, materia.strip().upper(),
+                                      calif_float, res_nrc)
+
+def _serializar(res):
+    return json.dumps(res).encode('utf-8') if isinstance(res, dict) else res
+
+async def procesar_comando_async(cmd):
+    """Mismo conjunto de comandos que procesar_comando, sin bloquear el bucle.
+
+    Devuelve la respuesta serializada o, para LISTAR_FLUJO, un generador de
+    trozos que se consume con responder_async.
+    """
+    p = cmd.strip().split('|')
+    loop = asyncio.get_running_loop()
+    if p[0] == AGREGAR and len(p) == 4:
+        inicio = time.perf_counter()
+        res = await agregar_calificacion_async(p[1], p[2], p[3])
+        _medir_comando(AGREGAR, res, time.perf_counter() - inicio)
+        return json.dumps(res).encode('utf-8')
+    return await loop.run_in_executor(None, lambda: _serializar(procesar_comando(cmd)))
+
+async def responder_async(writer, res, enmarcado):
+    """Escribe una respuesta; los trozos de un flujo se generan en el executor."""
+    escribir = (lambda d: escribir_mensaje(writer, d)) if enmarcado else writer.write
+    if isinstance(res, bytes):
+        escribir(res)
+    else:
+        loop = asyncio.get_running_loop()
+        escribir(CABECERA_FLUJO)
+        while (trozo := await loop.run_in_executor(None, next, res, None)) is not None:
+            escribir(trozo)
+            await writer.drain()
+        if enmarcado:
+            escribir(b'')
+    await writer.drain()
+
+async def manejar_cliente_async(reader, writer):
+    try:
+        primero = await asyncio.wait_for(reader.read(1), CLIENT_TIMEOUT)
+        if primero == b'\x00':
+            # Protocolo con marco: el byte leído es parte de la primera cabecera
+            resto = await asyncio.wait_for(reader.readexactly(3), CLIENT_TIMEOUT)
+            (longitud,) = CABECERA.unpack(primero + resto)
+            data = await asyncio.wait_for(reader.readexactly(longitud), CLIENT_TIMEOUT)
+            while data is not None:
+                await responder_async(writer, await procesar_comando_async(data.decode('utf-8')), True)
+                data = await asyncio.wait_for(leer_mensaje(reader), CLIENT_TIMEOUT)
+        elif primero:
+            data = primero + await asyncio.wait_for(reader.read(MAX_RECV), CLIENT_TIMEOUT)
+            await responder_async(writer, await procesar_comando_async(data.decode('utf-8')), False)
+    except asyncio.TimeoutError:
+        pass
+    except Exception as e:
+        LOG.error("Error atendiendo conexión asyncio", extra=registro.campos(error=e))
+    finally:
+        writer.close()
+
+async def servir_async():
+    global POOL_NRC_ASYNC
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(HILOS_EXECUTOR))
+    POOL_NRC_ASYNC = PoolNRCAsync(NRC_SERVER_HOST, NRC_SERVER_PORT, NRC_POOL_TAMANO, NRC_TIMEOUT)
+    servidor = await asyncio.start_server(manejar_cliente_async, HOST, PORT,
+                                          backlog=BACKLOG_ASYNC, reuse_address=True,
+                                          reuse_port=REUSEPORT or None)
+    print(f"Servidor asyncio activo en {HOST}:{PORT}")
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        POOL_NRC_ASYNC.cerrar()
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de calificaciones")
+    parser.add_argument('--modo', choices=['hilos', 'async'], default='hilos',
+                        help="un hilo por conexión (por defecto) o bucle asyncio")
+    parser.add_argument('--puerto', type=int, help=f"puerto de escucha (por defecto {PORT})")
+    parser.add_argument('--puerto-nrc', type=int, help=f"puerto del servidor de NRCs (por defecto {NRC_SERVER_PORT})")
+    parser.add_argument('--datos', help="carpeta con estudiantes.csv y calificaciones.csv")
+    parser.add_argument('--hilos', type=int, help=f"hilos trabajadores (por defecto {HILOS_TRABAJADORES})")
+    parser.add_argument('--cola', type=int, help=f"conexiones en espera antes de responder busy (por defecto {MAX_COLA_CONEXIONES})")
+    parser.add_argument('--durabilidad', choices=DURABILIDADES,
+                        help=f"cuándo se confirma un AGREGAR (por defecto {DURABILIDAD})")
+    parser.add_argument('--reuseport', action='store_true',
+                        help="compartir el puerto con otros procesos (lo usa lanzador.py)")
+    parser.add_argument('--almacenamiento', choices=ALMACENAMIENTOS,
+                        help=f"dónde se guardan los datos (por defecto {ALMACENAMIENTO}; ver migrar.py)")
+    parser.add_argument('--particiones', type=int,
+                        help=f"archivos en que se reparten los estudiantes con --almacenamiento particionado "
+                             f"(por defecto {PARTICIONES})")
+    parser.add_argument('--cache-respuestas', type=int, metavar='MB',
+                        help=f"caché de BUSCAR/LISTAR ya serializados (por defecto {CACHE_RESPUESTAS_MB} MB; 0 la apaga)")
+    parser.add_argument('--degradado', action='store_true',
+                        help="aceptar calificaciones con el servidor NRC caído y verificarlas después")
+    parser.add_argument('--log-nivel', choices=registro.NIVELES, default=NIVEL_LOG,
+                        help=f"mensajes que se muestran (por defecto {NIVEL_LOG}; DEBUG muestra cada comando)")
+    parser.add_argument('--log-formato', choices=registro.FORMATOS, default=FORMATO_LOG)
+    parser.add_argument('--log-muestreo', type=int, default=MUESTREO_LOG, metavar='N',
+                        help="escribir solo 1 de cada N mensajes DEBUG")
+    parser.add_argument('--log-sincrono', action='store_true',
+                        help="escribir desde el hilo que atiende (sin cola), como los print de antes")
+    parser.add_argument('--puerto-metricas', type=int, default=PUERTO_METRICAS,
+                        help="exponer métricas Prometheus en http://localhost:PUERTO/metrics")
+    args = parser.parse_args()
+
+    detener_log = registro.iniciar(LOG, args.log_nivel, args.log_formato, args.log_muestreo,
+                                   args.log_sincrono)
+    configurar(args.datos, args.puerto, args.puerto_nrc, args.hilos, args.cola, args.reuseport,
+               args.durabilidad, args.degradado or None, args.almacenamiento, args.particiones,
+               args.cache_respuestas)
+    inicializar_csvs()
+    threading.Thread(target=verificar_periodicamente, name='verificador', daemon=True).start()
+    if args.puerto_metricas:
+        servir_metricas(args.puerto_metricas)
+    try:
+        if args.modo == 'async':
+            asyncio.run(servir_async())
+        else:
+            servir_con_hilos()
     except KeyboardInterrupt:
         print("\nServidor detenido.")
     finally:
-        s.close()
+        ALMACEN.cerrar()
+        POOL_NRC.cerrar()
+        print(f"Caché NRC: {CACHE_NRC.estadisticas()}")
+        if CACHE_RESPUESTAS is not None:
+            print(f"Caché de respuestas: {CACHE_RESPUESTAS.estadisticas()}")
+        print(f"Circuito NRC: {CIRCUITO_NRC.estadisticas()}")
+        detener_log()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,202 @@
+"""Instantánea binaria por columnas de calificaciones.csv.
+
+La instantánea guarda las mismas filas que el CSV en un archivo que se abre
+con mmap y se consulta sin parsear texto:
+
+- tabla de IDs de estudiante (ordenada), tabla de materias/NRC y tabla de
+  calificaciones distintas (el texto tal como está en el CSV), cada una
+  como desplazamientos uint32 + bytes UTF-8;
+- columnas por fila en el orden del CSV: índice de estudiante (uint32),
+  índice de materia (uint16) e índice de calificación (uint32);
+- permutación de las filas agrupadas por estudiante y, por cada estudiante,
+  dónde empieza su grupo, para responder BUSCAR con una búsqueda binaria.
+
+La cabecera guarda el tamaño y mtime del CSV de origen: si el CSV cambia la
+instantánea deja de ser vigente y se regenera.
+"""
+import csv
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+MAGIA = b'CALIFv2\0'
+# magia, orden de bytes, tamaño CSV, mtime CSV, filas, estudiantes, materias, calificaciones
+CABECERA = struct.Struct('<8s8sQQQIII')
+SECCIONES = 8   # ids, materias, notas, estudiante, materia, nota, orden, grupos
+INDICE = struct.Struct(f'<{SECCIONES}Q')
+ORDEN_BYTES = sys.byteorder.encode().ljust(8, b'\0')
+MAX_MATERIAS = 0xFFFF
+FILAS_POR_BLOQUE = 4096
+
+
+def ruta_para(archivo_csv):
+    return archivo_csv + '.bin'
+
+
+def _firma(archivo_csv):
+    st = os.stat(archivo_csv)
+    return st.st_size, st.st_mtime_ns
+
+
+def _tabla(cadenas):
+    """Serializa una lista de str como desplazamientos uint32 + bytes."""
+    datos = [c.encode('utf-8') for c in cadenas]
+    desplazamientos = array('I', [0])
+    for d in datos:
+        desplazamientos.append(desplazamientos[-1] + len(d))
+    return desplazamientos.tobytes() + b''.join(datos)
+
+
+def generar(archivo_csv, destino=None):
+    """Construye la instantánea de `archivo_csv` y la escribe de forma atómica."""
+    destino = destino or ruta_para(archivo_csv)
+    tamano, mtime = _firma(archivo_csv)
+    ids, materias, notas = {}, {}, {}
+    col_est, col_mat, col_nota = array('I'), array('H'), array('I')
+    with open(archivo_csv, 'r', newline='', encoding='utf-8') as f:
+        lector = csv.reader(f)
+        next(lector, None)
+        for row in lector:
+            if len(row) < 3:
+                continue
+            col_est.append(ids.setdefault(row[0], len(ids)))
+            m = materias.setdefault(row[1], len(materias))
+            if m > MAX_MATERIAS:
+                raise ValueError("Demasiadas materias distintas para la instantánea")
+            col_mat.append(m)
+            col_nota.append(notas.setdefault(row[2], len(notas)))
+
+    # Los IDs se guardan ordenados para buscarlos sin construir un dict
+    ids_ordenados = sorted(ids, key=lambda i: i.encode('utf-8'))
+    nuevo_indice = array('I', bytes(4 * len(ids)))
+    for pos, id_est in enumerate(ids_ordenados):
+        nuevo_indice[ids[id_est]] = pos
+    col_est = array('I', (nuevo_indice[k] for k in col_est))
+
+    orden = array('I', sorted(range(len(col_est)), key=col_est.__getitem__))
+    grupos = array('I', bytes(4 * (len(ids) + 1)))
+    for k in col_est:
+        grupos[k + 1] += 1
+    for k in range(len(ids)):
+        grupos[k + 1] += grupos[k]
+
+    secciones = [_tabla(ids_ordenados), _tabla(list(materias)), _tabla(list(notas)), col_est.tobytes(),
+                 col_mat.tobytes(), col_nota.tobytes(), orden.tobytes(), grupos.tobytes()]
+    tmp = destino + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(CABECERA.pack(MAGIA, ORDEN_BYTES, tamano, mtime, len(col_est), len(ids), len(materias),
+                              len(notas)))
+        posiciones = []
+        pos = CABECERA.size + INDICE.size
+        for s in secciones:
+            pos += -pos % 8          # alinear cada sección a 8 bytes
+            posiciones.append(pos)
+            pos += len(s)
+        f.write(INDICE.pack(*posiciones))
+        for p, s in zip(posiciones, secciones):
+            f.write(b'\0' * (p - f.tell()))
+            f.write(s)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, destino)
+    return destino
+
+
+def vigente(archivo_csv, destino=None):
+    """Indica si existe una instantánea generada a partir del CSV actual."""
+    destino = destino or ruta_para(archivo_csv)
+    try:
+        with open(destino, 'rb') as f:
+            cab = f.read(CABECERA.size)
+        magia, orden, tamano, mtime, *_ = CABECERA.unpack(cab)
+    except (OSError, struct.error):
+        return False
+    return magia == MAGIA and orden == ORDEN_BYTES and (tamano, mtime) == _firma(archivo_csv)
+
+
+class Instantanea:
+    """Vista de solo lectura sobre un archivo generado con `generar`."""
+
+    def __init__(self, ruta):
+        with open(ruta, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        vista = memoryview(self._mmap)
+        _, _, _, _, self.n_filas, n_ids, n_materias, n_notas = CABECERA.unpack_from(vista)
+        pos = INDICE.unpack_from(vista, CABECERA.size)
+        self._ids_desp, self._ids_datos = self._leer_tabla(vista, pos[0], n_ids)
+        # Pocas materias y calificaciones distintas: se decodifican una vez
+        self._materias = self._decodificar(vista, pos[1], n_materias)
+        self._notas = self._decodificar(vista, pos[2], n_notas)
+        self._est = vista[pos[3]:pos[3] + 4 * self.n_filas].cast('I')
+        self._mat = vista[pos[4]:pos[4] + 2 * self.n_filas].cast('H')
+        self._nota = vista[pos[5]:pos[5] + 4 * self.n_filas].cast('I')
+        self._orden = vista[pos[6]:pos[6] + 4 * self.n_filas].cast('I')
+        self._grupos = vista[pos[7]:pos[7] + 4 * (n_ids + 1)].cast('I')
+        self._n_ids = n_ids
+
+    @staticmethod
+    def _leer_tabla(vista, pos, n):
+        desp = vista[pos:pos + 4 * (n + 1)].cast('I')
+        inicio = pos + 4 * (n + 1)
+        return desp, vista[inicio:inicio + desp[n]]
+
+    @classmethod
+    def _decodificar(cls, vista, pos, n):
+        desp, datos = cls._leer_tabla(vista, pos, n)
+        cadenas = [bytes(datos[desp[i]:desp[i + 1]]).decode('utf-8') for i in range(n)]
+        desp.release()
+        datos.release()
+        return cadenas
+
+    @classmethod
+    def abrir(cls, archivo_csv):
+        """Abre la instantánea del CSV, regenerándola si no está vigente."""
+        if not vigente(archivo_csv):
+            generar(archivo_csv)
+        return cls(ruta_para(archivo_csv))
+
+    def __len__(self):
+        return self.n_filas
+
+    def _id(self, k):
+        return bytes(self._ids_datos[self._ids_desp[k]:self._ids_desp[k + 1]])
+
+    def _buscar_id(self, id_est):
+        """Posición del estudiante en la tabla ordenada o -1."""
+        objetivo = id_est.encode('utf-8')
+        lo, hi = 0, self._n_ids
+        while lo < hi:
+            medio = (lo + hi) // 2
+            if self._id(medio) < objetivo:
+                lo = medio + 1
+            else:
+                hi = medio
+        return lo if lo < self._n_ids and self._id(lo) == objetivo else -1
+
+    def tupla(self, i):
+        """Fila `i` (orden del CSV) como (ID_Estudiante, Materia, Calificación)."""
+        return (self._id(self._est[i]).decode('utf-8'), self._materias[self._mat[i]],
+                self._notas[self._nota[i]])
+
+    def __iter__(self):
+        materias, notas = self._materias, self._notas
+        for a in range(0, self.n_filas, FILAS_POR_BLOQUE):
+            b = a + FILAS_POR_BLOQUE
+            for k, m, nota in zip(self._est[a:b].tolist(), self._mat[a:b].tolist(),
+                                  self._nota[a:b].tolist()):
+                yield self._id(k).decode('utf-8'), materias[m], notas[nota]
+
+    def tuplas_de(self, id_est):
+        """Filas del estudiante, en el orden del CSV."""
+        k = self._buscar_id(id_est)
+        if k < 0:
+            return []
+        return [self.tupla(self._orden[j]) for j in range(self._grupos[k], self._grupos[k + 1])]
+
+    def cerrar(self):
+        for v in (self._est, self._mat, self._nota, self._orden, self._grupos,
+                  self._ids_desp, self._ids_datos):
+            v.release()
+        self._mmap.close()
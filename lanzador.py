@@ -0,0 +1,61 @@
+"""Lanza varios procesos del servidor de calificaciones y del de NRCs.
+
+Cada proceso abre su propio socket con SO_REUSEPORT sobre el mismo puerto y
+el kernel reparte las conexiones entre ellos, así que las lecturas escalan a
+varios núcleos pese al GIL. Los servidores de calificaciones comparten los
+CSV con flock (un escritor a la vez, ver con_hilos/almacen.py).
+
+Con --reuseport los servidores de calificaciones no guardan NRCs en caché:
+un INVALIDAR_NRC al puerto compartido llegaría a uno solo de ellos. Por eso
+el servidor de NRCs se lanza sin suscriptores.
+
+Uso: python lanzador.py --procesos 4 [--procesos-nrc 2] [-- opciones de server.py]
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+
+BASE = os.path.abspath(os.path.dirname(__file__))
+SERVIDOR_CALIFICACIONES = os.path.join(BASE, 'con_hilos', 'server.py')
+SERVIDOR_NRC = os.path.join(BASE, 'nrcs_server.py')
+
+
+def lanzar(comando, n, cwd=None):
+    return [subprocess.Popen(comando, cwd=cwd) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lanzador multiproceso (SO_REUSEPORT)")
+    parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1,
+                        help="procesos del servidor de calificaciones (0 para no lanzarlo)")
+    parser.add_argument('--procesos-nrc', type=int, default=1,
+                        help="procesos del servidor de NRCs (0 para no lanzarlo)")
+    parser.add_argument('extra', nargs=argparse.REMAINDER,
+                        help="opciones que se pasan a con_hilos/server.py (tras --)")
+    args = parser.parse_args()
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        sys.exit("SO_REUSEPORT no está disponible en este sistema")
+    extra = [a for a in args.extra if a != '--']
+
+    procesos = lanzar([sys.executable, SERVIDOR_NRC, '--reuseport', '--suscriptores', ''],
+                      args.procesos_nrc, cwd=BASE)
+    procesos += lanzar([sys.executable, SERVIDOR_CALIFICACIONES, '--reuseport', *extra], args.procesos)
+    print(f"Lanzados {args.procesos} procesos de calificaciones y {args.procesos_nrc} de NRCs")
+    try:
+        for p in procesos:
+            p.wait()
+    except KeyboardInterrupt:
+        # Los hijos reciben el mismo SIGINT por estar en el mismo grupo
+        for p in procesos:
+            if p.poll() is None:
+                p.send_signal(signal.SIGINT)
+        for p in procesos:
+            p.wait()
+        print("Lanzador detenido.")
+
+
+if __name__ == '__main__':
+    main()
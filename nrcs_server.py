@@ -1,11 +1,25 @@
+import argparse
 import socket
+import threading
 import csv
 import json
 import os
+import time
+
+import registro
+from protocolo import enviar_mensaje, es_enmarcado, recibir_mensaje
 
 ARCHIVO_NRC = 'nrcs.csv'
 PUERTO = 12346
 HOST = 'localhost'
+TIMEOUT_CLIENTE = 300
+INTERVALO_VIGILANCIA = 2   # segundos entre revisiones de nrcs.csv
+# Servidores de calificaciones que guardan NRCs en caché y deben enterarse
+# cuando cambia nrcs.csv: "host:puerto,host:puerto" (vacío: ninguno). Se
+# puede cambiar con la variable de entorno NRC_SUSCRIPTORES o --suscriptores
+SUSCRIPTORES_POR_DEFECTO = 'localhost:12345'
+SUSCRIPTORES = []
+LOG = registro.obtener('nrcs')
 
 def inicializar_nrcs():
     """Inicializa el archivo CSV de NRCs si no existe"""
@@ -23,27 +37,105 @@ def inicializar_nrcs():
             writer.writerows(nrcs_ejemplo)
         print("Archivo nrcs.csv creado con datos de ejemplo")
 
-def buscar_nrc(nrc):
-    """Busca un NRC en el archivo CSV"""
+# Índice en memoria: (NRC en mayúsculas -> (fila, respuesta serializada),
+# respuesta serializada de LISTAR_NRC). Se reemplaza entero al recargar, así
+# los hilos que atienden clientes nunca ven un índice a medio construir.
+_INDICE = ({}, b'')
+_ERROR_CARGA = None
+RESPUESTA_NO_ENCONTRADO = json.dumps({"status": "not_found", "mensaje": "NRC no encontrado"}).encode('utf-8')
+
+def cargar_catalogo():
+    """Lee nrcs.csv una vez y precalcula las respuestas"""
+    global _INDICE, _ERROR_CARGA
     try:
         with open(ARCHIVO_NRC, 'r', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['NRC'].strip().upper() == nrc.strip().upper():
-                    return {"status": "ok", "data": row}
-        return {"status": "not_found", "mensaje": "NRC no encontrado"}
+            filas = list(csv.DictReader(f))
     except Exception as e:
-        return {"status": "error", "mensaje": str(e)}
+        _ERROR_CARGA = str(e)
+        print(f"No se pudo cargar {ARCHIVO_NRC}: {e}")
+        return
+    catalogo = {}
+    for row in filas:
+        respuesta = json.dumps({"status": "ok", "data": row}).encode('utf-8')
+        catalogo[row['NRC'].strip().upper()] = (row, respuesta)
+    _INDICE = (catalogo, json.dumps({"status": "ok", "data": filas}).encode('utf-8'))
+    _ERROR_CARGA = None
+    print(f"Catálogo de NRCs cargado: {len(catalogo)} NRCs")
+
+def _buscar_entrada(nrc):
+    catalogo = _INDICE[0]
+    entrada = catalogo.get(nrc)
+    if entrada is None:
+        entrada = catalogo.get(nrc.strip().upper())
+    return entrada
+
+def buscar_nrc(nrc):
+    """Busca un NRC en el catálogo"""
+    if _ERROR_CARGA is not None:
+        return {"status": "error", "mensaje": _ERROR_CARGA}
+    entrada = _buscar_entrada(nrc)
+    if entrada is None:
+        return {"status": "not_found", "mensaje": "NRC no encontrado"}
+    return {"status": "ok", "data": entrada[0]}
+
+def buscar_nrcs(nrcs):
+    """Busca varios NRCs (separados por comas) en una sola consulta"""
+    if _ERROR_CARGA is not None:
+        return {"status": "error", "mensaje": _ERROR_CARGA}
+    encontrados = {}
+    no_encontrados = []
+    for nrc in nrcs.split(','):
+        entrada = _buscar_entrada(nrc)
+        if entrada is None:
+            no_encontrados.append(nrc.strip().upper())
+        else:
+            encontrados[nrc.strip().upper()] = entrada[0]
+    return {"status": "ok", "data": encontrados, "no_encontrados": no_encontrados}
 
 def listar_nrcs():
     """Lista todos los NRCs disponibles"""
+    if _ERROR_CARGA is not None:
+        return {"status": "error", "mensaje": _ERROR_CARGA}
+    return {"status": "ok", "data": [row for row, _ in _INDICE[0].values()]}
+
+def _firma_archivo():
     try:
-        with open(ARCHIVO_NRC, 'r', newline='') as f:
-            reader = csv.DictReader(f)
-            data = list(reader)
-        return {"status": "ok", "data": data}
-    except Exception as e:
-        return {"status": "error", "mensaje": str(e)}
+        st = os.stat(ARCHIVO_NRC)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+def leer_suscriptores(texto):
+    """'host:puerto,host:puerto' -> [(host, puerto)]"""
+    suscriptores = []
+    for item in texto.split(','):
+        if item.strip():
+            host, _, puerto = item.strip().rpartition(':')
+            suscriptores.append((host or 'localhost', int(puerto)))
+    return suscriptores
+
+def notificar_cambio():
+    """Pide a los suscriptores que invaliden su caché de NRCs"""
+    for host, puerto in SUSCRIPTORES:
+        try:
+            with socket.create_connection((host, puerto), timeout=2) as s:
+                s.sendall(b"INVALIDAR_NRC")
+                s.recv(1024)
+        except OSError as e:
+            LOG.warning("No se pudo avisar a un suscriptor",
+                        extra=registro.campos(suscriptor=f"{host}:{puerto}", error=e))
+
+def vigilar_archivo():
+    """Revisa periódicamente nrcs.csv y avisa a los suscriptores si cambió"""
+    firma = _firma_archivo()
+    while True:
+        time.sleep(INTERVALO_VIGILANCIA)
+        actual = _firma_archivo()
+        if actual != firma:
+            firma = actual
+            LOG.info("nrcs.csv modificado, recargando y avisando a los servidores de calificaciones")
+            cargar_catalogo()
+            notificar_cambio()
 
 def procesar_comando(comando):
     partes = comando.strip().split('|')
@@ -51,15 +143,85 @@ def procesar_comando(comando):
     
     if op == 'BUSCAR_NRC' and len(partes) == 2:
         return buscar_nrc(partes[1])
+    elif op == 'BUSCAR_NRCS' and len(partes) == 2:
+        return buscar_nrcs(partes[1])
     elif op == 'LISTAR_NRC':
         return listar_nrcs()
     else:
         return {"status": "error", "mensaje": "Comando inválido"}
 
+def responder(comando):
+    """Devuelve la respuesta ya serializada; los casos frecuentes salen del índice"""
+    if _ERROR_CARGA is None:
+        op, _, arg = comando.partition('|')
+        if op == 'BUSCAR_NRC' and '|' not in arg:
+            entrada = _buscar_entrada(arg)
+            return entrada[1] if entrada is not None else RESPUESTA_NO_ENCONTRADO
+        if op == 'LISTAR_NRC':
+            return _INDICE[1]
+    return json.dumps(procesar_comando(comando)).encode('utf-8')
+
+def atender_cliente(client_socket, addr):
+    """Atiende una conexión.
+
+    Con el protocolo con marco se responden varios comandos por la misma
+    conexión hasta que el cliente la cierre; con el protocolo antiguo se lee
+    un único comando y se cierra.
+    """
+    client_socket.settimeout(TIMEOUT_CLIENTE)
+    try:
+        enmarcado = es_enmarcado(client_socket)
+        if enmarcado:
+            while True:
+                data = recibir_mensaje(client_socket)
+                if data is None:
+                    break
+                data = data.decode('utf-8')
+                LOG.debug("Comando recibido", extra=registro.campos(cliente=addr, comando=data))
+                enviar_mensaje(client_socket, responder(data))
+        elif enmarcado is not None:
+            data = client_socket.recv(1024).decode('utf-8').strip()
+            if data:
+                LOG.debug("Comando recibido", extra=registro.campos(cliente=addr, comando=data))
+                client_socket.sendall(responder(data))
+    except socket.timeout:
+        pass
+    except Exception as e:
+        LOG.error("Error en comunicación", extra=registro.campos(cliente=addr, error=e))
+    finally:
+        client_socket.close()
+        LOG.debug("Conexión cerrada", extra=registro.campos(cliente=addr))
+
 def main():
+    global PUERTO, SUSCRIPTORES
+    parser = argparse.ArgumentParser(description="Servidor de NRCs")
+    parser.add_argument('--puerto', type=int, default=PUERTO)
+    parser.add_argument('--reuseport', action='store_true',
+                        help="compartir el puerto con otros procesos (lo usa lanzador.py)")
+    parser.add_argument('--suscriptores', default=os.environ.get('NRC_SUSCRIPTORES', SUSCRIPTORES_POR_DEFECTO),
+                        metavar='HOST:PUERTO,...',
+                        help="servidores de calificaciones a los que avisar cuando cambia nrcs.csv "
+                             f"(por defecto $NRC_SUSCRIPTORES o {SUSCRIPTORES_POR_DEFECTO}; vacío: ninguno)")
+    parser.add_argument('--log-nivel', choices=registro.NIVELES, default='INFO',
+                        help="DEBUG muestra cada comando y cada conexión")
+    parser.add_argument('--log-formato', choices=registro.FORMATOS, default='texto')
+    parser.add_argument('--log-muestreo', type=int, default=1, metavar='N',
+                        help="escribir solo 1 de cada N mensajes DEBUG")
+    args = parser.parse_args()
+    PUERTO = args.puerto
+    try:
+        SUSCRIPTORES = leer_suscriptores(args.suscriptores)
+    except ValueError:
+        parser.error(f"--suscriptores inválido: {args.suscriptores!r} (se espera host:puerto,...)")
+    detener_log = registro.iniciar(LOG, args.log_nivel, args.log_formato, args.log_muestreo)
+
     inicializar_nrcs()
+    cargar_catalogo()
+    threading.Thread(target=vigilar_archivo, daemon=True).start()
     server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if args.reuseport:
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
     server_socket.bind((HOST, PUERTO))
     server_socket.listen(5)
     print(f"Servidor de NRCs escuchando en {HOST}:{PUERTO}...")
@@ -67,22 +229,13 @@ def main():
     try:
         while True:
             client_socket, addr = server_socket.accept()
-            print(f"Conexión aceptada desde {addr}")
-            try:
-                data = client_socket.recv(1024).decode('utf-8').strip()
-                if data:
-                    print(f"Comando recibido: {data}")
-                    respuesta = procesar_comando(data)
-                    client_socket.sendall(json.dumps(respuesta).encode('utf-8'))
-            except Exception as e:
-                print(f"Error en comunicación: {e}")
-            finally:
-                client_socket.close()
-                print(f"Conexión con {addr} cerrada")
+            LOG.debug("Conexión aceptada", extra=registro.campos(cliente=addr))
+            threading.Thread(target=atender_cliente, args=(client_socket, addr), daemon=True).start()
     except KeyboardInterrupt:
         print("\nServidor de NRCs detenido.")
     finally:
         server_socket.close()
+        detener_log()
 
 if __name__ == "__main__":
     main()
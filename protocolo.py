@@ -0,0 +1,108 @@
+"""Protocolo con marco de longitud compartido por clientes y servidores.
+
+Cada mensaje va precedido por 4 bytes big-endian con su longitud, lo que
+permite enviar varios comandos por la misma conexión y respuestas de
+cualquier tamaño. Los comandos del protocolo antiguo (texto plano, un
+comando por conexión) nunca empiezan con el byte 0x00, mientras que la
+cabecera de un comando de menos de 16 MiB siempre lo hace: el servidor
+mira el primer byte de la conexión para saber qué formato usa el cliente.
+"""
+import asyncio
+import socket
+import struct
+
+CABECERA = struct.Struct('>I')
+
+
+def enviar_mensaje(sock, datos):
+    """Envía `datos` (bytes) precedidos de su longitud."""
+    sock.sendall(CABECERA.pack(len(datos)) + datos)
+
+
+def recibir_exacto(sock, n):
+    """Lee exactamente `n` bytes; devuelve None si la conexión se cierra antes."""
+    partes = []
+    while n:
+        parte = sock.recv(min(n, 1 << 20))
+        if not parte:
+            return None
+        partes.append(parte)
+        n -= len(parte)
+    return b''.join(partes)
+
+
+def recibir_mensaje(sock):
+    """Lee un mensaje completo; devuelve None si el otro extremo cerró."""
+    cabecera = recibir_exacto(sock, CABECERA.size)
+    if cabecera is None:
+        return None
+    (longitud,) = CABECERA.unpack(cabecera)
+    if longitud == 0:
+        return b''
+    datos = recibir_exacto(sock, longitud)
+    if datos is None:
+        raise ConnectionError("Conexión cerrada a mitad de un mensaje")
+    return datos
+
+
+def es_enmarcado(sock):
+    """Indica si el cliente usa el protocolo con marco, sin consumir datos.
+
+    Devuelve None si la conexión se cerró sin enviar nada.
+    """
+    primero = sock.recv(1, socket.MSG_PEEK)
+    if not primero:
+        return None
+    return primero == b'\x00'
+
+
+# ---------------- Versión asyncio ---------------- #
+async def leer_mensaje(reader):
+    """Equivalente de recibir_mensaje para un asyncio.StreamReader."""
+    try:
+        cabecera = await reader.readexactly(CABECERA.size)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise ConnectionError("Conexión cerrada a mitad de un mensaje")
+    (longitud,) = CABECERA.unpack(cabecera)
+    try:
+        return await reader.readexactly(longitud)
+    except asyncio.IncompleteReadError:
+        raise ConnectionError("Conexión cerrada a mitad de un mensaje")
+
+
+def escribir_mensaje(writer, datos):
+    """Equivalente de enviar_mensaje para un asyncio.StreamWriter (sin drain)."""
+    writer.write(CABECERA.pack(len(datos)) + datos)
+
+
+# ---------------- Respuestas en flujo ---------------- #
+# Una respuesta en flujo es una cabecera JSON seguida de trozos NDJSON (una
+# fila JSON por línea). Con marco, cada trozo va en su propio mensaje y un
+# mensaje vacío indica el final; con el protocolo antiguo se escriben las
+# líneas tal cual y el cierre de la conexión marca el final.
+CABECERA_FLUJO = b'{"status": "ok", "stream": true}\n'
+
+
+def enviar_flujo(sock, trozos, enmarcado=True):
+    if enmarcado:
+        enviar_mensaje(sock, CABECERA_FLUJO)
+        for trozo in trozos:
+            enviar_mensaje(sock, trozo)
+        enviar_mensaje(sock, b'')
+    else:
+        sock.sendall(CABECERA_FLUJO)
+        for trozo in trozos:
+            sock.sendall(trozo)
+
+
+def recibir_flujo(sock):
+    """Genera los trozos NDJSON de una respuesta en flujo (tras la cabecera)."""
+    while True:
+        trozo = recibir_mensaje(sock)
+        if trozo is None:
+            raise ConnectionError("Conexión cerrada a mitad de un flujo")
+        if not trozo:
+            return
+        yield trozo
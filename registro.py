@@ -0,0 +1,134 @@
+"""Registro (logging) asíncrono, estructurado y con niveles para los servidores.
+
+Los hilos que atienden clientes solo dejan el registro en una cola; un hilo
+aparte lo formatea y lo escribe en la consola. Así un print lento (terminal,
+tubería llena) no frena a los demás hilos, y los mensajes por debajo del
+nivel configurado ni siquiera se formatean: usar `log.debug("... %s", x)` en
+vez de f-strings. Como el formateo ocurre después, los argumentos no deben
+modificarse tras registrarlos (en la práctica son cadenas y números).
+
+Los campos estructurados van en `extra=campos(op='BUSCAR', ...)` y salen como
+`clave=valor` (formato texto) o como claves del objeto (formato json).
+
+Con `muestreo=N` solo se escribe uno de cada N mensajes DEBUG: sirve para
+ver el tráfico bajo carga sin pagar un mensaje por comando. Si la consola no
+da abasto y la cola llega a MAX_COLA mensajes, los nuevos se descartan (y
+se cuentan) en vez de frenar al servidor.
+"""
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+NIVELES = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+FORMATOS = ('texto', 'json')
+FORMATO = '%(asctime)s %(levelname)s [%(threadName)s] %(message)s'
+MAX_COLA = 10000   # mensajes esperando al hilo escritor
+
+
+def campos(**valores):
+    """Campos estructurados para el parámetro `extra` de un mensaje."""
+    return {'campos': valores}
+
+
+class FormatoTexto(logging.Formatter):
+    def __init__(self):
+        super().__init__(FORMATO)
+
+    def format(self, record):
+        texto = super().format(record)
+        extra = getattr(record, 'campos', None)
+        if extra:
+            texto += ' ' + ' '.join(f"{k}={v}" for k, v in extra.items())
+        return texto
+
+
+class FormatoJSON(logging.Formatter):
+    def format(self, record):
+        datos = {"ts": record.created, "nivel": record.levelname, "logger": record.name,
+                 "hilo": record.threadName, "mensaje": record.getMessage()}
+        datos.update(getattr(record, 'campos', None) or {})
+        if record.exc_info:
+            datos["excepcion"] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class Muestreo(logging.Filter):
+    """Deja pasar uno de cada `cada` mensajes de nivel `hasta` o menor."""
+
+    def __init__(self, cada, hasta=logging.DEBUG):
+        super().__init__()
+        self.cada = cada
+        self.hasta = hasta
+        self._contador = itertools.count()   # next() es atómico en CPython
+
+    def filter(self, record):
+        if record.levelno > self.hasta:
+            return True
+        return next(self._contador) % self.cada == 0
+
+
+class _ManejadorCola(logging.handlers.QueueHandler):
+    """QueueHandler que deja todo el formateo al hilo escritor y descarta
+    mensajes si la cola está llena."""
+
+    def __init__(self, cola):
+        super().__init__(cola)
+        self.descartados = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+class _Escritor(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)   # con la cola llena, esperar a que se vacíe
+
+
+def obtener(nombre):
+    """Logger de un servidor; no escribe nada hasta llamar a iniciar()."""
+    log = logging.getLogger(nombre)
+    log.propagate = False
+    return log
+
+
+def iniciar(log, nivel='INFO', formato='texto', muestreo=1, sincrono=False, destino=None):
+    """Configura `log` y, salvo con `sincrono`, arranca el hilo escritor.
+
+    `sincrono=True` escribe desde el propio hilo que registra, como los
+    print de antes (útil para comparar y para depurar). Devuelve una función
+    que hay que llamar al salir para escribir lo que quede en la cola.
+    """
+    log.setLevel(nivel)
+    for manejador in list(log.handlers):
+        log.removeHandler(manejador)
+    salida = logging.StreamHandler(destino or sys.stdout)
+    salida.setFormatter(FormatoJSON() if formato == 'json' else FormatoTexto())
+    if sincrono:
+        manejador, oyente = salida, None
+    else:
+        cola = queue.Queue(MAX_COLA)
+        manejador = _ManejadorCola(cola)
+        oyente = _Escritor(cola, salida)
+        oyente.start()
+    if muestreo > 1:
+        manejador.addFilter(Muestreo(muestreo))
+    log.addHandler(manejador)
+
+    def detener():
+        if oyente is not None:
+            oyente.stop()
+            log.removeHandler(manejador)
+            log.addHandler(salida)
+            if manejador.descartados:
+                log.warning("%d mensajes descartados con la cola llena", manejador.descartados)
+        salida.flush()
+    return detener
@@ -1,5 +1,11 @@
-import socket
-import json
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import cliente  # noqa: E402
+
+CLIENTE = cliente.Cliente()   # main() lo cambia según --host/--puerto
 
 def mostrar_menu():
     """Muestra el menú de opciones"""
@@ -16,17 +22,33 @@ def mostrar_menu():
 def enviar_comando(comando):
     """Envía un comando al servidor y recibe la respuesta"""
     try:
-        client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        client_socket.connect(('localhost', 12345))
-        client_socket.send(comando.encode('utf-8'))
-        respuesta = client_socket.recv(4096).decode('utf-8')
-        client_socket.close()
-        return json.loads(respuesta)
+        return CLIENTE.enviar(comando)
     except Exception as e:
         return {"status": "error", "mensaje": f"Error de conexión: {str(e)}"}
+    finally:
+        # Entre comandos el menú espera al usuario: no dejar la conexión
+        # ocupando al servidor secuencial
+        CLIENTE.cerrar()
+
+def listar_en_flujo():
+    """Pide LISTAR_FLUJO y genera las filas a medida que llegan"""
+    return CLIENTE.listar_flujo()
 
 def main():
-    """Función principal del cliente"""
+    """Función principal del cliente.
+
+    Sin argumentos muestra el menú. Con -c/--archivo envía esos comandos y
+    muestra cada respuesta como JSON; con --trabajadores N además los repite
+    desde N conexiones a la vez y muestra el rendimiento (ver cliente.py).
+    """
+    global CLIENTE
+    parser = argparse.ArgumentParser(description="Cliente del Sistema de Calificaciones")
+    cliente.agregar_argumentos(parser)
+    args = parser.parse_args()
+    if cliente.sin_menu(args):
+        return
+    CLIENTE = cliente.Cliente(args.host, args.puerto, args.timeout)
+
     print("Cliente del Sistema de Calificaciones")
     print("Conectando al servidor...")
 
@@ -69,17 +91,15 @@ def main():
                 print(res['mensaje'])
 
             elif opcion == '4':
-                # Listar todas las calificaciones
-                res = enviar_comando("LISTAR")
-                if res['status'] == 'ok':
-                    if res['data']:
+                # Listar todas las calificaciones (se muestran a medida que llegan)
+                hay_filas = False
+                for row in listar_en_flujo():
+                    if not hay_filas:
                         print("\n--- Todas las Calificaciones ---")
-                        for row in res['data']:
-                            print(f"ID: {row['ID_Estudiante']}, Materia: {row['Materia']}, Calificación: {row['Calificación']}")
-                    else:
-                        print("No hay calificaciones registradas")
-                else:
-                    print(res['mensaje'])
+                        hay_filas = True
+                    print(f"ID: {row['ID_Estudiante']}, Materia: {row['Materia']}, Calificación: {row['Calificación']}")
+                if not hay_filas:
+                    print("No hay calificaciones registradas")
 
             elif opcion == '5':
                 # Eliminar todas las calificaciones de un estudiante
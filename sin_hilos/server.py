@@ -1,11 +1,40 @@
+import argparse
 import socket
 import csv
+import io
 import json
 import os
+import sys
+from itertools import islice
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from protocolo import enviar_flujo, enviar_mensaje, es_enmarcado, recibir_mensaje  # noqa: E402
+from instantanea import Instantanea  # noqa: E402
+from cache_respuestas import CacheRespuestas  # noqa: E402
 
 # Archivos
 ARCHIVO_ESTUDIANTES = '../estudiantes.csv'
 ARCHIVO_CALIFICACIONES = '../calificaciones.csv'
+ARCHIVO_REGISTRO = '../calificaciones.log'
+CAMPOS_CALIFICACIONES = ['ID_Estudiante', 'Materia', 'Calificación']
+CODIFICACION = 'utf-8'   # la de todos los archivos, sin depender del locale
+
+# Red
+HOST = 'localhost'
+PORT = 12345
+
+# Filas por mensaje en LISTAR_FLUJO
+FILAS_POR_TROZO = 1000
+
+# Entradas del registro antes de reescribir calificaciones.csv
+UMBRAL_COMPACTACION = 1000
+
+# Consultar el base a través de la instantánea binaria (instantanea.py)
+USAR_INSTANTANEA = True
+
+# Respuestas de BUSCAR y LISTAR ya serializadas; cada cambio de un
+# estudiante descarta las suyas y las de LISTAR (ver cache_respuestas.py)
+CACHE_RESPUESTAS = CacheRespuestas(max_bytes=64 * 1024 * 1024)
 
 # Constantes de comandos
 AGREGAR_ESTUDIANTE = "AGREGAR_ESTUDIANTE"
@@ -13,40 +42,233 @@ AGREGAR = "AGREGAR"
 BUSCAR = "BUSCAR"
 ACTUALIZAR = "ACTUALIZAR"
 LISTAR = "LISTAR"
+LISTAR_FLUJO = "LISTAR_FLUJO"
 ELIMINAR = "ELIMINAR"
 
 # ---------------- FUNCIONES DE ARCHIVOS ---------------- #
 
+def configurar(directorio=None, puerto=None):
+    """Cambia la carpeta de datos y el puerto antes de arrancar"""
+    global ARCHIVO_ESTUDIANTES, ARCHIVO_CALIFICACIONES, ARCHIVO_REGISTRO, PORT
+    if directorio:
+        ARCHIVO_ESTUDIANTES = os.path.join(directorio, 'estudiantes.csv')
+        ARCHIVO_CALIFICACIONES = os.path.join(directorio, 'calificaciones.csv')
+        ARCHIVO_REGISTRO = os.path.join(directorio, 'calificaciones.log')
+    if puerto:
+        PORT = puerto
+
 def inicializar_csvs():
     """Crea los archivos si no existen"""
     # Estudiantes
     if not os.path.exists(ARCHIVO_ESTUDIANTES):
-        with open(ARCHIVO_ESTUDIANTES, 'w', newline='') as f:
+        with open(ARCHIVO_ESTUDIANTES, 'w', newline='', encoding=CODIFICACION) as f:
             writer = csv.writer(f)
             writer.writerow(['ID_Estudiante', 'Nombre'])
         print("Archivo estudiantes.csv creado")
 
     # Calificaciones
     if not os.path.exists(ARCHIVO_CALIFICACIONES):
-        with open(ARCHIVO_CALIFICACIONES, 'w', newline='') as f:
+        with open(ARCHIVO_CALIFICACIONES, 'w', newline='', encoding=CODIFICACION) as f:
             writer = csv.writer(f)
             writer.writerow(['ID_Estudiante', 'Materia', 'Calificación'])
         print("Archivo calificaciones.csv creado")
 
+# ---------------- REGISTRO DE CAMBIOS (WAL) ---------------- #
+# calificaciones.csv solo se reescribe al compactar. Entre compactaciones,
+# AGREGAR/ACTUALIZAR/ELIMINAR se agregan como una línea a calificaciones.log
+# y se aplican sobre el archivo base al leer. La primera línea del registro
+# guarda la firma (tamaño, mtime) del base al que corresponde: si no coincide,
+# el registro ya fue compactado y se descarta.
+
+OP_AGREGAR = 'A'
+OP_ACTUALIZAR = 'U'
+OP_ELIMINAR = 'D'
+
+_instantanea = None   # Instantanea del base vigente, si USAR_INSTANTANEA
+_materias_base = {}   # ID_Estudiante -> set(Materia) del base (sin instantánea)
+_borrados = set()     # IDs eliminados del base
+_cambios = {}         # (ID_Estudiante, Materia) -> nueva calificación del base
+_agregadas = []       # filas agregadas después de la última compactación
+_entradas = 0
+
+def _firma_base():
+    st = os.stat(ARCHIVO_CALIFICACIONES)
+    return [str(st.st_size), str(st.st_mtime_ns)]
+
+def _leer_base():
+    with open(ARCHIVO_CALIFICACIONES, 'r', newline='', encoding=CODIFICACION) as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if len(row) >= 3:
+                yield row[0], row[1], row[2]
+
+def _abrir_instantanea():
+    """Abre (o regenera) la instantánea del base; sin ella se vuelve al CSV."""
+    global _instantanea
+    if _instantanea is not None:
+        _instantanea.cerrar()
+        _instantanea = None
+    if not USAR_INSTANTANEA:
+        return
+    try:
+        _instantanea = Instantanea.abrir(ARCHIVO_CALIFICACIONES)
+    except (OSError, ValueError) as e:
+        print(f"Instantánea no disponible, se usa el CSV: {e}")
+
+def _materias_en_base(id_est):
+    if _instantanea is not None:
+        return {materia for _, materia, _ in _instantanea.tuplas_de(id_est)}
+    return _materias_base.get(id_est, set())
+
+def _reiniciar_registro():
+    """Deja el registro vacío con la firma del base actual."""
+    global _entradas
+    tmp = ARCHIVO_REGISTRO + '.tmp'
+    with open(tmp, 'w', newline='', encoding=CODIFICACION) as f:
+        csv.writer(f).writerow(['#base'] + _firma_base())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, ARCHIVO_REGISTRO)
+    _borrados.clear()
+    _cambios.clear()
+    _agregadas.clear()
+    _entradas = 0
+
+def _aplicar(op, id_est, materia, calif):
+    """Aplica una entrada del registro al estado en memoria."""
+    global _agregadas
+    if op == OP_AGREGAR:
+        _agregadas.append({'ID_Estudiante': id_est, 'Materia': materia, 'Calificación': calif})
+    elif op == OP_ACTUALIZAR:
+        if id_est not in _borrados and materia in _materias_en_base(id_est):
+            _cambios[(id_est, materia)] = calif
+        for row in _agregadas:
+            if row['ID_Estudiante'] == id_est and row['Materia'] == materia:
+                row['Calificación'] = calif
+    elif op == OP_ELIMINAR:
+        if _materias_en_base(id_est):
+            _borrados.add(id_est)
+        _agregadas = [row for row in _agregadas if row['ID_Estudiante'] != id_est]
+
+def abrir_registro():
+    """Carga las claves del base y reaplica el registro pendiente, si es válido."""
+    global _entradas
+    CACHE_RESPUESTAS.invalidar()
+    _abrir_instantanea()
+    _materias_base.clear()
+    if _instantanea is None:
+        for id_est, materia, _ in _leer_base():
+            _materias_base.setdefault(id_est, set()).add(materia)
+
+    if not os.path.exists(ARCHIVO_REGISTRO):
+        _reiniciar_registro()
+        return
+    with open(ARCHIVO_REGISTRO, 'r+b') as f:
+        datos = f.read()
+        completas = datos.rfind(b'\n') + 1
+        if completas < len(datos):
+            # La última escritura quedó a medias (aunque tenga 4 campos, su
+            # calificación puede estar cortada): se descarta y se quita del
+            # archivo para que la próxima entrada no quede pegada a ella
+            f.truncate(completas)
+        reader = csv.reader(io.StringIO(datos[:completas].decode(CODIFICACION), newline=''))
+        cabecera = next(reader, None)
+        if cabecera != ['#base'] + _firma_base():
+            entradas = None
+        else:
+            entradas = [row for row in reader if len(row) == 4]
+    if entradas is None:
+        print("Registro de cambios obsoleto descartado")
+        _reiniciar_registro()
+        return
+    for op, id_est, materia, calif in entradas:
+        _aplicar(op, id_est, materia, calif)
+    _entradas = len(entradas)
+    if _entradas:
+        print(f"Registro de cambios: {_entradas} entradas reaplicadas")
+
+def _registrar(op, id_est, materia='', calif=''):
+    """Agrega una entrada al registro (una sola escritura) y la aplica."""
+    global _entradas
+    with open(ARCHIVO_REGISTRO, 'a', newline='', encoding=CODIFICACION) as f:
+        csv.writer(f).writerow([op, id_est, materia, calif])
+        f.flush()
+        os.fsync(f.fileno())
+    _aplicar(op, id_est, materia, calif)
+    CACHE_RESPUESTAS.invalidar({id_est})
+    _entradas += 1
+    if _entradas >= UMBRAL_COMPACTACION:
+        compactar()
+
+def filas_vigentes():
+    """Genera las calificaciones actuales: base con cambios + agregadas."""
+    for id_est, materia, calif in _leer_base():
+        if id_est in _borrados:
+            continue
+        calif = _cambios.get((id_est, materia), calif)
+        yield {'ID_Estudiante': id_est, 'Materia': materia, 'Calificación': calif}
+    for row in _agregadas:
+        yield dict(row)
+
+def filas_de(id_est):
+    """Calificaciones actuales de un estudiante."""
+    if _instantanea is None:
+        return [row for row in filas_vigentes() if row['ID_Estudiante'] == id_est]
+    data = []
+    if id_est not in _borrados:
+        for _, materia, calif in _instantanea.tuplas_de(id_est):
+            calif = _cambios.get((id_est, materia), calif)
+            data.append({'ID_Estudiante': id_est, 'Materia': materia, 'Calificación': calif})
+    data.extend(dict(row) for row in _agregadas if row['ID_Estudiante'] == id_est)
+    return data
+
+def existe_calificacion(id_est, materia):
+    if id_est not in _borrados and materia in _materias_en_base(id_est):
+        return True
+    return any(row['ID_Estudiante'] == id_est and row['Materia'] == materia for row in _agregadas)
+
+def tiene_calificaciones(id_est):
+    if id_est not in _borrados and _materias_en_base(id_est):
+        return True
+    return any(row['ID_Estudiante'] == id_est for row in _agregadas)
+
+def compactar():
+    """Reescribe calificaciones.csv de forma atómica y vacía el registro."""
+    if not _entradas:
+        return
+    materias = {}
+    tmp = ARCHIVO_CALIFICACIONES + '.tmp'
+    with open(tmp, 'w', newline='', encoding=CODIFICACION) as f:
+        writer = csv.DictWriter(f, fieldnames=CAMPOS_CALIFICACIONES)
+        writer.writeheader()
+        for row in filas_vigentes():
+            writer.writerow(row)
+            materias.setdefault(row['ID_Estudiante'], set()).add(row['Materia'])
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, ARCHIVO_CALIFICACIONES)
+    _abrir_instantanea()
+    _materias_base.clear()
+    if _instantanea is None:
+        _materias_base.update(materias)
+    _reiniciar_registro()
+    print("Calificaciones compactadas")
+
 # ---------------- FUNCIONES DE ESTUDIANTES ---------------- #
 
 def agregar_estudiante(id_est, nombre):
     """Registra un nuevo estudiante"""
     try:
         # Verificar si ya existe
-        with open(ARCHIVO_ESTUDIANTES, 'r') as f:
+        with open(ARCHIVO_ESTUDIANTES, 'r', encoding=CODIFICACION) as f:
             reader = csv.DictReader(f)
             for row in reader:
                 if row['ID_Estudiante'] == id_est:
                     return {"status": "error", "mensaje": "El estudiante ya está registrado"}
 
         # Agregar nuevo
-        with open(ARCHIVO_ESTUDIANTES, 'a', newline='') as f:
+        with open(ARCHIVO_ESTUDIANTES, 'a', newline='', encoding=CODIFICACION) as f:
             writer = csv.writer(f)
             writer.writerow([id_est, nombre])
         return {"status": "ok", "mensaje": f"Estudiante {nombre} agregado con éxito"}
@@ -56,7 +278,7 @@ def agregar_estudiante(id_est, nombre):
 def estudiante_existe(id_est):
     """Verifica si el estudiante existe"""
     try:
-        with open(ARCHIVO_ESTUDIANTES, 'r') as f:
+        with open(ARCHIVO_ESTUDIANTES, 'r', encoding=CODIFICACION) as f:
             reader = csv.DictReader(f)
             for row in reader:
                 if row['ID_Estudiante'] == id_est:
@@ -77,9 +299,7 @@ def agregar_calificacion(id_est, materia, calif):
         if calif_float < 0 or calif_float > 20:
             return {"status": "error", "mensaje": "Calificación debe estar entre 0 y 20"}
 
-        with open(ARCHIVO_CALIFICACIONES, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([id_est, materia, calif_float])
+        _registrar(OP_AGREGAR, id_est, materia, str(calif_float))
         return {"status": "ok", "mensaje": f"Calificación registrada para ID {id_est}"}
     except ValueError:
         return {"status": "error", "mensaje": "Calificación debe ser un número"}
@@ -92,9 +312,7 @@ def buscar_por_id(id_est):
         if not estudiante_existe(id_est):
             return {"status": "error", "mensaje": "Estudiante no registrado"}
 
-        with open(ARCHIVO_CALIFICACIONES, 'r') as f:
-            reader = csv.DictReader(f)
-            data = [row for row in reader if row['ID_Estudiante'] == id_est]
+        data = filas_de(id_est)
         if not data:
             return {"status": "not_found", "mensaje": "Sin calificaciones registradas"}
         return {"status": "ok", "data": data}
@@ -111,23 +329,10 @@ def actualizar_calificacion(id_est, materia, nueva_calif):
         if nueva_calif_float < 0 or nueva_calif_float > 20:
             return {"status": "error", "mensaje": "Calificación debe estar entre 0 y 20"}
 
-        rows = []
-        found = False
-        with open(ARCHIVO_CALIFICACIONES, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['ID_Estudiante'] == id_est and row['Materia'] == materia:
-                    row['Calificación'] = nueva_calif_float
-                    found = True
-                rows.append(row)
-
-        if not found:
+        if not existe_calificacion(id_est, materia):
             return {"status": "not_found", "mensaje": "No existe calificación para esa materia"}
 
-        with open(ARCHIVO_CALIFICACIONES, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['ID_Estudiante', 'Materia', 'Calificación'])
-            writer.writeheader()
-            writer.writerows(rows)
+        _registrar(OP_ACTUALIZAR, id_est, materia, str(nueva_calif_float))
         return {"status": "ok", "mensaje": "Calificación actualizada"}
     except ValueError:
         return {"status": "error", "mensaje": "Calificación inválida"}
@@ -137,37 +342,60 @@ def actualizar_calificacion(id_est, materia, nueva_calif):
 def listar_todas():
     """Lista todas las calificaciones"""
     try:
-        with open(ARCHIVO_CALIFICACIONES, 'r') as f:
-            reader = csv.DictReader(f)
-            data = list(reader)
-        return {"status": "ok", "data": data}
+        return {"status": "ok", "data": list(filas_vigentes())}
+    except Exception as e:
+        return {"status": "error", "mensaje": str(e)}
+
+def listar_pagina(desde, limite):
+    """Lista `limite` calificaciones a partir de la posición `desde`"""
+    try:
+        desde, limite = int(desde), int(limite)
+        if desde < 0 or limite <= 0:
+            raise ValueError
+    except ValueError:
+        return {"status": "error", "mensaje": "Paginación inválida (desde >= 0, límite > 0)"}
+    try:
+        filas = list(islice(filas_vigentes(), desde, desde + limite + 1))
+        return {"status": "ok", "data": filas[:limite], "desde": desde, "hay_mas": len(filas) > limite}
     except Exception as e:
         return {"status": "error", "mensaje": str(e)}
 
+def listar_flujo():
+    """Genera las calificaciones como trozos NDJSON mientras se lee el CSV"""
+    trozo = []
+    for row in filas_vigentes():
+        trozo.append(json.dumps(row).encode('utf-8'))
+        if len(trozo) == FILAS_POR_TROZO:
+            yield b'\n'.join(trozo) + b'\n'
+            trozo = []
+    if trozo:
+        yield b'\n'.join(trozo) + b'\n'
+
 def eliminar_por_id(id_est):
     """Elimina todas las calificaciones de un estudiante"""
     try:
-        rows = []
-        found = False
-        with open(ARCHIVO_CALIFICACIONES, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['ID_Estudiante'] != id_est:
-                    rows.append(row)
-                else:
-                    found = True
-        if not found:
+        if not tiene_calificaciones(id_est):
             return {"status": "not_found", "mensaje": "El estudiante no tiene registros"}
-        with open(ARCHIVO_CALIFICACIONES, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['ID_Estudiante', 'Materia', 'Calificación'])
-            writer.writeheader()
-            writer.writerows(rows)
+        _registrar(OP_ELIMINAR, id_est)
         return {"status": "ok", "mensaje": f"Registros eliminados para ID {id_est}"}
     except Exception as e:
         return {"status": "error", "mensaje": str(e)}
 
 # ---------------- PROCESAMIENTO DE COMANDOS ---------------- #
 
+def con_cache(clave, calcular, id_est=None):
+    """Devuelve los bytes guardados para `clave` o calcula la respuesta (y la guarda si es ok)"""
+    datos = CACHE_RESPUESTAS.obtener(clave)
+    if datos is not None:
+        return datos
+    version = CACHE_RESPUESTAS.version()
+    respuesta = calcular()
+    if respuesta.get("status") != "ok":
+        return respuesta
+    datos = json.dumps(respuesta).encode('utf-8')
+    CACHE_RESPUESTAS.guardar(clave, datos, version, id_est)
+    return datos
+
 def procesar_comando(comando):
     partes = comando.strip().split('|')
     op = partes[0]
@@ -177,11 +405,15 @@ def procesar_comando(comando):
     elif op == AGREGAR and len(partes) == 4:
         return agregar_calificacion(partes[1], partes[2], partes[3])
     elif op == BUSCAR and len(partes) == 2:
-        return buscar_por_id(partes[1])
+        return con_cache((BUSCAR, partes[1]), lambda: buscar_por_id(partes[1]), partes[1])
     elif op == ACTUALIZAR and len(partes) == 4:
         return actualizar_calificacion(partes[1], partes[2], partes[3])
+    elif op == LISTAR and len(partes) == 3:
+        return con_cache((LISTAR, partes[1], partes[2]), lambda: listar_pagina(partes[1], partes[2]))
     elif op == LISTAR:
-        return listar_todas()
+        return con_cache((LISTAR,), listar_todas)
+    elif op == LISTAR_FLUJO:
+        return listar_flujo()
     elif op == ELIMINAR and len(partes) == 2:
         return eliminar_por_id(partes[1])
     else:
@@ -189,28 +421,68 @@ def procesar_comando(comando):
 
 # ---------------- MAIN ---------------- #
 
+def responder(client_socket, respuesta, enmarcado):
+    """Envía un dict como JSON, bytes de la caché tal cual o, si es un generador, un flujo NDJSON"""
+    if isinstance(respuesta, (dict, bytes)):
+        datos = json.dumps(respuesta).encode('utf-8') if isinstance(respuesta, dict) else respuesta
+        if enmarcado:
+            enviar_mensaje(client_socket, datos)
+        else:
+            client_socket.sendall(datos)
+    else:
+        enviar_flujo(client_socket, respuesta, enmarcado)
+
+def atender_cliente(client_socket):
+    """Responde los comandos de una conexión.
+
+    Los clientes con el protocolo con marco (protocolo.py) reciben respuestas
+    completas de cualquier tamaño; los del protocolo antiguo envían un solo
+    comando por conexión.
+    """
+    client_socket.settimeout(30)
+    enmarcado = es_enmarcado(client_socket)
+    if enmarcado:
+        while True:
+            data = recibir_mensaje(client_socket)
+            if data is None:
+                break
+            data = data.decode('utf-8')
+            print(f"Comando recibido: {data}")
+            responder(client_socket, procesar_comando(data), True)
+    elif enmarcado is not None:
+        data = client_socket.recv(1024).decode('utf-8')
+        print(f"Comando recibido: {data}")
+        responder(client_socket, procesar_comando(data), False)
+
 def main():
+    parser = argparse.ArgumentParser(description="Servidor secuencial de calificaciones")
+    parser.add_argument('--puerto', type=int, help=f"puerto de escucha (por defecto {PORT})")
+    parser.add_argument('--datos', help="carpeta con estudiantes.csv y calificaciones.csv")
+    args = parser.parse_args()
+
+    configurar(args.datos, args.puerto)
     inicializar_csvs()
+    abrir_registro()
     server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.bind(('localhost', 12345))
+    server_socket.bind((HOST, PORT))
     server_socket.listen(1)
-    print("Servidor secuencial escuchando en puerto 12345...")
+    print(f"Servidor secuencial escuchando en puerto {PORT}...")
 
     try:
         while True:
             client_socket, addr = server_socket.accept()
             print(f"Cliente conectado desde {addr}")
-            data = client_socket.recv(1024).decode('utf-8')
-            if data:
-                print(f"Comando recibido: {data}")
-                respuesta = procesar_comando(data)
-                client_socket.send(json.dumps(respuesta).encode('utf-8'))
+            try:
+                atender_cliente(client_socket)
+            except Exception as e:
+                print(f"Error: {e}")
             client_socket.close()
             print("Cliente desconectado.")
     except KeyboardInterrupt:
         print("\nServidor detenido.")
     finally:
         server_socket.close()
+        compactar()
 
 if __name__ == "__main__":
     main()
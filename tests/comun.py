@@ -0,0 +1,29 @@
+"""Utilidades compartidas por las pruebas.
+
+Las pruebas usan unittest y se ejecutan desde la raíz del repositorio:
+
+    python -m unittest discover -s tests      (o python -m pytest tests)
+"""
+import importlib.util
+import os
+import sys
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CON_HILOS = os.path.join(RAIZ, 'con_hilos')
+SIN_HILOS = os.path.join(RAIZ, 'sin_hilos')
+
+for ruta in (CON_HILOS, RAIZ):
+    if ruta not in sys.path:
+        sys.path.insert(0, ruta)
+
+
+def cargar_sin_hilos(nombre='servidor_sin_hilos'):
+    """Módulo nuevo de sin_hilos/server.py, con su estado en memoria vacío.
+
+    Cargarlo otra vez equivale a reiniciar el proceso: solo queda lo que
+    está en disco.
+    """
+    spec = importlib.util.spec_from_file_location(nombre, os.path.join(SIN_HILOS, 'server.py'))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
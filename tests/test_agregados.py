@@ -0,0 +1,112 @@
+"""Agregados incrementales (PROMEDIO, ESTADISTICAS_NRC, RANKING) contra un
+recálculo desde cero, y los tres almacenamientos entre sí."""
+import math
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import comun  # noqa: F401  (rutas)
+from almacen import Almacen
+from almacen_particionado import AlmacenParticionado
+from almacen_sqlite import AlmacenSQLite
+
+IDS = [str(100 + i) for i in range(30)]
+NRCS = ['MAT101', 'FIS101', 'QUI101', 'PRO101']
+
+
+def resumen(notas):
+    n, suma, cuadrados = len(notas), sum(notas), sum(x * x for x in notas)
+    media = suma / n
+    return {"cantidad": n, "promedio": round(media, 2),
+            "desviacion": round(math.sqrt(max(cuadrados / n - media * media, 0.0)), 2)}
+
+
+def recalcular(filas):
+    """(promedios, estadísticas, rankings) calculados desde las filas."""
+    por_estudiante, por_nrc, pares = {}, {}, {}
+    for f in filas:
+        nota = float(f['Calificación'])
+        por_estudiante.setdefault(f['ID_Estudiante'], []).append(nota)
+        por_nrc.setdefault(f['Materia'], []).append(nota)
+        pares.setdefault(f['Materia'], {}).setdefault(f['ID_Estudiante'], []).append(nota)
+    promedios = {id_est: resumen(notas) for id_est, notas in por_estudiante.items()}
+    estadisticas = {nrc: dict(resumen(notas), estudiantes=len(pares[nrc])) for nrc, notas in por_nrc.items()}
+    rankings = {nrc: [{"ID_Estudiante": id_est, "promedio": round(-clave, 2)}
+                      for clave, id_est in sorted((-sum(v) / len(v), id_est) for id_est, v in ests.items())]
+                for nrc, ests in pares.items()}
+    return promedios, estadisticas, rankings
+
+
+class PruebaAgregados(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def almacenes(self):
+        d = self.dir
+        almacenes = {
+            'csv': Almacen(os.path.join(d, 'estudiantes.csv'), os.path.join(d, 'calificaciones.csv')),
+            'csv-lotes': Almacen(os.path.join(d, 'e2.csv'), os.path.join(d, 'c2.csv'), durabilidad='none'),
+            'sqlite': AlmacenSQLite(os.path.join(d, 'calificaciones.db')),
+            'particionado': AlmacenParticionado(os.path.join(d, 'particiones'), 3),
+        }
+        for almacen in almacenes.values():
+            almacen.cargar()
+            almacen.agregar_estudiantes([(i, f'E{i}') for i in IDS])
+            self.addCleanup(almacen.cerrar)
+        return almacenes
+
+    def revisar(self, almacen, nombre):
+        filas = [f for id_est in IDS for f in almacen.calificaciones_de(id_est)]
+        promedios, estadisticas, rankings = recalcular(filas)
+        for id_est in IDS:
+            self.assertEqual(almacen.promedio_de(id_est), promedios.get(id_est), (nombre, id_est))
+        for nrc in NRCS + ['XYZ999']:
+            self.assertEqual(almacen.estadisticas_de(nrc), estadisticas.get(nrc), (nombre, nrc))
+            for k in (1, 5, 100):
+                self.assertEqual(almacen.ranking_de(nrc, k), rankings.get(nrc, [])[:k], (nombre, nrc, k))
+
+    def test_coinciden_con_el_recalculo_y_entre_almacenamientos(self):
+        almacenes = self.almacenes()
+        rnd = random.Random(0)
+        for paso in range(600):
+            id_est, nrc = rnd.choice(IDS), rnd.choice(NRCS)
+            otro = rnd.choice(IDS)
+            nota = rnd.randint(0, 40) / 2   # múltiplos de 0.5: las sumas son exactas
+            op = rnd.random()
+            for almacen in almacenes.values():
+                if op < 0.45:
+                    almacen.agregar_calificacion(id_est, nrc, nota)
+                elif op < 0.55:
+                    almacen.agregar_calificaciones([(id_est, nrc, nota), (otro, nrc, nota)])
+                elif op < 0.8:
+                    almacen.actualizar_calificacion(id_est, nrc, nota)
+                elif op < 0.9:
+                    almacen.eliminar_calificaciones(id_est)
+                else:
+                    almacen.eliminar_pares([(id_est, nrc), (otro, nrc)])
+            if paso % 100 == 99:
+                for nombre, almacen in almacenes.items():
+                    self.revisar(almacen, nombre)
+                referencia = {i: almacenes['csv'].calificaciones_de(i) for i in IDS}
+                for nombre, almacen in almacenes.items():
+                    self.assertEqual({i: almacen.calificaciones_de(i) for i in IDS}, referencia, nombre)
+
+    def test_recarga_reconstruye_los_mismos_agregados(self):
+        almacen = Almacen(os.path.join(self.dir, 'estudiantes.csv'), os.path.join(self.dir, 'calificaciones.csv'))
+        almacen.cargar()
+        rnd = random.Random(1)
+        for _ in range(300):
+            almacen.agregar_calificacion(rnd.choice(IDS), rnd.choice(NRCS), rnd.randint(0, 20))
+            if rnd.random() < 0.2:
+                almacen.actualizar_calificacion(rnd.choice(IDS), rnd.choice(NRCS), rnd.randint(0, 20))
+        antes = [almacen.ranking_de(nrc, 100) for nrc in NRCS]
+        almacen.cargar()
+        self.assertEqual([almacen.ranking_de(nrc, 100) for nrc in NRCS], antes)
+        self.revisar(almacen, 'csv recargado')
+
+
+if __name__ == '__main__':
+    unittest.main()
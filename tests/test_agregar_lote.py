@@ -0,0 +1,69 @@
+"""AGREGAR_LOTE de con_hilos/server.py frente a AGREGAR."""
+import json
+import shutil
+import socket
+import tempfile
+import unittest
+
+import comun  # noqa: F401  (rutas)
+import server
+
+NRC_OK = {"status": "ok", "data": {"NRC": "MAT101", "Materia": "Matemáticas Básicas"}}
+NRC_NO = {"status": "not_found", "mensaje": "NRC no encontrado"}
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+class PruebaAgregarLote(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        server.configurar(self.dir, puerto_nrc=puerto_libre(), degradado=False)
+        server.inicializar_csvs()
+        server.agregar_estudiante('1', 'Uno')
+        # Respuestas del servidor de NRCs ya en caché: no hace falta levantarlo
+        server.CACHE_NRC.guardar('MAT101', NRC_OK)
+        server.CACHE_NRC.guardar('XYZ999', NRC_NO)
+
+    def lote(self, filas):
+        return server.agregar_lote(json.dumps(filas))
+
+    def test_misma_fila_mismo_error_que_agregar(self):
+        filas = [['1', 'XYZ999', '30'], ['1', 'XYZ999', 'abc'], ['2', 'XYZ999', '30'],
+                 ['1', 'XYZ999', '10'], ['1', 'mat101', '10']]
+        esperado = [server.agregar_calificacion(*f) for f in filas]
+        self.assertEqual(self.lote(filas)["resultados"], esperado)
+
+
+    def test_exito_parcial(self):
+        filas = [['1', 'MAT101', '12'], ['9', 'MAT101', '12'], ['1', 'XYZ999', '12'],
+                 ['1', 'MAT101', '25'], ['1', 'mat101', '18.5']]
+        res = server.procesar_comando('AGREGAR_LOTE|' + json.dumps(filas))
+        self.assertEqual(res['status'], 'ok')
+        self.assertEqual(res['agregadas'], 2)
+        self.assertEqual([r['status'] for r in res['resultados']], ['ok', 'error', 'error', 'error', 'ok'])
+        self.assertEqual([r['mensaje'] for r in res['resultados'][1:4]],
+                         ["Estudiante no registrado", "NRC no encontrado", "Calificación fuera de rango (0–20)"])
+        self.assertEqual([(f['Materia'], f['Calificación']) for f in server.ALMACEN.calificaciones_de('1')],
+                         [('MAT101', '12.0'), ('MAT101', '18.5')])
+
+    def test_lote_invalido(self):
+        for lote in ('no es json', '{"a": 1}', '[["1", "MAT101"]]'):
+            self.assertEqual(server.agregar_lote(lote)['status'], 'error')
+        self.assertEqual(server.ALMACEN.calificaciones_de('1'), [])
+
+    def test_servidor_nrc_caido_en_modo_degradado(self):
+        server.MODO_DEGRADADO = True
+        self.addCleanup(setattr, server, 'MODO_DEGRADADO', False)
+        res = self.lote([['1', 'FIS101', '14'], ['1', 'MAT101', '11']])
+        self.assertEqual(res['agregadas'], 2)
+        self.assertEqual([r.get('pendiente', False) for r in res['resultados']], [True, False])
+        self.assertEqual(server.PENDIENTES.filas(), [('1', 'FIS101', '14.0')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+"""Almacen sobre los CSV que vienen en el repositorio."""
+import os
+import shutil
+import tempfile
+import unittest
+
+import comun
+from almacen import Almacen
+
+
+class PruebaAlmacen(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        for nombre in ('estudiantes.csv', 'calificaciones.csv'):
+            shutil.copy(os.path.join(comun.RAIZ, nombre), self.dir)
+        self.estudiantes = os.path.join(self.dir, 'estudiantes.csv')
+        self.calificaciones = os.path.join(self.dir, 'calificaciones.csv')
+
+    def test_carga_los_csv_del_repositorio(self):
+        almacen = Almacen(self.estudiantes, self.calificaciones)
+        almacen.cargar()
+        self.assertEqual(almacen.nombres()['1001'], 'Sebastián Lasso')
+        materias = [f['Materia'] for f in almacen.calificaciones_de('1001')]
+        self.assertIn('Física', materias)
+        self.assertIn('Programación I', materias)
+
+    def test_escrituras_conservan_los_acentos(self):
+        almacen = Almacen(self.estudiantes, self.calificaciones)
+        almacen.cargar()
+        almacen.agregar_estudiante('2001', 'Íñigo Muñoz')
+        almacen.agregar_calificacion('2001', 'Química', '17.5')
+        almacen.actualizar_calificacion('1001', 'Física', '6.0')
+        almacen = Almacen(self.estudiantes, self.calificaciones)
+        almacen.cargar()
+        self.assertEqual(almacen.nombres()['2001'], 'Íñigo Muñoz')
+        self.assertEqual(almacen.calificacion_de('2001', 'Química')[0]['Calificación'], '17.5')
+        self.assertEqual(almacen.calificacion_de('1001', 'Física')[0]['Calificación'], '6.0')
+
+
+if __name__ == '__main__':
+    unittest.main()
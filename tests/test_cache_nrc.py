@@ -0,0 +1,69 @@
+import unittest
+
+import comun  # noqa: F401  (rutas)
+from cache_nrc import CacheNRC
+
+OK = {"status": "ok", "data": {"NRC": "MAT101"}}
+NO = {"status": "not_found", "mensaje": "NRC no encontrado"}
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+
+class PruebaCacheNRC(unittest.TestCase):
+    def setUp(self):
+        self.reloj = Reloj()
+        self.cache = CacheNRC(ttl=300, ttl_negativo=30, max_entradas=3, reloj=self.reloj)
+
+    def test_vence_al_cumplir_el_ttl(self):
+        self.cache.guardar('MAT101', OK)
+        self.reloj.ahora = 299
+        self.assertEqual(self.cache.obtener('MAT101'), OK)
+        self.reloj.ahora = 300
+        self.assertIsNone(self.cache.obtener('MAT101'))
+        self.assertEqual(self.cache.estadisticas()["entradas"], 0)
+
+    def test_inexistentes_con_su_propio_ttl(self):
+        self.cache.guardar('XYZ999', NO)
+        self.reloj.ahora = 29
+        self.assertEqual(self.cache.obtener('XYZ999'), NO)
+        self.reloj.ahora = 30
+        self.assertIsNone(self.cache.obtener('XYZ999'))
+
+    def test_errores_de_red_no_se_guardan(self):
+        self.cache.guardar('MAT101', {"status": "error", "mensaje": "Servidor NRC no disponible",
+                                      "sin_servicio": True})
+        self.assertIsNone(self.cache.obtener('MAT101'))
+
+    def test_lleno_descarta_el_menos_usado(self):
+        for nrc in ('A', 'B', 'C'):
+            self.cache.guardar(nrc, OK)
+        self.cache.obtener('A')   # B pasa a ser el menos usado
+        self.cache.guardar('D', OK)
+        self.assertIsNone(self.cache.obtener('B'))
+        for nrc in ('A', 'C', 'D'):
+            self.assertEqual(self.cache.obtener(nrc), OK)
+
+    def test_invalidar(self):
+        self.cache.guardar('A', OK)
+        self.cache.guardar('B', NO)
+        self.cache.invalidar('A')
+        self.assertIsNone(self.cache.obtener('A'))
+        self.assertEqual(self.cache.obtener('B'), NO)
+        self.cache.invalidar()
+        self.assertIsNone(self.cache.obtener('B'))
+
+    def test_sin_entradas_no_guarda_nada(self):
+        # Con --reuseport la caché se crea con max_entradas=0
+        cache = CacheNRC(max_entradas=0)
+        cache.guardar('A', OK)
+        self.assertIsNone(cache.obtener('A'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import gc
+import shutil
+import tempfile
+import unittest
+import weakref
+
+import comun  # noqa: F401  (rutas)
+import server
+from cache_respuestas import CacheRespuestas
+
+
+class PruebaCacheRespuestas(unittest.TestCase):
+    def setUp(self):
+        self.cache = CacheRespuestas(max_bytes=1000, max_entradas=10)
+
+    def test_guarda_y_devuelve(self):
+        self.cache.guardar(('BUSCAR', '1'), b'uno', self.cache.version(), '1')
+        self.assertEqual(self.cache.obtener(('BUSCAR', '1')), b'uno')
+        self.assertIsNone(self.cache.obtener(('BUSCAR', '2')))
+
+    def test_cambio_de_un_estudiante_descarta_su_buscar_y_los_listar(self):
+        v = self.cache.version()
+        self.cache.guardar(('BUSCAR', '1'), b'uno', v, '1')
+        self.cache.guardar(('BUSCAR', '2'), b'dos', v, '2')
+        self.cache.guardar(('LISTAR',), b'todo', v)
+        self.cache.invalidar({'1'})
+        self.assertIsNone(self.cache.obtener(('BUSCAR', '1')))
+        self.assertIsNone(self.cache.obtener(('LISTAR',)))
+        self.assertEqual(self.cache.obtener(('BUSCAR', '2')), b'dos')
+
+    def test_respuesta_calculada_durante_un_cambio_no_se_guarda(self):
+        # Un lector anota la versión y lee; mientras tanto cambia el estudiante
+        v = self.cache.version()
+        self.cache.invalidar({'1'})
+        self.cache.guardar(('BUSCAR', '1'), b'vieja', v, '1')
+        self.assertIsNone(self.cache.obtener(('BUSCAR', '1')))
+        self.assertEqual(self.cache.descartadas, 1)
+
+    def test_cambio_de_otro_estudiante_no_descarta(self):
+        v = self.cache.version()
+        self.cache.invalidar({'2'})
+        self.cache.guardar(('BUSCAR', '1'), b'uno', v, '1')
+        self.assertEqual(self.cache.obtener(('BUSCAR', '1')), b'uno')
+
+    def test_listar_se_descarta_con_cualquier_cambio(self):
+        v = self.cache.version()
+        self.cache.invalidar({'2'})
+        self.cache.guardar(('LISTAR',), b'todo', v)
+        self.assertIsNone(self.cache.obtener(('LISTAR',)))
+
+    def test_invalidar_todo_descarta_lo_calculado_antes(self):
+        v = self.cache.version()
+        self.cache.guardar(('BUSCAR', '1'), b'uno', v, '1')
+        self.cache.invalidar()
+        self.assertIsNone(self.cache.obtener(('BUSCAR', '1')))
+        self.cache.guardar(('BUSCAR', '2'), b'dos', v, '2')
+        self.assertIsNone(self.cache.obtener(('BUSCAR', '2')))
+        self.cache.guardar(('BUSCAR', '2'), b'dos', self.cache.version(), '2')
+        self.assertEqual(self.cache.obtener(('BUSCAR', '2')), b'dos')
+
+    def test_olvidar_cambios_sigue_descartando_lo_viejo(self):
+        # Con más cambios que max_entradas se vacía el registro de cambios:
+        # lo calculado antes ya no se puede validar y se descarta
+        v = self.cache.version()
+        self.cache.invalidar({str(i) for i in range(100, 120)})
+        self.cache.guardar(('BUSCAR', '1'), b'uno', v, '1')
+        self.assertIsNone(self.cache.obtener(('BUSCAR', '1')))
+
+    def test_limites_descartan_las_menos_usadas(self):
+        v = self.cache.version()
+        for i in range(12):
+            self.cache.guardar(('BUSCAR', str(i)), b'x', v, str(i))
+        self.assertIsNone(self.cache.obtener(('BUSCAR', '0')))
+        self.assertEqual(self.cache.obtener(('BUSCAR', '11')), b'x')
+        self.cache.guardar(('LISTAR',), b'y' * 995, v)
+        self.assertLessEqual(self.cache.estadisticas()["bytes"], 1000)
+        self.assertEqual(self.cache.obtener(('LISTAR',)), b'y' * 995)
+
+
+
+class PruebaConfigurarCache(unittest.TestCase):
+    def test_reconfigurar_suelta_la_cache_anterior(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        server.configurar(directorio, cache_respuestas=8)
+        server.inicializar_csvs()
+        anterior = weakref.ref(server.CACHE_RESPUESTAS)
+        for _ in range(3):
+            server.configurar(cache_respuestas=8)
+        gc.collect()
+        self.assertIsNone(anterior())
+        # La caché vigente sigue enterándose de los cambios
+        cache = server.CACHE_RESPUESTAS
+        server.ALMACEN.agregar_estudiante('1', 'Uno')
+        cache.guardar(('BUSCAR', '1'), b'uno', cache.version(), '1')
+        server.ALMACEN.agregar_calificacion('1', 'MAT101', '10')
+        self.assertIsNone(cache.obtener(('BUSCAR', '1')))
+
+
+if __name__ == '__main__':
+    unittest.main()
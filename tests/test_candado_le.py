@@ -0,0 +1,87 @@
+"""CandadoLE (con_hilos/candado_le.py): lectores, escritor y preferencia al escritor."""
+import threading
+import time
+import unittest
+
+import comun  # noqa: F401  (rutas)
+from candado_le import CandadoLE
+
+
+def esperar(condicion, limite=2.0):
+    fin = time.monotonic() + limite
+    while not condicion():
+        if time.monotonic() > fin:
+            raise AssertionError("La condición no se cumplió a tiempo")
+        time.sleep(0.001)
+
+
+class PruebaCandadoLE(unittest.TestCase):
+    def setUp(self):
+        self.candado = CandadoLE()
+
+    def hilo(self, funcion):
+        h = threading.Thread(target=funcion, daemon=True)
+        h.start()
+        self.addCleanup(h.join, 2)
+        return h
+
+    def test_los_lectores_entran_durante_la_escritura(self):
+        with self.candado.escritura():
+            leyo = threading.Event()
+
+            def leer():
+                with self.candado.lectura():
+                    leyo.set()
+            self.hilo(leer)
+            self.assertTrue(leyo.wait(2))
+
+    def test_un_solo_escritor_a_la_vez(self):
+        entro = threading.Event()
+
+        def escribir():
+            with self.candado.escritura():
+                entro.set()
+        with self.candado.escritura():
+            self.hilo(escribir)
+            self.assertFalse(entro.wait(0.05))
+        self.assertTrue(entro.wait(2))
+
+    def test_exclusivo_espera_a_los_lectores_y_frena_a_los_nuevos(self):
+        eventos = []
+        soltar_lector = threading.Event()
+
+        def leer(nombre, soltar=None):
+            with self.candado.lectura():
+                eventos.append(nombre)
+                if soltar is not None:
+                    soltar.wait(2)
+
+        def escribir():
+            with self.candado.escritura(), self.candado.exclusivo():
+                eventos.append('exclusivo')
+
+        self.hilo(lambda: leer('lector 1', soltar_lector))
+        esperar(lambda: eventos == ['lector 1'])
+        escritor = self.hilo(escribir)
+        # El escritor pidió exclusivo: el lector que llega ahora no se le adelanta
+        esperar(lambda: self.candado._exclusivo)
+        segundo = self.hilo(lambda: leer('lector 2'))
+        time.sleep(0.05)
+        self.assertEqual(eventos, ['lector 1'])
+        soltar_lector.set()
+        escritor.join(2)
+        segundo.join(2)
+        self.assertEqual(eventos, ['lector 1', 'exclusivo', 'lector 2'])
+
+    def test_mide_las_esperas(self):
+        with self.candado.lectura():
+            pass
+        with self.candado.escritura(), self.candado.exclusivo():
+            pass
+        esperas = self.candado.esperas()
+        self.assertEqual({modo: h.cantidad for modo, h in esperas.items()},
+                         {'lectura': 1, 'escritura': 1, 'exclusivo': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""Cortacircuitos del servidor NRC y verificación de las calificaciones pendientes."""
+import shutil
+import socket
+import tempfile
+import unittest
+from unittest import mock
+
+import comun  # noqa: F401  (rutas)
+import server
+from circuito import ABIERTO, CERRADO, SEMIABIERTO, Circuito
+from pendientes_nrc import PendientesNRC
+
+NRC_OK = {"status": "ok", "data": {"NRC": "FIS101", "Materia": "Física"}}
+NRC_NO = {"status": "not_found", "mensaje": "NRC no encontrado"}
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+
+class PruebaCircuito(unittest.TestCase):
+    def setUp(self):
+        self.reloj = Reloj()
+        self.circuito = Circuito(umbral=3, espera=10, reloj=self.reloj)
+
+    def abrir(self):
+        for _ in range(3):
+            self.assertTrue(self.circuito.permitir())
+            self.circuito.fallo()
+        self.assertEqual(self.circuito.estado(), ABIERTO)
+
+    def test_se_abre_tras_umbral_fallos_seguidos(self):
+        self.circuito.fallo()
+        self.circuito.fallo()
+        self.circuito.exito()     # un éxito reinicia la cuenta
+        self.circuito.fallo()
+        self.circuito.fallo()
+        self.assertEqual(self.circuito.estado(), CERRADO)
+        self.circuito.fallo()
+        self.assertEqual(self.circuito.estado(), ABIERTO)
+
+    def test_abierto_rechaza_hasta_cumplir_la_espera(self):
+        self.abrir()
+        self.reloj.ahora = 9.9
+        self.assertFalse(self.circuito.permitir())
+        self.assertFalse(self.circuito.permitir())
+        self.assertEqual(self.circuito.estadisticas()["rechazadas"], 2)
+
+    def test_semiabierto_deja_pasar_una_sola_prueba(self):
+        self.abrir()
+        self.reloj.ahora = 10
+        self.assertTrue(self.circuito.permitir())
+        self.assertEqual(self.circuito.estado(), SEMIABIERTO)
+        self.assertFalse(self.circuito.permitir())
+
+    def test_prueba_exitosa_cierra(self):
+        self.abrir()
+        self.reloj.ahora = 10
+        self.circuito.permitir()
+        self.circuito.exito()
+        self.assertEqual(self.circuito.estado(), CERRADO)
+        self.assertTrue(self.circuito.permitir())
+        self.assertTrue(self.circuito.permitir())
+
+    def test_prueba_fallida_vuelve_a_abrir(self):
+        self.abrir()
+        self.reloj.ahora = 10
+        self.circuito.permitir()
+        self.circuito.fallo()
+        self.assertEqual(self.circuito.estado(), ABIERTO)
+        self.reloj.ahora = 19.9   # la espera cuenta desde la nueva apertura
+        self.assertFalse(self.circuito.permitir())
+        self.reloj.ahora = 20
+        self.assertTrue(self.circuito.permitir())
+        self.assertEqual(self.circuito.estadisticas()["aperturas"], 2)
+
+
+class PruebaServidorNRCCaido(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        # Nadie escucha en el puerto NRC: cada consulta falla con conexión rechazada
+        server.configurar(self.dir, puerto_nrc=puerto_libre(), degradado=True)
+        self.addCleanup(setattr, server, 'MODO_DEGRADADO', False)
+        server.inicializar_csvs()
+        server.agregar_estudiante('1', 'Uno')
+        self.reloj = Reloj()
+        parche = mock.patch.object(server, 'CIRCUITO_NRC', Circuito(2, 10, reloj=self.reloj))
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_el_circuito_abierto_no_consulta(self):
+        for _ in range(2):
+            self.assertIn("conexión rechazada", server.consultar_nrc('FIS101')["mensaje"])
+        with mock.patch.object(server, '_consultar_nrc_directo') as directo, \
+                mock.patch.object(server.POOL_NRC, 'consultar') as pool:
+            res = server.consultar_nrc('FIS101')
+            directo.assert_not_called()
+            pool.assert_not_called()
+        self.assertTrue(res["sin_servicio"])
+        self.assertIn("circuito abierto", res["mensaje"])
+
+    def test_las_pendientes_se_confirman_o_eliminan_al_volver(self):
+        for materia in ('FIS101', 'XYZ999', 'FIS101'):
+            res = server.agregar_calificacion('1', materia, '14')
+            self.assertEqual(res["status"], "ok")
+            self.assertTrue(res["pendiente"])
+        self.assertEqual(len(server.PENDIENTES.filas()), 3)
+        # Un reinicio no pierde la lista
+        self.assertEqual(PendientesNRC(server.ARCHIVO_PENDIENTES).filas(), server.PENDIENTES.filas())
+
+        # Vuelve el servidor NRC (sus respuestas, ya en caché)
+        server.CACHE_NRC.guardar('FIS101', NRC_OK)
+        server.CACHE_NRC.guardar('XYZ999', NRC_NO)
+        server.verificar_pendientes()
+        self.assertEqual(server.PENDIENTES.filas(), [])
+        self.assertEqual([f['Materia'] for f in server.ALMACEN.calificaciones_de('1')], ['FIS101', 'FIS101'])
+
+    def test_sin_respuesta_siguen_pendientes(self):
+        server.agregar_calificacion('1', 'FIS101', '14')
+        server.verificar_pendientes()
+        self.assertEqual(server.PENDIENTES.filas(), [('1', 'FIS101', '14.0')])
+        self.assertEqual(len(server.ALMACEN.calificaciones_de('1')), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+"""cliente.py: modo no interactivo de client.py."""
+import os
+import socket
+import subprocess
+import sys
+import unittest
+
+import comun
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+class PruebaSinMenu(unittest.TestCase):
+    def test_servidor_caido_muestra_el_error_y_termina_con_error(self):
+        puerto = str(puerto_libre())
+        for carpeta in (comun.CON_HILOS, comun.SIN_HILOS):
+            with self.subTest(carpeta=os.path.basename(carpeta)):
+                proc = subprocess.run([sys.executable, os.path.join(carpeta, 'client.py'), '--puerto', puerto,
+                                       '-c', 'BUSCAR|1001'], capture_output=True, text=True, timeout=30)
+                self.assertNotEqual(proc.returncode, 0)
+                self.assertIn("Error de conexión:", proc.stderr)
+                self.assertNotIn("Traceback", proc.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Reintentos y timeouts de cliente.Cliente frente a un servidor de mentira."""
+import json
+import socket
+import threading
+import unittest
+from unittest import mock
+
+import comun  # noqa: F401  (rutas)
+from cliente import Cliente, SinRespuesta
+from protocolo import enviar_mensaje, recibir_mensaje
+
+OK = {"status": "ok", "mensaje": "hecho"}
+OCUPADO = {"status": "busy", "mensaje": "Servidor ocupado"}
+CERRAR = 'cerrar'   # lee el comando y cierra sin responder
+CALLAR = 'callar'   # lee el comando y no responde (el cliente agota su timeout)
+
+
+class ServidorFalso:
+    """Atiende los comandos con `acciones`, una por comando recibido y en orden."""
+
+    def __init__(self, acciones):
+        self.acciones = list(acciones)
+        self.recibidos = []
+        self.conexiones = 0
+        self._sock = socket.create_server(('localhost', 0))
+        self.puerto = self._sock.getsockname()[1]
+        threading.Thread(target=self._atender, daemon=True).start()
+
+    def _atender(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            self.conexiones += 1
+            with conn:
+                while (datos := recibir_mensaje(conn)) is not None:
+                    self.recibidos.append(datos.decode('utf-8'))
+                    accion = self.acciones.pop(0)
+                    if accion == CERRAR:
+                        break
+                    if accion == CALLAR:
+                        continue
+                    enviar_mensaje(conn, json.dumps(accion).encode('utf-8'))
+                    if accion['status'] == 'busy':
+                        break   # como el servidor real, cierra tras responder busy
+
+    def cerrar(self):
+        self._sock.close()
+
+
+class PruebaReintentos(unittest.TestCase):
+    def cliente(self, *acciones, reintentos=2):
+        servidor = ServidorFalso(acciones)
+        self.addCleanup(servidor.cerrar)
+        cliente = Cliente('localhost', servidor.puerto, timeout=0.2, reintentos=reintentos, espera=0)
+        self.addCleanup(cliente.cerrar)
+        return cliente, servidor
+
+    def test_consulta_se_repite_si_se_corta_la_conexion(self):
+        cliente, servidor = self.cliente(CERRAR, OK)
+        self.assertEqual(cliente.enviar('BUSCAR|1'), OK)
+        self.assertEqual(servidor.recibidos, ['BUSCAR|1', 'BUSCAR|1'])
+
+    def test_consulta_se_repite_tras_un_timeout(self):
+        cliente, servidor = self.cliente(CALLAR, OK)
+        self.assertEqual(cliente.enviar('PROMEDIO|1'), OK)
+        self.assertEqual(servidor.recibidos, ['PROMEDIO|1', 'PROMEDIO|1'])
+        self.assertEqual(servidor.conexiones, 2)
+
+    def test_modificacion_enviada_no_se_repite(self):
+        for accion, error in ((CERRAR, SinRespuesta), (CALLAR, socket.timeout)):
+            with self.subTest(accion=accion):
+                cliente, servidor = self.cliente(accion, OK)
+                self.assertRaises(error, cliente.enviar, 'AGREGAR|1|MAT101|12')
+                self.assertEqual(servidor.recibidos, ['AGREGAR|1|MAT101|12'])
+
+    def test_modificacion_se_repite_si_la_conexion_reutilizada_estaba_cerrada(self):
+        cliente, servidor = self.cliente(OK, CERRAR, OK)
+        cliente.enviar('BUSCAR|1')
+        self.assertEqual(cliente.enviar('AGREGAR|1|MAT101|12'), OK)
+        self.assertEqual(servidor.recibidos, ['BUSCAR|1', 'AGREGAR|1|MAT101|12', 'AGREGAR|1|MAT101|12'])
+        self.assertEqual(servidor.conexiones, 2)
+
+    def test_busy_se_repite_aunque_modifique(self):
+        cliente, servidor = self.cliente(OCUPADO, OCUPADO, OK)
+        self.assertEqual(cliente.enviar('ELIMINAR|1'), OK)
+        self.assertEqual(len(servidor.recibidos), 3)
+
+    def test_busy_hasta_agotar_los_reintentos_se_devuelve(self):
+        cliente, servidor = self.cliente(OCUPADO, OCUPADO, reintentos=1)
+        self.assertEqual(cliente.enviar('BUSCAR|1'), OCUPADO)
+        self.assertEqual(len(servidor.recibidos), 2)
+
+    def test_sin_conexion_se_repite_y_luego_falla(self):
+        cliente = Cliente('localhost', 1, reintentos=2, espera=0)
+        with mock.patch.object(Cliente, '_conectar', side_effect=ConnectionRefusedError) as conectar:
+            self.assertRaises(ConnectionRefusedError, cliente.enviar, 'AGREGAR|1|MAT101|12')
+        self.assertEqual(conectar.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
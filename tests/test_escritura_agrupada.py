@@ -0,0 +1,151 @@
+"""EscrituraAgrupada y las durabilidades de Almacen ('batch' y 'every-write')."""
+import csv
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import comun  # noqa: F401  (rutas)
+from almacen import Almacen
+from escritura_agrupada import EscrituraAgrupada
+
+
+def esperar(condicion, limite=2.0):
+    fin = time.monotonic() + limite
+    while not condicion():
+        if time.monotonic() > fin:
+            raise AssertionError("La condición no se cumplió a tiempo")
+        time.sleep(0.001)
+
+
+class PruebaEscrituraAgrupada(unittest.TestCase):
+    def setUp(self):
+        self.escribiendo = threading.Event()
+        self.soltar = threading.Event()
+        self.lotes = []
+
+    def escribir(self, filas):
+        # Cada lote se queda escribiendo hasta `soltar`, como un fsync lento
+        self.escribiendo.set()
+        self.soltar.wait(2)
+        self.lotes.append(list(filas))
+        return [f * 10 for f in filas]
+
+    def agregar_en_hilos(self, agrupada, filas):
+        resultados = {}
+
+        def agregar(fila):
+            try:
+                resultados[fila] = agrupada.agregar(fila)
+            except Exception as e:
+                resultados[fila] = e
+        hilos = [threading.Thread(target=agregar, args=(f,), daemon=True) for f in filas]
+        for h in hilos:
+            h.start()
+        return hilos, resultados
+
+    def lote_lento_y_cola(self, agrupada, cola):
+        """Bloquea al escritor con la fila 0 y encola `cola` mientras tanto."""
+        primero, resultados = self.agregar_en_hilos(agrupada, [0])
+        self.assertTrue(self.escribiendo.wait(2))
+        hilos, otros = self.agregar_en_hilos(agrupada, cola)
+        esperar(lambda: len(agrupada._pendientes) == len(cola))
+        self.soltar.set()
+        for h in primero + hilos:
+            h.join(2)
+        resultados.update(otros)
+        return resultados
+
+    def test_agrupa_lo_que_llega_durante_una_escritura(self):
+        agrupada = EscrituraAgrupada(self.escribir)
+        self.addCleanup(agrupada.cerrar)
+        resultados = self.lote_lento_y_cola(agrupada, [1, 2, 3, 4, 5])
+        self.assertEqual(self.lotes[0], [0])
+        self.assertEqual(sorted(self.lotes[1]), [1, 2, 3, 4, 5])
+        self.assertEqual(resultados, {f: f * 10 for f in range(6)})
+        self.assertEqual(agrupada.estadisticas(), {"lotes": 2, "filas": 6})
+
+    def test_respeta_max_filas(self):
+        agrupada = EscrituraAgrupada(self.escribir, max_filas=2)
+        self.addCleanup(agrupada.cerrar)
+        self.lote_lento_y_cola(agrupada, [1, 2, 3, 4, 5])
+        self.assertEqual([len(lote) for lote in self.lotes], [1, 2, 2, 1])
+        self.assertEqual(agrupada.estadisticas(), {"lotes": 4, "filas": 6})
+
+    def test_el_error_llega_a_todo_el_lote(self):
+        def fallar(filas):
+            raise OSError("disco lleno")
+        agrupada = EscrituraAgrupada(fallar)
+        self.addCleanup(agrupada.cerrar)
+        hilos, resultados = self.agregar_en_hilos(agrupada, [1, 2, 3])
+        for h in hilos:
+            h.join(2)
+        self.assertEqual(len(resultados), 3)
+        for error in resultados.values():
+            self.assertIsInstance(error, OSError)
+        # El escritor sigue funcionando después del error
+        self.assertRaises(OSError, agrupada.agregar, 4)
+
+    def test_cerrar_escribe_lo_pendiente_y_rechaza_lo_nuevo(self):
+        agrupada = EscrituraAgrupada(self.escribir, intervalo=10)
+        hilos, resultados = self.agregar_en_hilos(agrupada, [1, 2])
+        esperar(lambda: len(agrupada._pendientes) == 2)
+        self.soltar.set()
+        agrupada.cerrar()
+        for h in hilos:
+            h.join(2)
+        self.assertEqual(resultados, {1: 10, 2: 20})
+        self.assertRaises(RuntimeError, agrupada.agregar, 3)
+
+
+class PruebaDurabilidad(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.calificaciones = os.path.join(self.dir, 'calificaciones.csv')
+        with open(self.calificaciones, 'w', newline='', encoding='utf-8') as f:
+            f.write('ID_Estudiante,Materia,Calificación\n')
+
+    def almacen(self, durabilidad):
+        almacen = Almacen(os.path.join(self.dir, 'estudiantes.csv'), self.calificaciones,
+                          durabilidad=durabilidad)
+        almacen.cargar()
+        self.addCleanup(almacen.cerrar)
+        return almacen
+
+    def en_disco(self):
+        with open(self.calificaciones, newline='', encoding='utf-8') as f:
+            return list(csv.reader(f))[1:]
+
+    def test_every_write_escribe_cada_fila_antes_de_volver(self):
+        almacen = self.almacen('every-write')
+        self.assertIsNone(almacen.escritura_agrupada())
+        for i, calif in enumerate(['12', '15.5', '20']):
+            almacen.agregar_calificacion('100', 'MAT101', calif)
+            self.assertEqual(len(self.en_disco()), i + 1)
+            self.assertEqual(len(almacen.calificaciones_de('100')), i + 1)
+
+    def test_batch_agrupa_y_cada_fila_es_visible_al_volver(self):
+        almacen = self.almacen('batch')
+        faltan = []
+
+        def agregar(id_est):
+            almacen.agregar_calificacion(id_est, 'MAT101', '14')
+            if not almacen.calificaciones_de(id_est) or [id_est, 'MAT101', '14'] not in self.en_disco():
+                faltan.append(id_est)
+        hilos = [threading.Thread(target=agregar, args=(str(i),)) for i in range(20)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join(5)
+        self.assertEqual(faltan, [])
+        self.assertEqual(len(self.en_disco()), 20)
+        estadisticas = almacen.escritura_agrupada()
+        self.assertEqual(estadisticas["filas"], 20)
+        self.assertLessEqual(estadisticas["lotes"], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
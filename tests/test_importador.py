@@ -0,0 +1,61 @@
+"""importador.py importar: motivos de rechazo y registro de estudiantes."""
+import argparse
+import csv
+import os
+import shutil
+import socket
+import tempfile
+import unittest
+
+import comun
+import importador
+import server
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+class PruebaImportador(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        # Nadie escucha en el puerto del servidor de NRCs
+        server.configurar(self.dir, puerto_nrc=puerto_libre())
+        server.inicializar_csvs()
+        self.entrada = os.path.join(self.dir, 'entrada.csv')
+        self.rechazos = os.path.join(self.dir, 'rechazados.csv')
+
+    def importar(self, filas, catalogo=None):
+        with open(self.entrada, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows([importador.CAMPOS_ENTRADA] + filas)
+        importador.importar(argparse.Namespace(entrada=self.entrada, rechazos=self.rechazos, trozo=100,
+                                               procesos=1, catalogo=catalogo))
+        with open(self.rechazos, newline='', encoding='utf-8') as f:
+            motivos = {(row[0], row[2]): row[4] for row in list(csv.reader(f))[1:]}
+        almacen = server.crear_almacen()
+        almacen.cargar()
+        return motivos, almacen
+
+    def test_estudiante_sin_filas_aceptadas_no_se_registra(self):
+        motivos, almacen = self.importar([
+            ['2001', 'Ana', 'XYZ999', '15'],
+            ['2002', 'Luis', 'XYZ999', '12'],
+            ['2002', 'Luis', 'MAT101', '18'],
+            ['2003', 'Eva', 'MAT101', '30'],
+        ], catalogo=os.path.join(comun.RAIZ, 'nrcs.csv'))
+        self.assertEqual(motivos[('2001', 'XYZ999')], "NRC no encontrado")
+        self.assertEqual(motivos[('2003', 'MAT101')], "Calificación fuera de rango (0–20)")
+        self.assertEqual(set(almacen.nombres()), {'2002'})
+        self.assertEqual([f['Materia'] for f in almacen.calificaciones_de('2002')], ['MAT101'])
+
+    def test_servidor_nrc_caido_no_es_nrc_no_encontrado(self):
+        motivos, almacen = self.importar([['2001', 'Ana', 'MAT101', '15'], ['2002', 'Luis', 'FIS101', '12']])
+        self.assertEqual(set(motivos.values()), {importador.MOTIVO_SIN_SERVICIO})
+        self.assertEqual(almacen.contar(), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
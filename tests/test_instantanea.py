@@ -0,0 +1,64 @@
+"""Instantánea binaria (instantanea.py): contenido y regeneración."""
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+import comun  # noqa: F401  (rutas)
+import instantanea
+from instantanea import Instantanea
+
+FILAS = [['100', 'MAT101', '12'], ['101', 'Física', '15.0'], ['100', 'QUI101', '7.50'],
+         ['102', 'MAT101', '20'], ['100', 'MAT101', '13']]
+
+
+class PruebaInstantanea(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.csv = os.path.join(self.dir, 'calificaciones.csv')
+        self.escribir(FILAS)
+
+    def escribir(self, filas):
+        with open(self.csv, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows([['ID_Estudiante', 'Materia', 'Calificación']] + filas)
+
+    def abrir(self):
+        inst = Instantanea.abrir(self.csv)
+        self.addCleanup(inst.cerrar)
+        return inst
+
+    def test_mismas_filas_que_el_csv(self):
+        inst = self.abrir()
+        self.assertTrue(instantanea.vigente(self.csv))
+        self.assertEqual([list(t) for t in inst], FILAS)
+        self.assertEqual([list(t) for t in inst.tuplas_de('100')], [f for f in FILAS if f[0] == '100'])
+        self.assertEqual(inst.tuplas_de('999'), [])
+
+    def test_se_regenera_si_cambia_el_csv(self):
+        self.abrir()
+        filas = FILAS + [['103', 'BDD101', '11']]
+        self.escribir(filas)
+        self.assertFalse(instantanea.vigente(self.csv))
+        self.assertEqual([list(t) for t in self.abrir()], filas)
+        self.assertTrue(instantanea.vigente(self.csv))
+
+    def test_se_regenera_si_cambia_sin_cambiar_de_tamano(self):
+        self.abrir()
+        st = os.stat(self.csv)
+        filas = [f if f[0] != '102' else ['102', 'MAT101', '19'] for f in FILAS]
+        self.escribir(filas)
+        os.utime(self.csv, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertEqual(os.path.getsize(self.csv), st.st_size)
+        self.assertEqual([list(t) for t in self.abrir()], filas)
+
+    def test_se_regenera_si_el_archivo_no_es_valido(self):
+        with open(instantanea.ruta_para(self.csv), 'wb') as f:
+            f.write(b'CALIFv1\0basura')
+        self.assertFalse(instantanea.vigente(self.csv))
+        self.assertEqual([list(t) for t in self.abrir()], FILAS)
+
+
+if __name__ == '__main__':
+    unittest.main()
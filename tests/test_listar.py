@@ -0,0 +1,96 @@
+"""LISTAR paginado y LISTAR_FLUJO en los dos servidores."""
+import csv
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from comun import cargar_sin_hilos
+import server
+from protocolo import CABECERA_FLUJO, enviar_mensaje, recibir_flujo, recibir_mensaje
+
+FILAS = [[str(100 + i % 7), f'NRC{i % 5}', f'{i % 21}.0'] for i in range(53)]
+
+
+def filas_de_flujo(trozos):
+    return [json.loads(linea) for trozo in trozos for linea in trozo.splitlines()]
+
+
+class Comun:
+    """Las mismas pruebas para cada servidor (`self.srv`)."""
+
+    def paginas(self, limite):
+        filas, desde = [], 0
+        while True:
+            res = self.srv.listar_pagina(str(desde), str(limite))
+            self.assertEqual(res['status'], 'ok')
+            self.assertEqual(res['desde'], desde)
+            filas.extend(res['data'])
+            if not res['hay_mas']:
+                return filas
+            self.assertEqual(len(res['data']), limite)
+            desde += limite
+
+    def test_las_paginas_recorren_todo_en_orden(self):
+        todas = self.srv.listar_todas()['data']
+        self.assertEqual(len(todas), len(FILAS))
+        for limite in (1, 10, 53, 100):
+            self.assertEqual(self.paginas(limite), todas)
+
+    def test_pagina_pasada_el_final_y_paginacion_invalida(self):
+        res = self.srv.listar_pagina('1000', '10')
+        self.assertEqual((res['status'], res['data'], res['hay_mas']), ('ok', [], False))
+        for desde, limite in (('-1', '10'), ('0', '0'), ('a', '10')):
+            self.assertEqual(self.srv.listar_pagina(desde, limite)['status'], 'error')
+
+    def test_flujo_en_trozos_con_las_mismas_filas(self):
+        with mock.patch.object(self.srv, 'FILAS_POR_TROZO', 10):
+            trozos = list(self.srv.listar_flujo())
+        self.assertEqual([t.count(b'\n') for t in trozos], [10, 10, 10, 10, 10, 3])
+        self.assertEqual(filas_de_flujo(trozos), self.srv.listar_todas()['data'])
+
+
+class PruebaListarConHilos(Comun, unittest.TestCase):
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        server.configurar(directorio, cache_respuestas=0)
+        server.inicializar_csvs()
+        server.ALMACEN.agregar_calificaciones(FILAS)
+        self.srv = server
+
+    def test_flujo_por_la_conexion(self):
+        cliente, servidor = socket.socketpair()
+        hilo = threading.Thread(target=server.manejar_cliente, args=(servidor, 'prueba'))
+        hilo.start()
+        with cliente:
+            enviar_mensaje(cliente, b'LISTAR_FLUJO')
+            self.assertEqual(recibir_mensaje(cliente), CABECERA_FLUJO)
+            filas = filas_de_flujo(recibir_flujo(cliente))
+            cliente.shutdown(socket.SHUT_WR)
+        hilo.join()
+        self.assertEqual(filas, server.listar_todas()['data'])
+
+
+class PruebaListarSinHilos(Comun, unittest.TestCase):
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        with open(os.path.join(directorio, 'estudiantes.csv'), 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows([['ID_Estudiante', 'Nombre']] + [[str(100 + i), 'E'] for i in range(7)])
+        with open(os.path.join(directorio, 'calificaciones.csv'), 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows([['ID_Estudiante', 'Materia', 'Calificación']] + FILAS[:40])
+        self.srv = cargar_sin_hilos()
+        self.srv.configurar(directorio)
+        self.srv.abrir_registro()
+        # Las últimas filas quedan en el registro de cambios, no en el base
+        for id_est, materia, calif in FILAS[40:]:
+            self.assertEqual(self.srv.agregar_calificacion(id_est, materia, calif)['status'], 'ok')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""AlmacenParticionado no se abre con otra cantidad de particiones."""
+import csv
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import comun
+from almacen_particionado import AlmacenParticionado, archivo_cantidad
+
+IDS = [str(1000 + i) for i in range(20)]
+
+
+class PruebaParticiones(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.particiones = os.path.join(self.dir, 'particiones')
+
+    def particionar(self, n):
+        with open(os.path.join(self.dir, 'estudiantes.csv'), 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows([['ID_Estudiante', 'Nombre']] + [[i, f'E{i}'] for i in IDS])
+        with open(os.path.join(self.dir, 'calificaciones.csv'), 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows([['ID_Estudiante', 'Materia', 'Calificación']] +
+                                    [[i, 'MAT101', '10'] for i in IDS])
+        subprocess.run([sys.executable, os.path.join(comun.CON_HILOS, 'migrar.py'), 'particionar',
+                        '--datos', self.dir, '--particiones', str(n), '--reemplazar'],
+                       check=True, stdout=subprocess.DEVNULL)
+
+    def test_particionado_con_un_n_no_abre_con_otro(self):
+        self.particionar(4)
+        for otro in (2, 8):
+            with self.assertRaises(ValueError):
+                AlmacenParticionado(self.particiones, otro)
+        almacen = AlmacenParticionado(self.particiones, 4)
+        almacen.cargar()
+        self.assertTrue(all(almacen.estudiante_existe(i) for i in IDS))
+        self.assertFalse(almacen.agregar_estudiante(IDS[0], 'Otra vez'))
+
+    def test_volver_a_particionar_cambia_n(self):
+        self.particionar(4)
+        self.particionar(8)
+        almacen = AlmacenParticionado(self.particiones, 8)
+        almacen.cargar()
+        self.assertEqual(almacen.contar(), (len(IDS), len(IDS)))
+
+    def test_la_primera_apertura_anota_n(self):
+        almacen = AlmacenParticionado(self.particiones, 4)
+        almacen.cargar()
+        almacen.agregar_estudiantes([(i, f'E{i}') for i in IDS])
+        for otro in (3, 5):
+            with self.assertRaises(ValueError):
+                AlmacenParticionado(self.particiones, otro)
+
+    def test_directorio_sin_anotar_usa_los_archivos(self):
+        almacen = AlmacenParticionado(self.particiones, 4)
+        almacen.agregar_estudiantes([(i, f'E{i}') for i in IDS])
+        os.remove(archivo_cantidad(self.particiones))
+        with self.assertRaises(ValueError):
+            AlmacenParticionado(self.particiones, 8)
+        AlmacenParticionado(self.particiones, 4)
+        self.assertTrue(os.path.exists(archivo_cantidad(self.particiones)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Protocolo con marco (protocolo.py) y compatibilidad con el protocolo antiguo."""
+import json
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+import comun  # noqa: F401  (rutas)
+import server
+from protocolo import (CABECERA, CABECERA_FLUJO, enviar_flujo, enviar_mensaje, es_enmarcado,
+                       recibir_flujo, recibir_mensaje)
+
+
+def recibir_todo(sock):
+    partes = []
+    while parte := sock.recv(65536):
+        partes.append(parte)
+    return b''.join(partes)
+
+
+class PruebaMarco(unittest.TestCase):
+    def setUp(self):
+        self.a, self.b = socket.socketpair()
+        self.addCleanup(self.a.close)
+        self.addCleanup(self.b.close)
+
+    def test_mensajes_seguidos_de_cualquier_tamano(self):
+        grande = bytes(range(256)) * 8192   # 2 MiB, mucho más que un recv
+        hilo = threading.Thread(target=lambda: [enviar_mensaje(self.a, m) for m in (b'uno', grande, b'')])
+        hilo.start()
+        self.assertEqual(recibir_mensaje(self.b), b'uno')
+        self.assertEqual(recibir_mensaje(self.b), grande)
+        self.assertEqual(recibir_mensaje(self.b), b'')
+        hilo.join()
+        self.a.close()
+        self.assertIsNone(recibir_mensaje(self.b))
+
+    def test_cierre_a_mitad_de_un_mensaje(self):
+        self.a.sendall(CABECERA.pack(10) + b'corto')
+        self.a.close()
+        with self.assertRaises(ConnectionError):
+            recibir_mensaje(self.b)
+
+    def test_flujo(self):
+        enviar_flujo(self.a, [b'{"a": 1}\n', b'{"a": 2}\n{"a": 3}\n'])
+        self.assertEqual(recibir_mensaje(self.b), CABECERA_FLUJO)
+        self.assertEqual(b''.join(recibir_flujo(self.b)), b'{"a": 1}\n{"a": 2}\n{"a": 3}\n')
+
+    def test_es_enmarcado_mira_sin_consumir(self):
+        enviar_mensaje(self.a, b'BUSCAR|1')
+        self.assertTrue(es_enmarcado(self.b))
+        self.assertEqual(recibir_mensaje(self.b), b'BUSCAR|1')
+        self.a.sendall(b'BUSCAR|1')
+        self.assertFalse(es_enmarcado(self.b))
+        self.assertEqual(self.b.recv(100), b'BUSCAR|1')
+        self.a.close()
+        self.assertIsNone(es_enmarcado(self.b))
+
+
+class PruebaServidor(unittest.TestCase):
+    """manejar_cliente de con_hilos con los dos protocolos."""
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        server.configurar(directorio, cache_respuestas=0)
+        server.inicializar_csvs()
+        server.ALMACEN.agregar_estudiante('1', 'Uno')
+        server.ALMACEN.agregar_calificaciones([('1', f'NRC{i:04}', 15.0) for i in range(2000)])
+
+    def conectar(self):
+        cliente, servidor = socket.socketpair()
+        hilo = threading.Thread(target=server.manejar_cliente, args=(servidor, 'prueba'))
+        hilo.start()
+        self.addCleanup(hilo.join)
+        self.addCleanup(cliente.close)
+        return cliente
+
+    def test_varios_comandos_y_respuesta_grande_con_marco(self):
+        cliente = self.conectar()
+        enviar_mensaje(cliente, b'BUSCAR|1')
+        enviar_mensaje(cliente, b'BUSCAR|2')
+        res = json.loads(recibir_mensaje(cliente))
+        self.assertEqual(len(res['data']), 2000)   # ~100 KB: no cabe en un recv de 4096
+        self.assertEqual(json.loads(recibir_mensaje(cliente))['status'], 'error')
+        cliente.shutdown(socket.SHUT_WR)
+        self.assertIsNone(recibir_mensaje(cliente))
+
+    def test_protocolo_antiguo_un_comando_sin_marco(self):
+        cliente = self.conectar()
+        cliente.sendall(b'BUSCAR|1')
+        res = json.loads(recibir_todo(cliente))   # el servidor cierra al terminar
+        self.assertEqual(len(res['data']), 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
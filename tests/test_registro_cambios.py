@@ -0,0 +1,136 @@
+"""Registro de cambios (WAL) de sin_hilos/server.py: reaplicarlo al
+reiniciar después de una caída y compactarlo."""
+import csv
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import comun
+from comun import cargar_sin_hilos
+
+IDS = ['100', '101', '102', '103']
+MATERIAS = ['MAT101', 'FIS101', 'QUI101']
+
+
+class PruebaRegistroCambios(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        with open(os.path.join(self.dir, 'estudiantes.csv'), 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows([['ID_Estudiante', 'Nombre']] + [[i, f'E{i}'] for i in IDS])
+        self.esperado = [[IDS[k % len(IDS)], MATERIAS[k % len(MATERIAS)], f'{k}.0'] for k in range(12)]
+        with open(os.path.join(self.dir, 'calificaciones.csv'), 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows([['ID_Estudiante', 'Materia', 'Calificación']] + self.esperado)
+        self.esperado = [list(f) for f in self.esperado]
+
+    def arrancar(self, instantanea=True):
+        """Un "proceso" nuevo del servidor sobre los mismos archivos."""
+        srv = cargar_sin_hilos()
+        srv.USAR_INSTANTANEA = instantanea
+        srv.UMBRAL_COMPACTACION = 10 ** 6
+        srv.configurar(self.dir)
+        srv.abrir_registro()
+        return srv
+
+    def vigentes(self, srv):
+        return [[r['ID_Estudiante'], r['Materia'], r['Calificación']] for r in srv.filas_vigentes()]
+
+    def aplicar(self, srv, rnd, n):
+        """`n` cambios al azar en el servidor y en el modelo (self.esperado)."""
+        for _ in range(n):
+            id_est, materia, nota = rnd.choice(IDS), rnd.choice(MATERIAS), f'{rnd.randint(0, 20)}.0'
+            op = rnd.random()
+            if op < 0.5:
+                self.assertEqual(srv.agregar_calificacion(id_est, materia, nota)['status'], 'ok')
+                self.esperado.append([id_est, materia, nota])
+            elif op < 0.8:
+                res = srv.actualizar_calificacion(id_est, materia, nota)
+                filas = [f for f in self.esperado if f[:2] == [id_est, materia]]
+                self.assertEqual(res['status'], 'ok' if filas else 'not_found')
+                for f in filas:
+                    f[2] = nota
+            else:
+                res = srv.eliminar_por_id(id_est)
+                quedan = [f for f in self.esperado if f[0] != id_est]
+                self.assertEqual(res['status'], 'ok' if len(quedan) < len(self.esperado) else 'not_found')
+                self.esperado = quedan
+
+    def test_reaplica_el_registro_tras_una_caida(self):
+        for instantanea in (True, False):
+            with self.subTest(instantanea=instantanea):
+                rnd = random.Random(instantanea)
+                srv = self.arrancar(instantanea)
+                for _ in range(5):
+                    self.aplicar(srv, rnd, 40)
+                    self.assertEqual(self.vigentes(srv), self.esperado)
+                    srv = self.arrancar(instantanea)   # caída: solo queda lo que está en disco
+                    self.assertEqual(self.vigentes(srv), self.esperado)
+                    for id_est in IDS:
+                        self.assertEqual([[r['ID_Estudiante'], r['Materia'], r['Calificación']]
+                                          for r in srv.filas_de(id_est)],
+                                         [f for f in self.esperado if f[0] == id_est])
+
+    def test_linea_cortada_al_final_se_ignora(self):
+        srv = self.arrancar()
+        self.aplicar(srv, random.Random(1), 30)
+        with open(srv.ARCHIVO_REGISTRO, 'a', newline='', encoding='utf-8') as f:
+            f.write('A,100,MAT1')   # la caída cortó la última escritura
+        self.assertEqual(self.vigentes(self.arrancar()), self.esperado)
+
+    def test_linea_cortada_con_cuatro_campos_se_ignora(self):
+        # "U,100,MAT101,12.0" cortada en "12.0" -> "1": tiene 4 campos pero
+        # no llegó a escribirse el salto de línea
+        srv = self.arrancar()
+        self.aplicar(srv, random.Random(4), 30)
+        self.assertEqual(srv.agregar_calificacion('100', 'MAT101', '3')['status'], 'ok')
+        self.esperado.append(['100', 'MAT101', '3.0'])
+        with open(srv.ARCHIVO_REGISTRO, 'a', newline='', encoding='utf-8') as f:
+            f.write('U,100,MAT101,1')
+        srv = self.arrancar()
+        self.assertEqual(self.vigentes(srv), self.esperado)
+        # Lo que se escriba después no queda pegado a la línea cortada
+        self.assertEqual(srv.agregar_calificacion('101', 'QUI101', '7')['status'], 'ok')
+        self.esperado.append(['101', 'QUI101', '7.0'])
+        self.assertEqual(self.vigentes(self.arrancar()), self.esperado)
+
+    def test_arranca_con_los_csv_del_repositorio(self):
+        for nombre in ('estudiantes.csv', 'calificaciones.csv'):
+            shutil.copy(os.path.join(comun.RAIZ, nombre), self.dir)
+        for instantanea in (True, False):
+            with self.subTest(instantanea=instantanea):
+                srv = self.arrancar(instantanea)
+                materias = [r['Materia'] for r in srv.filas_de('1001')]
+                self.assertIn('Física', materias)
+                self.assertEqual(srv.agregar_calificacion('1001', 'Química', '12')['status'], 'ok')
+                self.assertEqual(srv.actualizar_calificacion('1001', 'Física', '9')['status'], 'ok')
+                srv.compactar()
+                filas = [r for r in self.arrancar(instantanea).filas_de('1001')]
+                self.assertIn({'ID_Estudiante': '1001', 'Materia': 'Química', 'Calificación': '12.0'}, filas)
+                self.assertIn({'ID_Estudiante': '1001', 'Materia': 'Física', 'Calificación': '9.0'}, filas)
+
+    def test_compactar_vacia_el_registro(self):
+        srv = self.arrancar()
+        self.aplicar(srv, random.Random(2), 50)
+        srv.compactar()
+        with open(srv.ARCHIVO_REGISTRO, newline='', encoding='utf-8') as f:
+            self.assertEqual(len(list(csv.reader(f))), 1)   # solo la firma del base
+        with open(srv.ARCHIVO_CALIFICACIONES, newline='', encoding='utf-8') as f:
+            self.assertEqual(list(csv.reader(f))[1:], self.esperado)
+        self.assertEqual(self.vigentes(self.arrancar()), self.esperado)
+
+    def test_caida_a_mitad_de_compactar_no_aplica_dos_veces(self):
+        # El base ya se reemplazó pero el registro viejo sigue ahí: su firma
+        # ya no coincide y debe descartarse, no reaplicarse sobre el base nuevo
+        srv = self.arrancar()
+        self.aplicar(srv, random.Random(3), 50)
+        viejo = srv.ARCHIVO_REGISTRO + '.viejo'
+        shutil.copy(srv.ARCHIVO_REGISTRO, viejo)
+        srv.compactar()
+        os.replace(viejo, srv.ARCHIVO_REGISTRO)
+        self.assertEqual(self.vigentes(self.arrancar()), self.esperado)
+
+
+if __name__ == '__main__':
+    unittest.main()